@@ -1,9 +1,11 @@
 import "jsr:@supabase/functions-js/edge-runtime.d.ts"
-import { createClient } from 'jsr:@supabase/supabase-js@2'
+import { createClient, type SupabaseClient } from 'jsr:@supabase/supabase-js@2'
+import { brotliCompressSync, brotliDecompressSync, constants as zlibConstants, gunzipSync, gzipSync } from 'node:zlib'
 
 const corsHeaders = {
   'Access-Control-Allow-Origin': '*',
-  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type, x-agent-key',
+  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type, x-agent-key, idempotency-key, content-encoding, if-none-match',
+  'Access-Control-Expose-Headers': 'etag',
 }
 
 // Verify agent authentication
@@ -13,7 +15,453 @@ function verifyAgentKey(req: Request): boolean {
   return agentKey === expectedKey
 }
 
-Deno.serve(async (req) => {
+// Rows fetched per page when streaming a listing
+const STREAM_PAGE_SIZE = 500
+
+// Clients opt into streaming by sending `Accept: application/x-ndjson`
+function wantsStream(req: Request): boolean {
+  return (req.headers.get('accept') || '').includes('application/x-ndjson')
+}
+
+// Stream records as newline-delimited JSON. Records are pulled from the
+// generator only as fast as the client reads them, and a failure part-way
+// through is reported as a final `error` record since the status is already sent.
+function ndjsonResponse(records: AsyncGenerator<unknown>): Response {
+  const encoder = new TextEncoder()
+  const body = new ReadableStream({
+    async pull(controller) {
+      try {
+        const { value, done } = await records.next()
+        if (done) {
+          controller.close()
+          return
+        }
+        controller.enqueue(encoder.encode(JSON.stringify(value) + '\n'))
+      } catch (error) {
+        console.error('Error while streaming from ai-agent-api:', error)
+        controller.enqueue(encoder.encode(JSON.stringify({ type: 'error', error: error.message }) + '\n'))
+        controller.close()
+      }
+    },
+    async cancel() {
+      await records.return(undefined)
+    }
+  })
+
+  return new Response(body, {
+    headers: { ...corsHeaders, 'Content-Type': 'application/x-ndjson' }
+  })
+}
+
+// Tables included in an organization export, in the order they are streamed
+const EXPORT_TABLES = ['tasks', 'task_assignees', 'time_entries', 'activity_logs']
+
+// Tables mirrored by local read replicas, with the column each is synced on.
+// deleted_rows carries tombstones for rows removed from the others.
+const SYNC_TABLES: Record<string, string> = {
+  projects: 'updated_at',
+  tasks: 'updated_at',
+  task_assignees: 'assigned_at',
+  task_dependencies: 'created_at',
+  deleted_rows: 'deleted_at',
+}
+
+// Stats of a project that has no tasks yet (and so no rollup row)
+const EMPTY_PROJECT_STATS = {
+  task_count: 0, todo_count: 0, in_progress_count: 0, review_count: 0, done_count: 0, blocked_count: 0,
+  estimated_hours: 0, logged_hours: 0, weighted_progress: null, overdue_count: 0, updated_at: null,
+}
+
+// Actions that write; these honour the Idempotency-Key header
+const MUTATING_ACTIONS = new Set([
+  'create_task', 'update_task', 'assign_task', 'bulk_assign', 'create_project', 'add_comment', 'batch'
+])
+
+// Actions a `batch` may contain, run in one transaction by run_agent_batch (012_agent_batches.sql)
+const BATCH_ACTIONS = new Set([
+  'create_task', 'update_task', 'assign_task', 'bulk_assign', 'create_project', 'add_comment'
+])
+const MAX_BATCH_OPERATIONS = 100
+// Step ids name a step in references ({"$ref": "<id>.task.id"}), next to its index
+const BATCH_STEP_ID = /^[A-Za-z_][A-Za-z0-9_-]*$/
+
+// Categorize tasks by type (based on title/description patterns)
+function categorizeTask(task: any): string {
+  const text = `${task.title} ${task.description || ''}`.toLowerCase()
+
+  if (text.includes('document') || text.includes('readme') || text.includes('guide')) {
+    return 'documentation'
+  } else if (text.includes('test') || text.includes('qa') || text.includes('bug')) {
+    return 'testing'
+  } else if (text.includes('review') || text.includes('pr ') || text.includes('pull request')) {
+    return 'code_review'
+  } else if (text.includes('research') || text.includes('investigate') || text.includes('explore')) {
+    return 'research'
+  } else if (text.includes('data') || text.includes('entry') || text.includes('update records')) {
+    return 'data_entry'
+  }
+  return 'other'
+}
+
+// ========== ACTIVITY LOG ==========
+// Audit rows are buffered per isolate and inserted in bulk, so requests don't
+// wait on activity_logs. The buffer is written once it holds
+// ACTIVITY_LOG_BATCH_SIZE rows, or ACTIVITY_LOG_FLUSH_MS after its first row.
+// EdgeRuntime.waitUntil keeps the isolate alive until pending rows are written,
+// and a shutdown flushes whatever is left. Logging stays best-effort: a batch
+// the database rejects for a bad row is split until that row is isolated, so
+// the others are still written; rows that fail are reported, not retried.
+const ACTIVITY_LOG_BATCH_SIZE = 200
+const ACTIVITY_LOG_FLUSH_MS = 1000
+
+let activityLogClient: SupabaseClient | null = null
+let pendingActivityLogs: Record<string, unknown>[] = []
+let activityLogTimer: { id: number, done: () => void } | null = null
+let activityLogWrites: Promise<void> = Promise.resolve()
+
+function logActivity(entry: Record<string, unknown>): void {
+  // Stamped now, so the row lands in the partition for when it happened rather than when it was flushed
+  pendingActivityLogs.push({ created_at: new Date().toISOString(), ...entry })
+
+  if (pendingActivityLogs.length >= ACTIVITY_LOG_BATCH_SIZE) {
+    flushActivityLogs()
+  } else if (activityLogTimer === null) {
+    EdgeRuntime.waitUntil(new Promise<void>(resolve => {
+      activityLogTimer = {
+        id: setTimeout(() => flushActivityLogs(), ACTIVITY_LOG_FLUSH_MS),
+        done: resolve,
+      }
+    }))
+  }
+}
+
+function flushActivityLogs(): Promise<void> {
+  const timer = activityLogTimer
+  activityLogTimer = null
+  if (timer) clearTimeout(timer.id)
+
+  if (pendingActivityLogs.length) {
+    const batch = pendingActivityLogs
+    pendingActivityLogs = []
+    activityLogClient ??= createClient(
+      Deno.env.get('SUPABASE_URL')!,
+      Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+    )
+    // Chained so batches are written in order, one insert at a time
+    activityLogWrites = activityLogWrites.then(() => insertActivityLogs(batch))
+    EdgeRuntime.waitUntil(activityLogWrites)
+  }
+
+  // The scheduled flush's waitUntil promise settles once this batch is written
+  if (timer) activityLogWrites.then(timer.done)
+  return activityLogWrites
+}
+
+// Data (22xxx) and integrity (23xxx) errors are caused by a row; anything else fails every row alike
+const ROW_ERROR = /^2[23]/
+
+async function insertActivityLogs(rows: Record<string, unknown>[]): Promise<void> {
+  const { error } = await activityLogClient!.from('activity_logs').insert(rows)
+  if (!error) return
+  if (rows.length === 1 || !ROW_ERROR.test(error.code ?? '')) {
+    console.error(`Failed to write ${rows.length} activity log rows:`, error)
+    return
+  }
+  const middle = Math.ceil(rows.length / 2)
+  await insertActivityLogs(rows.slice(0, middle))
+  await insertActivityLogs(rows.slice(middle))
+}
+
+addEventListener('beforeunload', () => {
+  flushActivityLogs()
+})
+
+// ========== IDEMPOTENCY ==========
+// Mutating requests may carry an `Idempotency-Key` header. The first request
+// with a key claims it and stores its response; a retry with the same key gets
+// the stored response back instead of writing again (006_idempotency_keys.sql).
+const IDEMPOTENCY_TTL_HOURS = 24
+// An in-progress claim older than this was abandoned (the function was stopped mid-request)
+const IDEMPOTENCY_LOCK_SECONDS = 150
+
+async function sha256(text: string): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text))
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('')
+}
+
+function idempotencyError(message: string, status: number, headers: Record<string, string> = {}): Response {
+  return new Response(
+    JSON.stringify({ error: message }),
+    { status, headers: { ...corsHeaders, ...headers, 'Content-Type': 'application/json' } }
+  )
+}
+
+async function withIdempotency(
+  req: Request,
+  scope: string,
+  isMutating: (body: any) => boolean,
+  handler: (req: Request) => Promise<Response>
+): Promise<Response> {
+  const idempotencyKey = req.headers.get('idempotency-key')
+  const authorized = req.headers.get('x-agent-key') === Deno.env.get('AI_AGENT_SECRET_KEY')
+  if (req.method !== 'POST' || !idempotencyKey || !authorized) {
+    return handler(req)
+  }
+
+  const text = await req.clone().text()
+  let body
+  try {
+    body = JSON.parse(text)
+  } catch {
+    return handler(req)
+  }
+  if (!isMutating(body)) {
+    return handler(req)
+  }
+
+  const supabase = createClient(
+    Deno.env.get('SUPABASE_URL')!,
+    Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+  )
+  const key = `${scope}:${idempotencyKey}`
+  const requestHash = await sha256(text)
+  const now = new Date()
+  const claim = {
+    key,
+    request_hash: requestHash,
+    status: 'in_progress',
+    response_status: null,
+    response_body: null,
+    content_type: null,
+    locked_until: new Date(now.getTime() + IDEMPOTENCY_LOCK_SECONDS * 1000).toISOString(),
+    expires_at: new Date(now.getTime() + IDEMPOTENCY_TTL_HOURS * 3600 * 1000).toISOString(),
+  }
+
+  try {
+    const { error: claimError } = await supabase.from('idempotency_keys').insert(claim)
+    if (claimError) {
+      if (claimError.code !== '23505') throw claimError  // anything but unique_violation
+
+      const { data: existing, error } = await supabase
+        .from('idempotency_keys')
+        .select('*')
+        .eq('key', key)
+        .maybeSingle()
+      if (error) throw error
+      if (!existing) {
+        return idempotencyError('Request with this Idempotency-Key is being retried, try again', 409, { 'Retry-After': '1' })
+      }
+
+      const expired = new Date(existing.expires_at) <= now
+      if (!expired && existing.request_hash !== requestHash) {
+        return idempotencyError('Idempotency-Key was already used with a different request', 422)
+      }
+      if (!expired && existing.status === 'completed') {
+        return new Response(existing.response_body, {
+          status: existing.response_status,
+          headers: { ...corsHeaders, 'Content-Type': existing.content_type || 'application/json', 'Idempotent-Replayed': 'true' }
+        })
+      }
+      if (!expired && new Date(existing.locked_until) > now) {
+        return idempotencyError('Request with this Idempotency-Key is still in progress', 409, { 'Retry-After': '1' })
+      }
+
+      // Expired, or abandoned mid-request: take the key over unless another retry just did
+      const { data: taken, error: takeError } = await supabase
+        .from('idempotency_keys')
+        .update(claim)
+        .eq('key', key)
+        .eq('locked_until', existing.locked_until)
+        .select('key')
+      if (takeError) throw takeError
+      if (!taken?.length) {
+        return idempotencyError('Request with this Idempotency-Key is still in progress', 409, { 'Retry-After': '1' })
+      }
+    }
+  } catch (error) {
+    console.error(`Idempotency check failed in ${scope}:`, error)
+    return idempotencyError(error.message, 500)
+  }
+
+  const release = () => supabase.from('idempotency_keys').delete().eq('key', key)
+  const complete = (status: number, contentType: string, responseBody: string) => supabase
+    .from('idempotency_keys')
+    .update({ status: 'completed', response_status: status, response_body: responseBody, content_type: contentType })
+    .eq('key', key)
+
+  let response: Response
+  try {
+    response = await handler(req)
+  } catch (error) {
+    await release()
+    throw error
+  }
+
+  // Failed requests wrote nothing to replay; let the retry run again
+  if (!response.ok) {
+    await release()
+    return response
+  }
+
+  const contentType = response.headers.get('content-type') || 'application/json'
+  const headers = new Headers(response.headers)
+
+  // Streamed responses go to the client as they are produced; a copy is
+  // recorded once the stream ends, even if the client disconnects earlier
+  if (response.body && contentType.includes('application/x-ndjson')) {
+    const [toClient, toStore] = response.body.tee()
+    new Response(toStore).text()
+      .then(recorded => complete(response.status, contentType, recorded))
+      .catch(error => console.error(`Failed to record idempotent response in ${scope}:`, error))
+    return new Response(toClient, { status: response.status, headers })
+  }
+
+  const responseBody = await response.text()
+  await complete(response.status, contentType, responseBody)
+  return new Response(responseBody, { status: response.status, headers })
+}
+
+// ========== CONDITIONAL READS ==========
+// list_tasks, list_projects and analyze_workload answer with an ETag built from
+// the request and a version token of the organization the listing is scoped to
+// (013_listing_versions.sql). A request whose If-None-Match holds that ETag
+// gets 304 without the listing being queried or sent. The token is read before
+// the listing, so a change in between makes the next request fetch again.
+// The tags are weak: the same listing may be sent with different encodings.
+async function listingETag(
+  supabase: SupabaseClient,
+  action: string,
+  params: unknown,
+  versionFunction: string,
+  versionArgs: Record<string, unknown>
+): Promise<string> {
+  const { data: version, error } = await supabase.rpc(versionFunction, versionArgs)
+  if (error) throw error
+  const digest = await sha256(JSON.stringify({ action, params: params ?? {}, version }))
+  return `W/"${digest.slice(0, 32)}"`
+}
+
+function matchesETag(req: Request, etag: string): boolean {
+  const header = req.headers.get('if-none-match')
+  if (!header) return false
+  const opaque = (tag: string) => tag.trim().replace(/^W\//, '')
+  return header.trim() === '*' || header.split(',').some(tag => opaque(tag) === opaque(etag))
+}
+
+function notModified(etag: string): Response {
+  return new Response(null, { status: 304, headers: { ...corsHeaders, 'ETag': etag } })
+}
+
+// ========== COMPRESSION ==========
+// Request bodies may be sent gzip- or brotli-compressed (Content-Encoding), and
+// JSON responses are compressed for clients that accept it (Accept-Encoding).
+// Below this size the encoding overhead outweighs the saving
+const COMPRESSION_MIN_BYTES = 1024
+const COMPRESSIBLE_TYPES = ['application/json', 'application/x-ndjson']
+// Quality 5 is about as fast as gzip level 6 and noticeably smaller; the default (11) is too slow per request
+const BROTLI_QUALITY = 5
+// Decompressed request bodies larger than this are rejected
+const MAX_DECODED_BODY_BYTES = 32 * 1024 * 1024
+
+type Encoding = 'br' | 'gzip'
+
+// The first of `supported` the client accepts, honouring q-values (q=0 excludes)
+function negotiateEncoding(req: Request, supported: Encoding[]): Encoding | null {
+  const accepted = new Map<string, number>()
+  for (const part of (req.headers.get('accept-encoding') || '').split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';').map(p => p.trim())
+    if (!name) continue
+    const q = params.find(p => p.startsWith('q='))
+    accepted.set(name, q ? Number(q.slice(2)) : 1)
+  }
+  return supported.find(encoding => (accepted.get(encoding) ?? accepted.get('*') ?? 0) > 0) ?? null
+}
+
+function compressionError(message: string, status: number): Response {
+  return new Response(
+    JSON.stringify({ error: message }),
+    { status, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+  )
+}
+
+// The request with its body decompressed, or an error response
+async function decodeRequest(req: Request): Promise<Request | Response> {
+  const encoding = (req.headers.get('content-encoding') || 'identity').trim().toLowerCase()
+  if (encoding === 'identity' || !req.body) {
+    return req
+  }
+  if (encoding !== 'gzip' && encoding !== 'br') {
+    return compressionError(`Unsupported Content-Encoding: ${encoding}`, 415)
+  }
+
+  const raw = new Uint8Array(await req.arrayBuffer())
+  let body: Uint8Array
+  try {
+    const options = { maxOutputLength: MAX_DECODED_BODY_BYTES }
+    body = encoding === 'gzip' ? gunzipSync(raw, options) : brotliDecompressSync(raw, options)
+  } catch (error) {
+    if (error instanceof RangeError) {
+      return compressionError('Request body is too large', 413)
+    }
+    return compressionError(`Request body is not valid ${encoding}`, 400)
+  }
+
+  const headers = new Headers(req.headers)
+  headers.delete('content-encoding')
+  headers.delete('content-length')
+  return new Request(req.url, { method: req.method, headers, body })
+}
+
+async function compressResponse(req: Request, response: Response): Promise<Response> {
+  const contentType = response.headers.get('content-type') || ''
+  if (!response.body || response.headers.has('content-encoding') ||
+      !COMPRESSIBLE_TYPES.some(type => contentType.includes(type))) {
+    return response
+  }
+
+  const headers = new Headers(response.headers)
+  headers.append('Vary', 'Accept-Encoding')
+
+  // Streams are compressed as they are produced. CompressionStream has no
+  // brotli, and emits output as its window fills, so records arrive in
+  // batches of a few pages; listings care about throughput, not per-row latency
+  if (contentType.includes('application/x-ndjson')) {
+    if (!negotiateEncoding(req, ['gzip'])) {
+      return new Response(response.body, { status: response.status, headers })
+    }
+    headers.set('Content-Encoding', 'gzip')
+    headers.delete('content-length')
+    return new Response(response.body.pipeThrough(new CompressionStream('gzip')), { status: response.status, headers })
+  }
+
+  const encoding = negotiateEncoding(req, ['br', 'gzip'])
+  const body = new Uint8Array(await response.arrayBuffer())
+  if (!encoding || body.byteLength < COMPRESSION_MIN_BYTES) {
+    return new Response(body, { status: response.status, headers })
+  }
+
+  const compressed = encoding === 'br'
+    ? brotliCompressSync(body, {
+        params: {
+          [zlibConstants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+          [zlibConstants.BROTLI_PARAM_SIZE_HINT]: body.byteLength,
+        }
+      })
+    : gzipSync(body, { level: 6 })
+  headers.set('Content-Encoding', encoding)
+  headers.delete('content-length')
+  return new Response(compressed, { status: response.status, headers })
+}
+
+async function withCompression(req: Request, handler: (req: Request) => Promise<Response>): Promise<Response> {
+  const decoded = await decodeRequest(req)
+  if (decoded instanceof Response) {
+    return decoded
+  }
+  return compressResponse(req, await handler(decoded))
+}
+
+async function handleRequest(req: Request): Promise<Response> {
   // Handle CORS
   if (req.method === 'OPTIONS') {
     return new Response('ok', { headers: corsHeaders })
@@ -38,51 +486,130 @@ Deno.serve(async (req) => {
     switch (action) {
       // ========== TASK OPERATIONS ==========
       case 'list_tasks': {
-        const { project_id, status, assignee_id, limit = 100 } = params || {}
-        
-        let query = supabase
-          .from('tasks')
-          .select(`
-            *,
-            project:projects(*),
-            assignees:task_assignees(
-              user_id,
-              profiles:profiles(*)
-            ),
-            comments:comments(count)
-          `)
-          .limit(limit)
-          .order('created_at', { ascending: false })
+        const { project_id, status, assignee_id, organization_id } = params || {}
+        const stream = wantsStream(req)
+        // Streaming listings are unbounded unless the caller asks for a limit
+        const limit = params?.limit ?? (stream ? null : 100)
+
+        const buildQuery = () => {
+          // Tasks carry no organization_id, so scope through an inner join on the project
+          let query = supabase
+            .from('tasks')
+            .select(`
+              *,
+              project:projects${organization_id ? '!inner' : ''}(*),
+              assignees:task_assignees(
+                user_id,
+                profiles:profiles(*)
+              ),
+              comments:comments(count)
+            `)
+            .order('created_at', { ascending: false })
+            .order('id', { ascending: false })
 
-        if (project_id) query = query.eq('project_id', project_id)
-        if (status) query = query.eq('status', status)
-        if (assignee_id) {
-          query = query.in('id', 
-            supabase
-              .from('task_assignees')
-              .select('task_id')
-              .eq('user_id', assignee_id)
-          )
+          if (organization_id) query = query.eq('project.organization_id', organization_id)
+          if (project_id) query = query.eq('project_id', project_id)
+          if (status) query = query.eq('status', status)
+          if (assignee_id) {
+            query = query.in('id', 
+              supabase
+                .from('task_assignees')
+                .select('task_id')
+                .eq('user_id', assignee_id)
+            )
+          }
+          return query
         }
 
-        const { data: tasks, error } = await query
+        if (stream) {
+          // Keyset pages on (created_at, id), newest first: tasks created in one
+          // transaction share created_at, and offsets shift as tasks are added
+          return ndjsonResponse((async function* () {
+            let cursor = null
+            let sent = 0
+            while (limit === null || sent < limit) {
+              const pageSize = limit === null ? STREAM_PAGE_SIZE : Math.min(STREAM_PAGE_SIZE, limit - sent)
+              let query = buildQuery().limit(pageSize)
+              if (cursor) {
+                query = query.or(`created_at.lt."${cursor.created_at}",and(created_at.eq."${cursor.created_at}",id.lt.${cursor.id})`)
+              }
+
+              const { data: page, error } = await query
+              if (error) throw error
+
+              for (const task of page) {
+                yield { type: 'task', data: task }
+              }
+              sent += page.length
+              if (page.length < pageSize) break
+              const last = page[page.length - 1]
+              cursor = { created_at: last.created_at, id: last.id }
+            }
+            yield { type: 'end', count: sent }
+          })())
+        }
+
+        const etag = await listingETag(supabase, action, params, 'task_listing_version', {
+          for_organization: organization_id || null,
+          for_project: project_id || null,
+        })
+        if (matchesETag(req, etag)) {
+          return notModified(etag)
+        }
+
+        const { data: tasks, error } = await buildQuery().limit(limit)
         
         if (error) throw error
         
         return new Response(
           JSON.stringify({ tasks }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json', 'ETag': etag } }
+        )
+      }
+
+      case 'search_tasks': {
+        const { query, organization_id, project_id, status, limit = 20, offset = 0 } = params || {}
+
+        if (!query || typeof query !== 'string' || !query.trim()) {
+          throw new Error('query is required')
+        }
+        if (!Number.isInteger(limit) || limit < 1 || limit > 100) {
+          throw new Error('limit must be a whole number between 1 and 100')
+        }
+        if (!Number.isInteger(offset) || offset < 0) {
+          throw new Error('offset must be a non-negative whole number')
+        }
+
+        // Ranked from the GIN index on task_search (009_task_search.sql); one extra row tells us whether there is a next page
+        const { data: matches, error } = await supabase.rpc('search_tasks', {
+          search_query: query,
+          for_organization: organization_id || null,
+          for_project: project_id || null,
+          for_status: status || null,
+          result_limit: limit + 1,
+          result_offset: offset,
+        })
+
+        if (error) throw error
+
+        const tasks = matches.slice(0, limit)
+        return new Response(
+          JSON.stringify({ tasks, next_offset: matches.length > limit ? offset + limit : null }),
           { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
         )
       }
 
       case 'create_task': {
-        const { title, description, project_id, priority, due_date, status, parent_task_id } = params
+        const { title, description, project_id, priority, due_date, status, parent_task_id, recurrence } = params
         
         if (!title || !project_id) {
           throw new Error('Title and project_id are required')
         }
+        if (recurrence && !due_date) {
+          throw new Error('Recurring tasks need a due_date (their first occurrence)')
+        }
 
-        const { data: task, error } = await supabase
+        const { data: created, error } = await supabase
           .from('tasks')
           .insert({
             title,
@@ -92,23 +619,28 @@ Deno.serve(async (req) => {
             due_date,
             status: status || 'todo',
             parent_task_id,
+            // An RRULE string or pattern object; validated by the database (007_recurring_tasks.sql)
+            is_recurring: Boolean(recurrence),
+            recurrence_pattern: typeof recurrence === 'string' ? { rrule: recurrence } : recurrence || null,
             created_by: 'ai-agent', // Track that this was created by AI
           })
-          .select()
+          // The project's organization comes back with the row for the activity log
+          .select('*, project:projects(organization_id)')
           .single()
 
         if (error) throw error
+        const { project, ...task } = created
 
-        // Log agent activity
-        await supabase
-          .from('activity_logs')
-          .insert({
-            entity_type: 'task',
-            entity_id: task.id,
-            action: 'created_by_agent',
-            user_id: 'ai-agent',
-            changes: { created_task: task }
-          })
+        // Written behind the response, batched with other requests' rows
+        logActivity({
+          entity_type: 'task',
+          entity_id: task.id,
+          organization_id: project?.organization_id ?? null,
+          action: 'created_by_agent',
+          // Agent writes have no profile (012_agent_batches.sql)
+          user_id: null,
+          changes: { created_task: task }
+        })
 
         return new Response(
           JSON.stringify({ task }),
@@ -157,6 +689,56 @@ Deno.serve(async (req) => {
         )
       }
 
+      case 'bulk_assign': {
+        const { assignments } = params || {}
+
+        if (!Array.isArray(assignments) || assignments.length === 0) {
+          throw new Error('assignments must be a non-empty list')
+        }
+
+        const rows = assignments.map(({ task_id, user_id }) => {
+          if (!task_id || !user_id) {
+            throw new Error('Each assignment requires task_id and user_id')
+          }
+          return { task_id, user_id }
+        })
+
+        // One statement for the whole batch; existing assignments are left as they are
+        const { data: inserted, error } = await supabase
+          .from('task_assignees')
+          .upsert(rows, { onConflict: 'task_id,user_id', ignoreDuplicates: true })
+          .select('task_id, user_id')
+
+        if (error) throw error
+
+        return new Response(
+          JSON.stringify({ success: true, assigned: inserted?.length || 0 }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        )
+      }
+
+      case 'materialize_recurring': {
+        const { organization_id, horizon_days = 90 } = params || {}
+
+        if (!Number.isInteger(horizon_days) || horizon_days < 1 || horizon_days > 366) {
+          throw new Error('horizon_days must be a whole number of days between 1 and 366')
+        }
+
+        // Expands and inserts every due series in one statement; runs are incremental and repeatable
+        const { data, error } = await supabase.rpc('materialize_recurring_tasks', {
+          horizon: `${horizon_days} days`,
+          for_organization: organization_id || null,
+        })
+
+        if (error) throw error
+
+        const { templates_advanced = 0, tasks_created = 0 } = data?.[0] || {}
+        return new Response(
+          JSON.stringify({ success: true, templates_advanced, tasks_created, horizon_days }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        )
+      }
+
       // ========== PROJECT OPERATIONS ==========
       case 'create_project': {
         const { name, description, organization_id, status } = params
@@ -186,7 +768,15 @@ Deno.serve(async (req) => {
       }
 
       case 'list_projects': {
-        const { organization_id, limit = 50 } = params || {}
+        const { organization_id, limit = 50, include_stats = false } = params || {}
+
+        const etag = await listingETag(supabase, action, params, 'project_listing_version', {
+          for_organization: organization_id || null,
+          with_stats: Boolean(include_stats),
+        })
+        if (matchesETag(req, etag)) {
+          return notModified(etag)
+        }
         
         let query = supabase
           .from('projects')
@@ -201,21 +791,67 @@ Deno.serve(async (req) => {
         const { data: projects, error } = await query
         
         if (error) throw error
+
+        // Rollups are maintained by triggers (008_project_rollups.sql): one row per project
+        if (include_stats && projects?.length) {
+          const { data: stats, error: statsError } = await supabase
+            .from('project_stats')
+            .select('*')
+            .in('project_id', projects.map(project => project.id))
+
+          if (statsError) throw statsError
+
+          const statsByProject = new Map(stats.map(({ project_id, ...row }) => [project_id, row]))
+          for (const project of projects) {
+            project.stats = statsByProject.get(project.id) ?? { ...EMPTY_PROJECT_STATS }
+          }
+        }
         
         return new Response(
           JSON.stringify({ projects }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json', 'ETag': etag } }
+        )
+      }
+
+      case 'list_members': {
+        const { organization_id } = params || {}
+
+        if (!organization_id) {
+          throw new Error('organization_id is required')
+        }
+
+        const { data: members, error } = await supabase
+          .from('organization_members')
+          .select('user_id, role, profile:profiles(*)')
+          .eq('organization_id', organization_id)
+
+        if (error) throw error
+
+        return new Response(
+          JSON.stringify({ members }),
           { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
         )
       }
 
       // ========== ANALYSIS OPERATIONS ==========
       case 'analyze_workload': {
-        const { user_id } = params || {}
+        const { user_id, organization_id } = params || {}
+
+        const etag = await listingETag(supabase, action, params, 'workload_version', {
+          for_organization: organization_id || null,
+        })
+        if (matchesETag(req, etag)) {
+          return notModified(etag)
+        }
         
         // Get task statistics
         let taskQuery = supabase
           .from('tasks')
-          .select('status, priority, due_date', { count: 'exact' })
+          .select(`status, priority, due_date${organization_id ? ', project:projects!inner(organization_id)' : ''}`, { count: 'exact' })
+
+        if (organization_id) {
+          taskQuery = taskQuery.eq('project.organization_id', organization_id)
+        }
         
         if (user_id) {
           const { data: assignedTaskIds } = await supabase
@@ -261,27 +897,45 @@ Deno.serve(async (req) => {
 
         return new Response(
           JSON.stringify({ workload: metrics }),
-          { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json', 'ETag': etag } }
         )
       }
 
       case 'find_suitable_agent_tasks': {
+        const { organization_id } = params || {}
+
         // Find tasks suitable for automation
-        const { data: tasks, error } = await supabase
+        let query = supabase
           .from('tasks')
           .select(`
             *,
-            project:projects(name),
+            project:projects${organization_id ? '!inner(name, organization_id)' : '(name)'},
             assignees:task_assignees(count)
           `)
           .eq('status', 'todo')
           .is('assignees.count', 0) // Unassigned tasks
           .in('priority', ['low', 'medium'])
+          // Most urgent first, so the slice holds the work that is due soonest
+          .order('due_date', { ascending: true, nullsFirst: false })
+          .order('priority')
           .limit(20)
 
+        // Tasks carry no organization_id, so scope through an inner join on the project
+        if (organization_id) query = query.eq('project.organization_id', organization_id)
+
+        const { data: tasks, error } = await query
+
         if (error) throw error
 
-        // Categorize tasks by type (based on title/description patterns)
+        if (wantsStream(req)) {
+          return ndjsonResponse((async function* () {
+            for (const task of tasks || []) {
+              yield { type: 'task', category: categorizeTask(task), data: task }
+            }
+            yield { type: 'end', count: tasks?.length || 0 }
+          })())
+        }
+
         const categorized = {
           documentation: [],
           testing: [],
@@ -292,21 +946,7 @@ Deno.serve(async (req) => {
         }
 
         tasks?.forEach(task => {
-          const text = `${task.title} ${task.description || ''}`.toLowerCase()
-          
-          if (text.includes('document') || text.includes('readme') || text.includes('guide')) {
-            categorized.documentation.push(task)
-          } else if (text.includes('test') || text.includes('qa') || text.includes('bug')) {
-            categorized.testing.push(task)
-          } else if (text.includes('review') || text.includes('pr ') || text.includes('pull request')) {
-            categorized.code_review.push(task)
-          } else if (text.includes('research') || text.includes('investigate') || text.includes('explore')) {
-            categorized.research.push(task)
-          } else if (text.includes('data') || text.includes('entry') || text.includes('update records')) {
-            categorized.data_entry.push(task)
-          } else {
-            categorized.other.push(task)
-          }
+          categorized[categorizeTask(task)].push(task)
         })
 
         return new Response(
@@ -315,6 +955,223 @@ Deno.serve(async (req) => {
         )
       }
 
+      // ========== EXPORT OPERATIONS ==========
+      case 'export_tasks': {
+        const { organization_id, tables = EXPORT_TABLES } = params || {}
+
+        if (!organization_id) {
+          throw new Error('organization_id is required')
+        }
+
+        const unknown = tables.filter(table => !EXPORT_TABLES.includes(table))
+        if (unknown.length > 0) {
+          throw new Error(`Unknown export tables: ${unknown.join(', ')}`)
+        }
+
+        const { data: projects, error: projectError } = await supabase
+          .from('projects')
+          .select('id')
+          .eq('organization_id', organization_id)
+
+        if (projectError) throw projectError
+        const projectIds = projects.map(p => p.id)
+
+        // Rows belonging to the organization, joined through tasks where the
+        // table has no organization_id of its own
+        const scopedQuery = (table: string) => {
+          switch (table) {
+            case 'tasks':
+              return supabase.from('tasks').select('*').in('project_id', projectIds)
+            case 'task_assignees':
+            case 'time_entries':
+              return supabase
+                .from(table)
+                .select('*, task:tasks!inner(project_id)')
+                .in('task.project_id', projectIds)
+            default:
+              // Task rows logged without an organization get their project's on insert (016_activity_log_organizations.sql)
+              return supabase.from('activity_logs').select('*').eq('organization_id', organization_id)
+          }
+        }
+
+        // Always streamed: pages are keyed on id so each batch is one indexed range scan
+        return ndjsonResponse((async function* () {
+          const counts = {}
+          for (const table of tables) {
+            counts[table] = 0
+            let lastId = null
+            while (true) {
+              let query = scopedQuery(table).order('id').limit(STREAM_PAGE_SIZE)
+              if (lastId) query = query.gt('id', lastId)
+
+              const { data: page, error } = await query
+              if (error) throw error
+              if (page.length === 0) break
+
+              const rows = page.map(({ task, ...row }) => row)
+              yield { type: 'batch', table, rows }
+
+              counts[table] += rows.length
+              lastId = rows[rows.length - 1].id
+              if (page.length < STREAM_PAGE_SIZE) break
+            }
+          }
+          yield { type: 'end', counts }
+        })())
+      }
+
+      case 'sync_changes': {
+        // since: { table: watermark } from the replica; missing tables sync from the start
+        const { organization_id, since = {} } = params || {}
+
+        if (!organization_id) {
+          throw new Error('organization_id is required')
+        }
+
+        const { data: projects, error: projectError } = await supabase
+          .from('projects')
+          .select('id')
+          .eq('organization_id', organization_id)
+
+        if (projectError) throw projectError
+        const projectIds = projects.map(p => p.id)
+
+        const scopedQuery = (table: string) => {
+          switch (table) {
+            case 'projects':
+              return supabase.from('projects').select('*').eq('organization_id', organization_id)
+            case 'tasks':
+              return supabase.from('tasks').select('*').in('project_id', projectIds)
+            case 'task_assignees':
+              return supabase
+                .from('task_assignees')
+                .select('*, task:tasks!inner(project_id)')
+                .in('task.project_id', projectIds)
+            case 'task_dependencies':
+              return supabase
+                .from('task_dependencies')
+                .select('*, task:tasks!task_id!inner(project_id)')
+                .in('task.project_id', projectIds)
+            default:
+              return supabase
+                .from('deleted_rows')
+                .select('*')
+                .eq('organization_id', organization_id)
+                .in('table_name', Object.keys(SYNC_TABLES))
+          }
+        }
+
+        // Tombstones older than the purge horizon are gone (005_sync_tombstones.sql), so a
+        // replica that last saw tombstones before it may hold deleted rows: it starts over
+        const { data: horizons, error: horizonError } = await supabase.rpc('tombstone_horizon')
+        if (horizonError) throw horizonError
+        const [horizon] = horizons
+        const tombstoneMark = since.deleted_rows
+        const resync = Object.keys(since).length > 0 && horizon.purged_before !== null &&
+          (!tombstoneMark || new Date(tombstoneMark) < new Date(horizon.purged_before))
+        const from = resync ? {} : since
+
+        // Keyset pages on (watermark, id): rows written in one transaction share
+        // a timestamp, so the timestamp alone cannot be used as a cursor
+        return ndjsonResponse((async function* () {
+          if (resync) {
+            yield { type: 'resync', purged_before: horizon.purged_before }
+          }
+          const counts = {}
+          for (const [table, column] of Object.entries(SYNC_TABLES)) {
+            counts[table] = 0
+            let cursor = from[table] ? { value: from[table], id: null } : null
+            while (true) {
+              let query = scopedQuery(table)
+                .order(column)
+                .order('id')
+                .limit(STREAM_PAGE_SIZE)
+              if (cursor?.id) {
+                query = query.or(`${column}.gt."${cursor.value}",and(${column}.eq."${cursor.value}",id.gt.${cursor.id})`)
+              } else if (cursor) {
+                query = query.gte(column, cursor.value)
+              }
+
+              const { data: page, error } = await query
+              if (error) throw error
+              if (page.length === 0) break
+
+              const rows = page.map(({ task, ...row }) => row)
+              yield { type: 'batch', table, rows }
+
+              counts[table] += rows.length
+              const last = rows[rows.length - 1]
+              cursor = { value: last[column], id: last.id }
+              if (page.length < STREAM_PAGE_SIZE) break
+            }
+          }
+          // Becomes the replica's tombstone watermark, even when no tombstones were sent
+          yield { type: 'end', counts, synced_at: horizon.server_time }
+        })())
+      }
+
+      // ========== BATCH OPERATIONS ==========
+      case 'batch': {
+        const { operations } = params || {}
+
+        if (!Array.isArray(operations) || operations.length === 0) {
+          throw new Error('operations must be a non-empty list')
+        }
+        if (operations.length > MAX_BATCH_OPERATIONS) {
+          throw new Error(`A batch takes at most ${MAX_BATCH_OPERATIONS} operations`)
+        }
+
+        const stepIds = new Set<string>()
+        for (const [index, operation] of operations.entries()) {
+          if (!BATCH_ACTIONS.has(operation?.action)) {
+            throw new Error(`Operation ${index}: action must be one of ${[...BATCH_ACTIONS].join(', ')}`)
+          }
+          if (operation.id !== undefined) {
+            if (typeof operation.id !== 'string' || !BATCH_STEP_ID.test(operation.id) || stepIds.has(operation.id)) {
+              throw new Error(`Operation ${index}: id must be a unique name (letters, digits, _ and -)`)
+            }
+            stepIds.add(operation.id)
+          }
+        }
+
+        // One round trip and one transaction; a failed step rolls back the earlier ones
+        const { data: results, error } = await supabase.rpc('run_agent_batch', { operations })
+
+        if (error) throw error
+
+        const created = operations.flatMap((operation, index) =>
+          operation.action === 'create_task' ? [results[index].task] : []
+        )
+        if (created.length) {
+          // The organizations of the created tasks' projects, for their activity log rows
+          const { data: projects, error: projectsError } = await supabase
+            .from('projects')
+            .select('id, organization_id')
+            .in('id', [...new Set(created.map(task => task.project_id))])
+
+          // The batch is committed by now, so a failed lookup only leaves the rows without an organization
+          if (projectsError) console.error('Failed to look up organizations for activity log rows:', projectsError)
+          const organizations = new Map((projects ?? []).map(project => [project.id, project.organization_id]))
+
+          for (const task of created) {
+            logActivity({
+              entity_type: 'task',
+              entity_id: task.id,
+              organization_id: organizations.get(task.project_id) ?? null,
+              action: 'created_by_agent',
+              // Agent writes have no profile (012_agent_batches.sql)
+              user_id: null,
+              changes: { created_task: task }
+            })
+          }
+        }
+
+        return new Response(
+          JSON.stringify({ results }),
+          { headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+        )
+      }
+
       // ========== COMMENT OPERATIONS ==========
       case 'add_comment': {
         const { task_id, content } = params
@@ -354,4 +1211,8 @@ Deno.serve(async (req) => {
       { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
     )
   }
-})
\ No newline at end of file
+}
+
+Deno.serve((req) => withCompression(req, decoded =>
+  withIdempotency(decoded, 'ai-agent-api', body => MUTATING_ACTIONS.has(body?.action), handleRequest)
+))
\ No newline at end of file
@@ -131,6 +131,113 @@ Format the response as:
   return JSON.parse(data.choices[0].message.content)
 }
 
+// Clients opt into streaming by sending `Accept: application/x-ndjson`
+function wantsStream(req: Request): boolean {
+  return (req.headers.get('accept') || '').includes('application/x-ndjson')
+}
+
+// Stream records as newline-delimited JSON. Records are pulled from the
+// generator only as fast as the client reads them, and a failure part-way
+// through is reported as a final `error` record since the status is already sent.
+function ndjsonResponse(records: AsyncGenerator<unknown>): Response {
+  const encoder = new TextEncoder()
+  const body = new ReadableStream({
+    async pull(controller) {
+      try {
+        const { value, done } = await records.next()
+        if (done) {
+          controller.close()
+          return
+        }
+        controller.enqueue(encoder.encode(JSON.stringify(value) + '\n'))
+      } catch (error) {
+        console.error('Error while streaming from ai-task-processor:', error)
+        controller.enqueue(encoder.encode(JSON.stringify({ type: 'error', error: error.message }) + '\n'))
+        controller.close()
+      }
+    },
+    async cancel() {
+      await records.return(undefined)
+    }
+  })
+
+  return new Response(body, {
+    headers: { ...corsHeaders, 'Content-Type': 'application/x-ndjson' }
+  })
+}
+
+// Extract tasks from an email and create them, yielding progress as it happens.
+// The first record goes out before the model call so clients see the request
+// was accepted instead of waiting on the whole extraction.
+async function* processEmailEvents(data: any): AsyncGenerator<{ type: string, [key: string]: any }> {
+  // Handle both old format and new Gmail format
+  const content = data.content || data.body || ''
+  const metadata = data.metadata || {
+    from: data.from,
+    to: data.to,
+    cc: data.cc,
+    subject: data.subject,
+    date: data.date,
+    source: 'gmail'
+  }
+
+  yield { type: 'status', stage: 'extracting' }
+  const processed = await processEmailWithAI(content, metadata)
+  yield { type: 'processed', data: processed }
+  
+  // Auto-create tasks if extraction was successful
+  let created = 0
+  if (processed.standalone_tasks && processed.standalone_tasks.length > 0) {
+    const supabase = createClient(
+      Deno.env.get('SUPABASE_URL')!,
+      Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+    )
+    
+    // Get first project and user for task creation
+    const { data: projects } = await supabase
+      .from('projects')
+      .select('id')
+      .limit(1)
+    
+    const { data: users } = await supabase
+      .from('profiles')
+      .select('id')
+      .limit(1)
+    
+    if (projects && projects.length > 0 && users && users.length > 0) {
+      const projectId = projects[0].id
+      const userId = users[0].id
+      
+      // Create tasks
+      for (const task of processed.standalone_tasks) {
+        const { data: newTask, error } = await supabase
+          .from('tasks')
+          .insert({
+            title: task.title,
+            description: task.description || `Extracted from email: ${metadata.subject || 'No subject'}`,
+            project_id: projectId,
+            priority: task.priority || 'medium',
+            due_date: task.due_date,
+            status: 'todo',
+            created_by: userId
+          })
+          .select()
+          .single()
+        
+        if (!error && newTask) {
+          created++
+          console.log('Created task:', newTask.title)
+          yield { type: 'task', data: newTask }
+        } else {
+          console.error('Failed to create task:', error)
+        }
+      }
+    }
+  }
+
+  yield { type: 'end', created_tasks: created }
+}
+
 Deno.serve(async (req) => {
   // Handle CORS
   if (req.method === 'OPTIONS') {
@@ -161,66 +268,17 @@ Deno.serve(async (req) => {
       }
 
       case 'process_email': {
-        // Handle both old format and new Gmail format
-        const content = data.content || data.body || ''
-        const metadata = data.metadata || {
-          from: data.from,
-          to: data.to,
-          cc: data.cc,
-          subject: data.subject,
-          date: data.date,
-          source: 'gmail'
+        const events = processEmailEvents(data)
+
+        if (wantsStream(req)) {
+          return ndjsonResponse(events)
         }
-        
-        const processed = await processEmailWithAI(content, metadata)
-        
-        // Auto-create tasks if extraction was successful
+
+        let processed = null
         const createdTasks = []
-        if (processed.standalone_tasks && processed.standalone_tasks.length > 0) {
-          const supabase = createClient(
-            Deno.env.get('SUPABASE_URL')!,
-            Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
-          )
-          
-          // Get first project and user for task creation
-          const { data: projects } = await supabase
-            .from('projects')
-            .select('id')
-            .limit(1)
-          
-          const { data: users } = await supabase
-            .from('profiles')
-            .select('id')
-            .limit(1)
-          
-          if (projects && projects.length > 0 && users && users.length > 0) {
-            const projectId = projects[0].id
-            const userId = users[0].id
-            
-            // Create tasks
-            for (const task of processed.standalone_tasks) {
-              const { data: newTask, error } = await supabase
-                .from('tasks')
-                .insert({
-                  title: task.title,
-                  description: task.description || `Extracted from email: ${metadata.subject || 'No subject'}`,
-                  project_id: projectId,
-                  priority: task.priority || 'medium',
-                  due_date: task.due_date,
-                  status: 'todo',
-                  created_by: userId
-                })
-                .select()
-                .single()
-              
-              if (!error && newTask) {
-                createdTasks.push(newTask)
-                console.log('Created task:', newTask.title)
-              } else {
-                console.error('Failed to create task:', error)
-              }
-            }
-          }
+        for await (const event of events) {
+          if (event.type === 'processed') processed = event.data
+          else if (event.type === 'task') createdTasks.push(event.data)
         }
         
         return new Response(
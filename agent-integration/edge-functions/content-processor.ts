@@ -1,9 +1,10 @@
 import "jsr:@supabase/functions-js/edge-runtime.d.ts"
-import { createClient } from 'jsr:@supabase/supabase-js@2'
+import { createClient, type SupabaseClient } from 'jsr:@supabase/supabase-js@2'
+import { brotliCompressSync, brotliDecompressSync, constants as zlibConstants, gunzipSync, gzipSync } from 'node:zlib'
 
 const corsHeaders = {
   'Access-Control-Allow-Origin': '*',
-  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type, x-agent-key',
+  'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type, x-agent-key, idempotency-key, content-encoding',
 }
 
 // Structured data format for agent processing
@@ -29,7 +30,581 @@ interface ProcessedContent {
   summary: string
 }
 
-Deno.serve(async (req) => {
+// Clients opt into streaming by sending `Accept: application/x-ndjson`
+function wantsStream(req: Request): boolean {
+  return (req.headers.get('accept') || '').includes('application/x-ndjson')
+}
+
+// Stream records as newline-delimited JSON. Records are pulled from the
+// generator only as fast as the client reads them, and a failure part-way
+// through is reported as a final `error` record since the status is already sent.
+function ndjsonResponse(records: AsyncGenerator<unknown>): Response {
+  const encoder = new TextEncoder()
+  const body = new ReadableStream({
+    async pull(controller) {
+      try {
+        const { value, done } = await records.next()
+        if (done) {
+          controller.close()
+          return
+        }
+        controller.enqueue(encoder.encode(JSON.stringify(value) + '\n'))
+      } catch (error) {
+        console.error('Error while streaming from content-processor:', error)
+        controller.enqueue(encoder.encode(JSON.stringify({ type: 'error', error: error.message }) + '\n'))
+        controller.close()
+      }
+    },
+    async cancel() {
+      await records.return(undefined)
+    }
+  })
+
+  return new Response(body, {
+    headers: { ...corsHeaders, 'Content-Type': 'application/x-ndjson' }
+  })
+}
+
+// Create the projects and tasks described by processed content, yielding
+// each created row (or per-item failure) as soon as it is written
+async function* saveProcessedContent(
+  supabase: SupabaseClient,
+  processedContent: ProcessedContent,
+  organization_id: string,
+  content_type: string
+): AsyncGenerator<{ type: string, [key: string]: any }> {
+  const counts = { projects: 0, tasks: 0, errors: 0 }
+
+  // Create projects with their tasks
+  for (const projectData of processedContent.projects || []) {
+    try {
+      // Create project
+      const { data: project, error: projectError } = await supabase
+        .from('projects')
+        .insert({
+          name: projectData.name,
+          description: projectData.description,
+          organization_id,
+          status: 'planning',
+          created_by: 'ai-agent'
+        })
+        .select()
+        .single()
+
+      if (projectError) throw projectError
+      counts.projects++
+      yield { type: 'project', data: project }
+
+      // Create tasks for this project
+      for (const taskData of projectData.tasks || []) {
+        try {
+          // Look up assignee if email provided
+          let assignee_id = null
+          if (taskData.assignee_email) {
+            const { data: profile } = await supabase
+              .from('profiles')
+              .select('id')
+              .eq('email', taskData.assignee_email)
+              .single()
+            
+            assignee_id = profile?.id
+          }
+
+          const { data: task, error: taskError } = await supabase
+            .from('tasks')
+            .insert({
+              title: taskData.title,
+              description: taskData.description,
+              project_id: project.id,
+              priority: taskData.priority,
+              due_date: taskData.due_date,
+              status: 'todo',
+              created_by: 'ai-agent'
+            })
+            .select()
+            .single()
+
+          if (taskError) throw taskError
+          counts.tasks++
+          yield { type: 'task', data: task }
+
+          // Assign task if we found the user
+          if (assignee_id && task) {
+            await supabase
+              .from('task_assignees')
+              .insert({
+                task_id: task.id,
+                user_id: assignee_id
+              })
+          }
+        } catch (error) {
+          counts.errors++
+          yield {
+            type: 'item_error',
+            data: {
+              task: taskData.title,
+              error: error.message
+            }
+          }
+        }
+      }
+    } catch (error) {
+      counts.errors++
+      yield {
+        type: 'item_error',
+        data: {
+          project: projectData.name,
+          error: error.message
+        }
+      }
+    }
+  }
+
+  // Create standalone tasks
+  for (const taskData of processedContent.standalone_tasks || []) {
+    try {
+      // Find or create project if specified
+      let project_id = null
+      if (taskData.project_name) {
+        const { data: existingProject } = await supabase
+          .from('projects')
+          .select('id')
+          .eq('name', taskData.project_name)
+          .eq('organization_id', organization_id)
+          .single()
+
+        if (existingProject) {
+          project_id = existingProject.id
+        } else {
+          // Create a new project for this task
+          const { data: newProject } = await supabase
+            .from('projects')
+            .insert({
+              name: taskData.project_name,
+              description: `Auto-created from ${content_type}`,
+              organization_id,
+              status: 'planning',
+              created_by: 'ai-agent'
+            })
+            .select()
+            .single()
+          
+          if (newProject) {
+            project_id = newProject.id
+            counts.projects++
+            yield { type: 'project', data: newProject }
+          }
+        }
+      }
+
+      // If no project specified or found, use a default inbox project
+      if (!project_id) {
+        const { data: inboxProject } = await supabase
+          .from('projects')
+          .select('id')
+          .eq('name', 'Inbox')
+          .eq('organization_id', organization_id)
+          .single()
+
+        if (inboxProject) {
+          project_id = inboxProject.id
+        } else {
+          // Create inbox project
+          const { data: newInbox } = await supabase
+            .from('projects')
+            .insert({
+              name: 'Inbox',
+              description: 'Tasks extracted from emails and documents',
+              organization_id,
+              status: 'active',
+              created_by: 'ai-agent'
+            })
+            .select()
+            .single()
+          
+          if (newInbox) {
+            project_id = newInbox.id
+            counts.projects++
+            yield { type: 'project', data: newInbox }
+          }
+        }
+      }
+
+      if (project_id) {
+        const { data: task, error: taskError } = await supabase
+          .from('tasks')
+          .insert({
+            title: taskData.title,
+            description: taskData.description,
+            project_id,
+            priority: taskData.priority,
+            due_date: taskData.due_date,
+            status: 'todo',
+            created_by: 'ai-agent'
+          })
+          .select()
+          .single()
+
+        if (taskError) throw taskError
+        counts.tasks++
+        yield { type: 'task', data: task }
+      }
+    } catch (error) {
+      counts.errors++
+      yield {
+        type: 'item_error',
+        data: {
+          task: taskData.title,
+          error: error.message
+        }
+      }
+    }
+  }
+
+  // Log the processing activity (written behind the response, see logActivity)
+  logActivity({
+    entity_type: 'content_processing',
+    entity_id: organization_id,
+    organization_id,
+    action: 'processed_content',
+    // Agent writes have no profile (012_agent_batches.sql)
+    user_id: null,
+    changes: {
+      content_type,
+      summary: processedContent.summary,
+      created_projects: counts.projects,
+      created_tasks: counts.tasks,
+      errors: counts.errors
+    }
+  })
+
+  yield {
+    type: 'end',
+    summary: processedContent.summary,
+    created_projects: counts.projects,
+    created_tasks: counts.tasks,
+    errors: counts.errors
+  }
+}
+
+// ========== ACTIVITY LOG ==========
+// Audit rows are buffered per isolate and inserted in bulk, so requests don't
+// wait on activity_logs. The buffer is written once it holds
+// ACTIVITY_LOG_BATCH_SIZE rows, or ACTIVITY_LOG_FLUSH_MS after its first row.
+// EdgeRuntime.waitUntil keeps the isolate alive until pending rows are written,
+// and a shutdown flushes whatever is left. Logging stays best-effort: a batch
+// the database rejects for a bad row is split until that row is isolated, so
+// the others are still written; rows that fail are reported, not retried.
+const ACTIVITY_LOG_BATCH_SIZE = 200
+const ACTIVITY_LOG_FLUSH_MS = 1000
+
+let activityLogClient: SupabaseClient | null = null
+let pendingActivityLogs: Record<string, unknown>[] = []
+let activityLogTimer: { id: number, done: () => void } | null = null
+let activityLogWrites: Promise<void> = Promise.resolve()
+
+function logActivity(entry: Record<string, unknown>): void {
+  // Stamped now, so the row lands in the partition for when it happened rather than when it was flushed
+  pendingActivityLogs.push({ created_at: new Date().toISOString(), ...entry })
+
+  if (pendingActivityLogs.length >= ACTIVITY_LOG_BATCH_SIZE) {
+    flushActivityLogs()
+  } else if (activityLogTimer === null) {
+    EdgeRuntime.waitUntil(new Promise<void>(resolve => {
+      activityLogTimer = {
+        id: setTimeout(() => flushActivityLogs(), ACTIVITY_LOG_FLUSH_MS),
+        done: resolve,
+      }
+    }))
+  }
+}
+
+function flushActivityLogs(): Promise<void> {
+  const timer = activityLogTimer
+  activityLogTimer = null
+  if (timer) clearTimeout(timer.id)
+
+  if (pendingActivityLogs.length) {
+    const batch = pendingActivityLogs
+    pendingActivityLogs = []
+    activityLogClient ??= createClient(
+      Deno.env.get('SUPABASE_URL')!,
+      Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+    )
+    // Chained so batches are written in order, one insert at a time
+    activityLogWrites = activityLogWrites.then(() => insertActivityLogs(batch))
+    EdgeRuntime.waitUntil(activityLogWrites)
+  }
+
+  // The scheduled flush's waitUntil promise settles once this batch is written
+  if (timer) activityLogWrites.then(timer.done)
+  return activityLogWrites
+}
+
+// Data (22xxx) and integrity (23xxx) errors are caused by a row; anything else fails every row alike
+const ROW_ERROR = /^2[23]/
+
+async function insertActivityLogs(rows: Record<string, unknown>[]): Promise<void> {
+  const { error } = await activityLogClient!.from('activity_logs').insert(rows)
+  if (!error) return
+  if (rows.length === 1 || !ROW_ERROR.test(error.code ?? '')) {
+    console.error(`Failed to write ${rows.length} activity log rows:`, error)
+    return
+  }
+  const middle = Math.ceil(rows.length / 2)
+  await insertActivityLogs(rows.slice(0, middle))
+  await insertActivityLogs(rows.slice(middle))
+}
+
+addEventListener('beforeunload', () => {
+  flushActivityLogs()
+})
+
+// ========== IDEMPOTENCY ==========
+// Mutating requests may carry an `Idempotency-Key` header. The first request
+// with a key claims it and stores its response; a retry with the same key gets
+// the stored response back instead of writing again (006_idempotency_keys.sql).
+const IDEMPOTENCY_TTL_HOURS = 24
+// An in-progress claim older than this was abandoned (the function was stopped mid-request)
+const IDEMPOTENCY_LOCK_SECONDS = 150
+
+async function sha256(text: string): Promise<string> {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text))
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('')
+}
+
+function idempotencyError(message: string, status: number, headers: Record<string, string> = {}): Response {
+  return new Response(
+    JSON.stringify({ error: message }),
+    { status, headers: { ...corsHeaders, ...headers, 'Content-Type': 'application/json' } }
+  )
+}
+
+async function withIdempotency(
+  req: Request,
+  scope: string,
+  isMutating: (body: any) => boolean,
+  handler: (req: Request) => Promise<Response>
+): Promise<Response> {
+  const idempotencyKey = req.headers.get('idempotency-key')
+  const authorized = req.headers.get('x-agent-key') === Deno.env.get('AI_AGENT_SECRET_KEY')
+  if (req.method !== 'POST' || !idempotencyKey || !authorized) {
+    return handler(req)
+  }
+
+  const text = await req.clone().text()
+  let body
+  try {
+    body = JSON.parse(text)
+  } catch {
+    return handler(req)
+  }
+  if (!isMutating(body)) {
+    return handler(req)
+  }
+
+  const supabase = createClient(
+    Deno.env.get('SUPABASE_URL')!,
+    Deno.env.get('SUPABASE_SERVICE_ROLE_KEY')!
+  )
+  const key = `${scope}:${idempotencyKey}`
+  const requestHash = await sha256(text)
+  const now = new Date()
+  const claim = {
+    key,
+    request_hash: requestHash,
+    status: 'in_progress',
+    response_status: null,
+    response_body: null,
+    content_type: null,
+    locked_until: new Date(now.getTime() + IDEMPOTENCY_LOCK_SECONDS * 1000).toISOString(),
+    expires_at: new Date(now.getTime() + IDEMPOTENCY_TTL_HOURS * 3600 * 1000).toISOString(),
+  }
+
+  try {
+    const { error: claimError } = await supabase.from('idempotency_keys').insert(claim)
+    if (claimError) {
+      if (claimError.code !== '23505') throw claimError  // anything but unique_violation
+
+      const { data: existing, error } = await supabase
+        .from('idempotency_keys')
+        .select('*')
+        .eq('key', key)
+        .maybeSingle()
+      if (error) throw error
+      if (!existing) {
+        return idempotencyError('Request with this Idempotency-Key is being retried, try again', 409, { 'Retry-After': '1' })
+      }
+
+      const expired = new Date(existing.expires_at) <= now
+      if (!expired && existing.request_hash !== requestHash) {
+        return idempotencyError('Idempotency-Key was already used with a different request', 422)
+      }
+      if (!expired && existing.status === 'completed') {
+        return new Response(existing.response_body, {
+          status: existing.response_status,
+          headers: { ...corsHeaders, 'Content-Type': existing.content_type || 'application/json', 'Idempotent-Replayed': 'true' }
+        })
+      }
+      if (!expired && new Date(existing.locked_until) > now) {
+        return idempotencyError('Request with this Idempotency-Key is still in progress', 409, { 'Retry-After': '1' })
+      }
+
+      // Expired, or abandoned mid-request: take the key over unless another retry just did
+      const { data: taken, error: takeError } = await supabase
+        .from('idempotency_keys')
+        .update(claim)
+        .eq('key', key)
+        .eq('locked_until', existing.locked_until)
+        .select('key')
+      if (takeError) throw takeError
+      if (!taken?.length) {
+        return idempotencyError('Request with this Idempotency-Key is still in progress', 409, { 'Retry-After': '1' })
+      }
+    }
+  } catch (error) {
+    console.error(`Idempotency check failed in ${scope}:`, error)
+    return idempotencyError(error.message, 500)
+  }
+
+  const release = () => supabase.from('idempotency_keys').delete().eq('key', key)
+  const complete = (status: number, contentType: string, responseBody: string) => supabase
+    .from('idempotency_keys')
+    .update({ status: 'completed', response_status: status, response_body: responseBody, content_type: contentType })
+    .eq('key', key)
+
+  let response: Response
+  try {
+    response = await handler(req)
+  } catch (error) {
+    await release()
+    throw error
+  }
+
+  // Failed requests wrote nothing to replay; let the retry run again
+  if (!response.ok) {
+    await release()
+    return response
+  }
+
+  const contentType = response.headers.get('content-type') || 'application/json'
+  const headers = new Headers(response.headers)
+
+  // Streamed responses go to the client as they are produced; a copy is
+  // recorded once the stream ends, even if the client disconnects earlier
+  if (response.body && contentType.includes('application/x-ndjson')) {
+    const [toClient, toStore] = response.body.tee()
+    new Response(toStore).text()
+      .then(recorded => complete(response.status, contentType, recorded))
+      .catch(error => console.error(`Failed to record idempotent response in ${scope}:`, error))
+    return new Response(toClient, { status: response.status, headers })
+  }
+
+  const responseBody = await response.text()
+  await complete(response.status, contentType, responseBody)
+  return new Response(responseBody, { status: response.status, headers })
+}
+
+// ========== COMPRESSION ==========
+// Request bodies may be sent gzip- or brotli-compressed (Content-Encoding), and
+// JSON responses are compressed for clients that accept it (Accept-Encoding).
+// Below this size the encoding overhead outweighs the saving
+const COMPRESSION_MIN_BYTES = 1024
+// NDJSON is left out: streamed saves are small progress events that must reach
+// the client as they happen, and a compressor would hold them back
+const COMPRESSIBLE_TYPES = ['application/json']
+// Quality 5 is about as fast as gzip level 6 and noticeably smaller; the default (11) is too slow per request
+const BROTLI_QUALITY = 5
+// Decompressed request bodies larger than this are rejected
+const MAX_DECODED_BODY_BYTES = 32 * 1024 * 1024
+
+type Encoding = 'br' | 'gzip'
+
+// The first of `supported` the client accepts, honouring q-values (q=0 excludes)
+function negotiateEncoding(req: Request, supported: Encoding[]): Encoding | null {
+  const accepted = new Map<string, number>()
+  for (const part of (req.headers.get('accept-encoding') || '').split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';').map(p => p.trim())
+    if (!name) continue
+    const q = params.find(p => p.startsWith('q='))
+    accepted.set(name, q ? Number(q.slice(2)) : 1)
+  }
+  return supported.find(encoding => (accepted.get(encoding) ?? accepted.get('*') ?? 0) > 0) ?? null
+}
+
+function compressionError(message: string, status: number): Response {
+  return new Response(
+    JSON.stringify({ error: message }),
+    { status, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
+  )
+}
+
+// The request with its body decompressed, or an error response
+async function decodeRequest(req: Request): Promise<Request | Response> {
+  const encoding = (req.headers.get('content-encoding') || 'identity').trim().toLowerCase()
+  if (encoding === 'identity' || !req.body) {
+    return req
+  }
+  if (encoding !== 'gzip' && encoding !== 'br') {
+    return compressionError(`Unsupported Content-Encoding: ${encoding}`, 415)
+  }
+
+  const raw = new Uint8Array(await req.arrayBuffer())
+  let body: Uint8Array
+  try {
+    const options = { maxOutputLength: MAX_DECODED_BODY_BYTES }
+    body = encoding === 'gzip' ? gunzipSync(raw, options) : brotliDecompressSync(raw, options)
+  } catch (error) {
+    if (error instanceof RangeError) {
+      return compressionError('Request body is too large', 413)
+    }
+    return compressionError(`Request body is not valid ${encoding}`, 400)
+  }
+
+  const headers = new Headers(req.headers)
+  headers.delete('content-encoding')
+  headers.delete('content-length')
+  return new Request(req.url, { method: req.method, headers, body })
+}
+
+async function compressResponse(req: Request, response: Response): Promise<Response> {
+  const contentType = response.headers.get('content-type') || ''
+  if (!response.body || response.headers.has('content-encoding') ||
+      !COMPRESSIBLE_TYPES.some(type => contentType.includes(type))) {
+    return response
+  }
+
+  const headers = new Headers(response.headers)
+  headers.append('Vary', 'Accept-Encoding')
+
+  const encoding = negotiateEncoding(req, ['br', 'gzip'])
+  const body = new Uint8Array(await response.arrayBuffer())
+  if (!encoding || body.byteLength < COMPRESSION_MIN_BYTES) {
+    return new Response(body, { status: response.status, headers })
+  }
+
+  const compressed = encoding === 'br'
+    ? brotliCompressSync(body, {
+        params: {
+          [zlibConstants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY,
+          [zlibConstants.BROTLI_PARAM_SIZE_HINT]: body.byteLength,
+        }
+      })
+    : gzipSync(body, { level: 6 })
+  headers.set('Content-Encoding', encoding)
+  headers.delete('content-length')
+  return new Response(compressed, { status: response.status, headers })
+}
+
+async function withCompression(req: Request, handler: (req: Request) => Promise<Response>): Promise<Response> {
+  const decoded = await decodeRequest(req)
+  if (decoded instanceof Response) {
+    return decoded
+  }
+  return compressResponse(req, await handler(decoded))
+}
+
+async function handleRequest(req: Request): Promise<Response> {
   // Handle CORS
   if (req.method === 'OPTIONS') {
     return new Response('ok', { headers: corsHeaders })
@@ -70,200 +645,25 @@ Deno.serve(async (req) => {
 
     // If we have processed data from the agent, create the projects and tasks
     if (processed_data) {
+      const processedContent = processed_data as ProcessedContent
+      const events = saveProcessedContent(supabase, processedContent, organization_id, content_type)
+
+      if (wantsStream(req)) {
+        return ndjsonResponse(events)
+      }
+
       const results = {
         created_projects: [],
         created_tasks: [],
         errors: []
       }
 
-      const processedContent = processed_data as ProcessedContent
-
-      // Create projects with their tasks
-      for (const projectData of processedContent.projects || []) {
-        try {
-          // Create project
-          const { data: project, error: projectError } = await supabase
-            .from('projects')
-            .insert({
-              name: projectData.name,
-              description: projectData.description,
-              organization_id,
-              status: 'planning',
-              created_by: 'ai-agent'
-            })
-            .select()
-            .single()
-
-          if (projectError) throw projectError
-          results.created_projects.push(project)
-
-          // Create tasks for this project
-          for (const taskData of projectData.tasks || []) {
-            try {
-              // Look up assignee if email provided
-              let assignee_id = null
-              if (taskData.assignee_email) {
-                const { data: profile } = await supabase
-                  .from('profiles')
-                  .select('id')
-                  .eq('email', taskData.assignee_email)
-                  .single()
-                
-                assignee_id = profile?.id
-              }
-
-              const { data: task, error: taskError } = await supabase
-                .from('tasks')
-                .insert({
-                  title: taskData.title,
-                  description: taskData.description,
-                  project_id: project.id,
-                  priority: taskData.priority,
-                  due_date: taskData.due_date,
-                  status: 'todo',
-                  created_by: 'ai-agent'
-                })
-                .select()
-                .single()
-
-              if (taskError) throw taskError
-              results.created_tasks.push(task)
-
-              // Assign task if we found the user
-              if (assignee_id && task) {
-                await supabase
-                  .from('task_assignees')
-                  .insert({
-                    task_id: task.id,
-                    user_id: assignee_id
-                  })
-              }
-            } catch (error) {
-              results.errors.push({
-                task: taskData.title,
-                error: error.message
-              })
-            }
-          }
-        } catch (error) {
-          results.errors.push({
-            project: projectData.name,
-            error: error.message
-          })
-        }
+      for await (const event of events) {
+        if (event.type === 'project') results.created_projects.push(event.data)
+        else if (event.type === 'task') results.created_tasks.push(event.data)
+        else if (event.type === 'item_error') results.errors.push(event.data)
       }
 
-      // Create standalone tasks
-      for (const taskData of processedContent.standalone_tasks || []) {
-        try {
-          // Find or create project if specified
-          let project_id = null
-          if (taskData.project_name) {
-            const { data: existingProject } = await supabase
-              .from('projects')
-              .select('id')
-              .eq('name', taskData.project_name)
-              .eq('organization_id', organization_id)
-              .single()
-
-            if (existingProject) {
-              project_id = existingProject.id
-            } else {
-              // Create a new project for this task
-              const { data: newProject } = await supabase
-                .from('projects')
-                .insert({
-                  name: taskData.project_name,
-                  description: `Auto-created from ${content_type}`,
-                  organization_id,
-                  status: 'planning',
-                  created_by: 'ai-agent'
-                })
-                .select()
-                .single()
-              
-              if (newProject) {
-                project_id = newProject.id
-                results.created_projects.push(newProject)
-              }
-            }
-          }
-
-          // If no project specified or found, use a default inbox project
-          if (!project_id) {
-            const { data: inboxProject } = await supabase
-              .from('projects')
-              .select('id')
-              .eq('name', 'Inbox')
-              .eq('organization_id', organization_id)
-              .single()
-
-            if (inboxProject) {
-              project_id = inboxProject.id
-            } else {
-              // Create inbox project
-              const { data: newInbox } = await supabase
-                .from('projects')
-                .insert({
-                  name: 'Inbox',
-                  description: 'Tasks extracted from emails and documents',
-                  organization_id,
-                  status: 'active',
-                  created_by: 'ai-agent'
-                })
-                .select()
-                .single()
-              
-              if (newInbox) {
-                project_id = newInbox.id
-                results.created_projects.push(newInbox)
-              }
-            }
-          }
-
-          if (project_id) {
-            const { data: task, error: taskError } = await supabase
-              .from('tasks')
-              .insert({
-                title: taskData.title,
-                description: taskData.description,
-                project_id,
-                priority: taskData.priority,
-                due_date: taskData.due_date,
-                status: 'todo',
-                created_by: 'ai-agent'
-              })
-              .select()
-              .single()
-
-            if (taskError) throw taskError
-            results.created_tasks.push(task)
-          }
-        } catch (error) {
-          results.errors.push({
-            task: taskData.title,
-            error: error.message
-          })
-        }
-      }
-
-      // Log the processing activity
-      await supabase
-        .from('activity_logs')
-        .insert({
-          entity_type: 'content_processing',
-          entity_id: organization_id,
-          action: 'processed_content',
-          user_id: 'ai-agent',
-          changes: {
-            content_type,
-            summary: processedContent.summary,
-            created_projects: results.created_projects.length,
-            created_tasks: results.created_tasks.length,
-            errors: results.errors.length
-          }
-        })
-
       return new Response(
         JSON.stringify({
           success: true,
@@ -303,4 +703,8 @@ Deno.serve(async (req) => {
       { status: 500, headers: { ...corsHeaders, 'Content-Type': 'application/json' } }
     )
   }
-})
\ No newline at end of file
+}
+
+Deno.serve((req) => withCompression(req, decoded =>
+  withIdempotency(decoded, 'content-processor', body => Boolean(body?.processed_data), handleRequest)
+))
\ No newline at end of file
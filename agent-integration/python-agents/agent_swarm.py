@@ -5,147 +5,186 @@ Multi-agent system for analyzing and executing tasks
 
 import os
 import asyncio
-from typing import List, Dict, Any, Optional
-from agents import Agent, Runner
+from typing import TYPE_CHECKING, Callable, List, Dict, Any, Optional, Union
 from task_management_tools import (
-    list_tasks, create_task, update_task, assign_task,
-    create_project, list_projects, analyze_workload,
+    list_tasks, search_tasks, create_task, update_task, assign_task, bulk_assign_tasks,
+    materialize_recurring_tasks, create_project, list_projects, analyze_workload,
     find_suitable_agent_tasks, add_comment,
-    process_email_content, save_processed_content, ProcessedContent
+    process_email_content, save_processed_content, ProcessedContent,
+    use_local_replica
 )
+from streaming import stream_tasks, stream_suitable_agent_tasks
+from models import Task, TaskDecoder
+from model_scheduler import ModelCallScheduler, get_scheduler
+from task_queue import TaskQueue
+from realtime import EventDispatcher, PostgresChangeSource
+from replica import LocalReplica
+
+if TYPE_CHECKING:
+    from agents import Agent
+    from documents import Chunk, IngestProgress
 
 
 # ============= SPECIALIZED AGENTS =============
 
-# Coordinator Agent - Orchestrates the swarm
-coordinator_agent = Agent(
-    name="Task Coordinator",
-    instructions="""You are the coordinator of a task management agent swarm. Your responsibilities:
-    1. Analyze available tasks and determine which can be automated
-    2. Assign tasks to appropriate specialized agents
-    3. Monitor progress and reassign if needed
-    4. Report results back to the team
-    
-    When analyzing tasks:
-    - Check task descriptions for keywords indicating the type of work
-    - Consider task priority and deadlines
-    - Evaluate complexity and agent capabilities
-    - Group related tasks for efficiency
-    
-    Available specialist agents:
-    - Developer Agent: Code-related tasks, bug fixes, implementations
-    - Writer Agent: Documentation, guides, content creation
-    - QA Agent: Testing, quality assurance, bug verification
-    - Research Agent: Information gathering, analysis, reports
-    """,
-    tools=[list_tasks, find_suitable_agent_tasks, analyze_workload, assign_task, add_comment],
-    handoffs=[]  # Will be set after all agents are defined
-)
+# Agents are built on first use (see get_agent), so a command that needs only
+# one specialist neither constructs the others nor imports the agents SDK.
+AGENT_SPECS: Dict[str, Dict[str, Any]] = {
+    # Coordinator Agent - Orchestrates the swarm
+    'coordinator': {
+        'name': "Task Coordinator",
+        'instructions': """You are the coordinator of a task management agent swarm. Your responsibilities:
+        1. Analyze available tasks and determine which can be automated
+        2. Assign tasks to appropriate specialized agents
+        3. Monitor progress and reassign if needed
+        4. Report results back to the team
+        
+        When analyzing tasks:
+        - Check task descriptions for keywords indicating the type of work
+        - Consider task priority and deadlines
+        - Evaluate complexity and agent capabilities
+        - Group related tasks for efficiency
+        - To find tasks about a topic, use search_tasks rather than listing every task
+        - When assigning several tasks at once, use bulk_assign_tasks instead of repeated assign_task calls
+        - To create upcoming occurrences of recurring tasks, call materialize_recurring_tasks once
+          instead of creating each occurrence with create_task
+        
+        Available specialist agents:
+        - Developer Agent: Code-related tasks, bug fixes, implementations
+        - Writer Agent: Documentation, guides, content creation
+        - QA Agent: Testing, quality assurance, bug verification
+        - Research Agent: Information gathering, analysis, reports
+        """,
+        'tools': [
+            list_tasks, search_tasks, find_suitable_agent_tasks, analyze_workload, assign_task, bulk_assign_tasks,
+            materialize_recurring_tasks, add_comment
+        ],
+        'handoffs': ['developer', 'writer', 'qa', 'research'],
+    },
 
-# Developer Agent - Handles coding tasks
-developer_agent = Agent(
-    name="Developer Agent",
-    handoff_description="Specialist for coding tasks, bug fixes, and technical implementations",
-    instructions="""You are a developer agent specializing in coding tasks. Your capabilities:
-    - Review code and suggest improvements
-    - Create implementation plans
-    - Fix bugs based on descriptions
-    - Write technical specifications
-    
-    When working on a task:
-    1. Analyze the requirements
-    2. Break down into subtasks if needed
-    3. Update task status as you progress
-    4. Add comments with your findings/solutions
-    """,
-    tools=[update_task, add_comment, create_task]
-)
+    # Developer Agent - Handles coding tasks
+    'developer': {
+        'name': "Developer Agent",
+        'handoff_description': "Specialist for coding tasks, bug fixes, and technical implementations",
+        'instructions': """You are a developer agent specializing in coding tasks. Your capabilities:
+        - Review code and suggest improvements
+        - Create implementation plans
+        - Fix bugs based on descriptions
+        - Write technical specifications
+        
+        When working on a task:
+        1. Analyze the requirements
+        2. Break down into subtasks if needed
+        3. Update task status as you progress
+        4. Add comments with your findings/solutions
+        """,
+        'tools': [update_task, add_comment, create_task],
+    },
 
-# Writer Agent - Handles documentation
-writer_agent = Agent(
-    name="Writer Agent",
-    handoff_description="Specialist for documentation, guides, and content creation",
-    instructions="""You are a documentation specialist. Your capabilities:
-    - Write user guides and documentation
-    - Create README files
-    - Draft emails and communications
-    - Improve existing documentation
-    
-    When working on a task:
-    1. Understand the audience and purpose
-    2. Create clear, well-structured content
-    3. Update task status when complete
-    4. Add the content as a comment or attachment
-    """,
-    tools=[update_task, add_comment]
-)
+    # Writer Agent - Handles documentation
+    'writer': {
+        'name': "Writer Agent",
+        'handoff_description': "Specialist for documentation, guides, and content creation",
+        'instructions': """You are a documentation specialist. Your capabilities:
+        - Write user guides and documentation
+        - Create README files
+        - Draft emails and communications
+        - Improve existing documentation
+        
+        When working on a task:
+        1. Understand the audience and purpose
+        2. Create clear, well-structured content
+        3. Update task status when complete
+        4. Add the content as a comment or attachment
+        """,
+        'tools': [update_task, add_comment],
+    },
 
-# QA Agent - Handles testing tasks
-qa_agent = Agent(
-    name="QA Agent",
-    handoff_description="Specialist for testing, quality assurance, and bug verification",
-    instructions="""You are a QA specialist. Your capabilities:
-    - Create test plans and test cases
-    - Verify bug fixes
-    - Perform regression testing analysis
-    - Document testing results
-    
-    When working on a task:
-    1. Understand what needs testing
-    2. Create comprehensive test scenarios
-    3. Document findings clearly
-    4. Update task with results
-    """,
-    tools=[update_task, add_comment, create_task]
-)
+    # QA Agent - Handles testing tasks
+    'qa': {
+        'name': "QA Agent",
+        'handoff_description': "Specialist for testing, quality assurance, and bug verification",
+        'instructions': """You are a QA specialist. Your capabilities:
+        - Create test plans and test cases
+        - Verify bug fixes
+        - Perform regression testing analysis
+        - Document testing results
+        
+        When working on a task:
+        1. Understand what needs testing
+        2. Create comprehensive test scenarios
+        3. Document findings clearly
+        4. Update task with results
+        """,
+        'tools': [update_task, add_comment, create_task],
+    },
 
-# Research Agent - Handles research and analysis
-research_agent = Agent(
-    name="Research Agent",
-    handoff_description="Specialist for research, analysis, and information gathering",
-    instructions="""You are a research specialist. Your capabilities:
-    - Gather information on topics
-    - Analyze data and trends
-    - Create research reports
-    - Provide recommendations
-    
-    When working on a task:
-    1. Define research objectives
-    2. Gather relevant information
-    3. Analyze and synthesize findings
-    4. Present clear conclusions
-    """,
-    tools=[update_task, add_comment]
-)
+    # Research Agent - Handles research and analysis
+    'research': {
+        'name': "Research Agent",
+        'handoff_description': "Specialist for research, analysis, and information gathering",
+        'instructions': """You are a research specialist. Your capabilities:
+        - Gather information on topics
+        - Analyze data and trends
+        - Create research reports
+        - Provide recommendations
+        
+        When working on a task:
+        1. Define research objectives
+        2. Gather relevant information
+        3. Analyze and synthesize findings
+        4. Present clear conclusions
+        """,
+        'tools': [update_task, add_comment],
+    },
 
-# Email Processing Agent - Processes emails into tasks
-email_processor_agent = Agent(
-    name="Email Processor",
-    instructions="""You process emails and meeting transcripts to extract actionable tasks. Your process:
-    1. Read and understand the content
-    2. Identify action items, deadlines, and responsible parties
-    3. Group related items into projects
-    4. Create structured task data
-    
-    Extract:
-    - Clear task titles (action-oriented)
-    - Descriptions with context
-    - Due dates (look for time references)
-    - Priority (based on urgency words)
-    - Assignees (from mentioned names/emails)
-    
-    Output format should be ProcessedContent structure.
-    """,
-    tools=[process_email_content, save_processed_content]
-)
+    # Email Processing Agent - Processes emails into tasks
+    'email_processor': {
+        'name': "Email Processor",
+        'instructions': """You process emails and meeting transcripts to extract actionable tasks. Your process:
+        1. Read and understand the content
+        2. Identify action items, deadlines, and responsible parties
+        3. Group related items into projects
+        4. Create structured task data
+        
+        Extract:
+        - Clear task titles (action-oriented)
+        - Descriptions with context
+        - Due dates (look for time references)
+        - Priority (based on urgency words)
+        - Assignees (from mentioned names/emails)
+        
+        Output format should be ProcessedContent structure.
+        """,
+        'tools': [process_email_content, save_processed_content],
+    },
+}
+
+_agents: Dict[str, 'Agent'] = {}
 
-# Set up handoffs for the coordinator
-coordinator_agent.handoffs = [
-    developer_agent,
-    writer_agent,
-    qa_agent,
-    research_agent
-]
+
+def get_agent(key: str) -> 'Agent':
+    """Build (once) and return the agent registered under `key` in AGENT_SPECS"""
+    agent = _agents.get(key)
+    if agent is None:
+        from agents import Agent
+
+        spec = AGENT_SPECS[key]
+        agent = _agents[key] = Agent(
+            name=spec['name'],
+            handoff_description=spec.get('handoff_description'),
+            instructions=spec['instructions'],
+            tools=[tool.tool for tool in spec['tools']],
+            handoffs=[get_agent(handoff) for handoff in spec.get('handoffs', [])]
+        )
+    return agent
+
+
+def __getattr__(name: str):
+    # Keeps `from agent_swarm import coordinator_agent` (etc.) working
+    if name.endswith('_agent') and name[:-len('_agent')] in AGENT_SPECS:
+        return get_agent(name[:-len('_agent')])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ============= MAIN ORCHESTRATION =============
@@ -153,32 +192,124 @@ coordinator_agent.handoffs = [
 class TaskManagementSwarm:
     """Main class for running the agent swarm"""
     
-    def __init__(self, organization_id: str):
+    def __init__(
+        self,
+        organization_id: str,
+        scheduler: Optional[ModelCallScheduler] = None,
+        replica: Optional[LocalReplica] = None
+    ):
         self.organization_id = organization_id
-        self.runner = Runner()
+        # Shared by default so concurrent swarms in one process share the provider limits
+        self.scheduler = scheduler or get_scheduler()
+        # Agents' reads of this organization are served from the replica when one is given
+        self.replica = replica
+        if replica is not None:
+            use_local_replica(replica)
+        # Tasks waiting for execute_tasks workers, most urgent first
+        self.task_queue = TaskQueue()
+    
+    async def _run_agent(self, agent: 'Agent', prompt: str, priority: str = 'medium'):
+        """Run an agent through the shared model-call scheduler"""
+        from agents import Runner
+
+        return await self.scheduler.run(
+            lambda: Runner.run(agent, input=prompt),
+            priority=priority
+        )
     
     async def analyze_and_assign_tasks(self) -> Dict[str, Any]:
         """
         Analyze available tasks and assign to agents
         """
-        prompt = """
-        Please analyze the current unassigned tasks and:
-        1. Use find_suitable_agent_tasks to identify tasks we can automate
+        prompt = f"""
+        Organization ID: {self.organization_id}
+        
+        Please analyze the organization's current unassigned tasks and:
+        1. Use find_suitable_agent_tasks with the organization ID to identify tasks we can automate
         2. For each suitable task, determine which specialist agent should handle it
         3. Create a plan for task execution
         4. Report which tasks will be automated and which need human attention
         """
         
-        result = await self.runner.run(
-            coordinator_agent,
-            input=prompt
-        )
+        result = await self._run_agent(get_agent('coordinator'), prompt)
         
         return {
             'analysis': result.final_output,
             'agent_assignments': result.context.get('assignments', [])
         }
     
+    async def auto_assign_backlog(self, weekly_capacity_hours: float = 40.0) -> Dict[str, Any]:
+        """
+        Assign the unassigned backlog with the capacity-aware solver and a
+        single bulk write. Only tasks the solver could not place are handed
+        to the coordinator agent.
+        """
+        # NumPy/Arrow are only needed here, so they are not loaded at startup
+        from assignment import plan_assignments, fetch_members, apply_assignments
+
+        def load_tasks():
+            decoder = TaskDecoder()
+            return [
+                decoder.task(row) for row in stream_tasks(organization_id=self.organization_id)
+                if row.get('status') != 'done'
+            ]
+
+        open_tasks = await asyncio.to_thread(load_tasks)
+        backlog = [t for t in open_tasks if t.status == 'todo' and not t.is_assigned]
+        members = await asyncio.to_thread(
+            fetch_members, self.organization_id, open_tasks, weekly_capacity_hours
+        )
+
+        plan = plan_assignments(backlog, members)
+        applied = await asyncio.to_thread(apply_assignments, plan)
+
+        analysis = None
+        if plan.leftovers:
+            leftovers = '\n'.join(
+                f"- {t['task_id']}: {t['title']} (priority: {t['priority']}, reason: {t['reason']})"
+                for t in plan.leftovers
+            )
+            prompt = f"""
+            The automatic assignment pass could not place these tasks:
+            {leftovers}
+            
+            For each one, decide who should take it (use analyze_workload to check
+            load), or report it as needing human attention. Use bulk_assign_tasks
+            for the assignments you make.
+            """
+            result = await self._run_agent(get_agent('coordinator'), prompt)
+            analysis = result.final_output
+
+        return {
+            'assignments': plan.assignments,
+            'applied': applied,
+            'leftovers': plan.leftovers,
+            'analysis': analysis
+        }
+    
+    def watch_backlog(self, dispatcher: EventDispatcher):
+        """
+        Re-run the assignment pass when tasks are created or lose an assignee.
+        Changes arrive already debounced, so a burst of new tasks costs one pass.
+        """
+        if self.replica is not None:
+            # Subscribed first, so the replica is current before the assignment pass runs
+            async def refresh_replica(events):
+                await asyncio.to_thread(self.replica.sync)
+
+            dispatcher.subscribe(refresh_replica)
+
+        async def on_changes(events):
+            if any(
+                (e.table == 'tasks' and e.op == 'INSERT') or
+                (e.table == 'task_assignees' and e.op == 'DELETE')
+                for e in events
+            ):
+                result = await self.auto_assign_backlog()
+                print(f"Assigned {len(result['assignments'])} new tasks, {len(result['leftovers'])} left for review")
+
+        dispatcher.subscribe(on_changes, tables=['tasks', 'task_assignees'])
+    
     async def process_email(self, email_content: str, metadata: Dict = None) -> Dict[str, Any]:
         """
         Process an email to extract tasks
@@ -200,39 +331,76 @@ class TaskManagementSwarm:
         4. Create the tasks in the system
         """
         
-        result = await self.runner.run(
-            email_processor_agent,
-            input=prompt
-        )
+        result = await self._run_agent(get_agent('email_processor'), prompt)
         
         return {
             'processed': result.final_output,
             'created_items': result.context.get('created_items', {})
         }
     
-    async def execute_task(self, task_id: str, task_details: Dict) -> Dict[str, Any]:
+    async def process_document(
+        self,
+        path: str,
+        on_progress: Optional[Callable[['IngestProgress'], None]] = None,
+        concurrency: int = 2
+    ) -> Dict[str, Any]:
+        """
+        Extract tasks from a local PDF, Word document or text export, one chunk
+        of pages at a time, with bounded memory (see documents.py)
+        """
+        from documents import ingest_document
+
+        name = os.path.basename(path)
+
+        async def extract(chunk: 'Chunk'):
+            context = f"""
+        End of the previous part, for context only (it was processed already):
+        {chunk.context}
+        """ if chunk.context else ''
+            prompt = f"""
+        Process part {chunk.index + 1} of the document "{name}" (pages {chunk.first_page}-{chunk.last_page})
+        and extract its actionable tasks.
+        {context}
+        Document text:
+        {chunk.text}
+        
+        Organization ID: {self.organization_id}
+        
+        Please:
+        1. Extract the action items in this part only
+        2. Group related tasks into projects
+        3. Assign priorities based on urgency
+        4. Create the tasks in the system with content_type "document"
+        """
+            # Bulk ingestion yields to interactive work in the shared scheduler
+            await self._run_agent(get_agent('email_processor'), prompt, priority='low')
+
+        return await ingest_document(path, extract, on_progress, concurrency)
+    
+    async def execute_task(self, task_id: str, task_details: Union[Task, Dict]) -> Dict[str, Any]:
         """
         Execute a specific task with the appropriate agent
         """
-        task_type = self._determine_task_type(task_details)
+        task = task_details if isinstance(task_details, Task) else Task.from_dict({'id': task_id, **task_details})
+        task_type = self._determine_task_type(task)
         
         if task_type == 'development':
-            agent = developer_agent
+            agent = get_agent('developer')
         elif task_type == 'documentation':
-            agent = writer_agent
+            agent = get_agent('writer')
         elif task_type == 'testing':
-            agent = qa_agent
+            agent = get_agent('qa')
         elif task_type == 'research':
-            agent = research_agent
+            agent = get_agent('research')
         else:
             return {'error': 'Task type not suitable for automation'}
         
         prompt = f"""
         Please work on this task:
         Task ID: {task_id}
-        Title: {task_details.get('title')}
-        Description: {task_details.get('description')}
-        Priority: {task_details.get('priority')}
+        Title: {task.title}
+        Description: {task.description}
+        Priority: {task.priority}
         
         Steps:
         1. Update status to 'in_progress'
@@ -241,7 +409,7 @@ class TaskManagementSwarm:
         4. Update status to 'review' when complete
         """
         
-        result = await self.runner.run(agent, input=prompt)
+        result = await self._run_agent(agent, prompt, priority=task.priority)
         
         return {
             'task_id': task_id,
@@ -249,9 +417,49 @@ class TaskManagementSwarm:
             'result': result.final_output
         }
     
-    def _determine_task_type(self, task: Dict) -> str:
+    async def execute_tasks(self, tasks: Optional[List[Task]] = None, concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Queue tasks and work through the queue with `concurrency` worker slots.
+
+        Workers always take the most urgent queued task (see TaskQueue), and
+        tasks queued while they run are picked up too.
+
+        Args:
+            tasks: Tasks to add to the queue (none to work through what is already queued)
+            concurrency: Number of tasks executed at the same time
+
+        Returns:
+            One result per executed task, in completion order
+        """
+        for task in tasks or []:
+            self.task_queue.push(task)
+
+        results = []
+
+        async def worker():
+            while self.task_queue:
+                task = self.task_queue.pop()
+                try:
+                    result = await self.execute_task(task.id, task)
+                    results.append({'task_id': task.id, **result})
+                except Exception as error:
+                    results.append({'task_id': task.id, 'error': str(error)})
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+    
+    async def execute_suitable_tasks(self, concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Execute the organization's tasks find_suitable_agent_tasks reports as automatable, most urgent first"""
+        def load_tasks():
+            decoder = TaskDecoder()
+            return [decoder.task(row) for row in stream_suitable_agent_tasks(self.organization_id)]
+
+        tasks = await asyncio.to_thread(load_tasks)
+        return await self.execute_tasks(tasks, concurrency)
+    
+    def _determine_task_type(self, task: Task) -> str:
         """Determine task type based on keywords"""
-        text = f"{task.get('title', '')} {task.get('description', '')}".lower()
+        text = f"{task.title} {task.description or ''}".lower()
         
         if any(word in text for word in ['code', 'implement', 'fix', 'bug', 'develop']):
             return 'development'
@@ -277,7 +485,13 @@ async def main():
     # Get organization ID from environment or use default
     org_id = os.getenv('ORGANIZATION_ID', 'default-org-id')
     
-    swarm = TaskManagementSwarm(org_id)
+    # Serve agent reads from a local SQLite mirror when a path is configured
+    replica = None
+    if os.getenv('LOCAL_REPLICA_PATH'):
+        replica = LocalReplica(org_id, os.getenv('LOCAL_REPLICA_PATH'))
+        replica.sync()
+    
+    swarm = TaskManagementSwarm(org_id, replica=replica)
     
     print("Task Management Agent Swarm")
     print("=" * 40)
@@ -285,11 +499,14 @@ async def main():
     print("1. Analyze tasks")
     print("2. Process email")
     print("3. Execute specific task")
-    print("4. Exit")
+    print("4. Auto-assign backlog")
+    print("5. Watch for new tasks")
+    print("6. Execute suitable tasks")
+    print("7. Exit")
     print()
     
     while True:
-        choice = input("Enter command (1-4): ").strip()
+        choice = input("Enter command (1-7): ").strip()
         
         if choice == '1':
             print("\nAnalyzing tasks...")
@@ -313,17 +530,42 @@ async def main():
         elif choice == '3':
             task_id = input("Enter task ID: ").strip()
             # In real usage, fetch task details from the system
-            task_details = {
-                'title': input("Enter task title: ").strip(),
-                'description': input("Enter task description: ").strip(),
-                'priority': 'medium'
-            }
+            task = Task(
+                id=task_id,
+                title=input("Enter task title: ").strip(),
+                description=input("Enter task description: ").strip(),
+                priority='medium'
+            )
             
             print("\nExecuting task...")
-            result = await swarm.execute_task(task_id, task_details)
+            result = await swarm.execute_task(task_id, task)
             print(f"\nResult: {result}")
             
         elif choice == '4':
+            print("\nAssigning backlog...")
+            result = await swarm.auto_assign_backlog()
+            print(f"\nAssigned {len(result['assignments'])} tasks, {len(result['leftovers'])} left for review")
+            if result['analysis']:
+                print(f"\nCoordinator: {result['analysis']}")
+            
+        elif choice == '5':
+            dispatcher = EventDispatcher()
+            source = PostgresChangeSource(dispatcher)
+            swarm.watch_backlog(dispatcher)
+            await source.start()
+            print("\nWatching for task changes (Ctrl+C to stop)...")
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await source.stop()
+            
+        elif choice == '6':
+            print("\nExecuting suitable tasks, most urgent first...")
+            results = await swarm.execute_suitable_tasks()
+            for result in results:
+                print(f"- {result['task_id']}: {result.get('agent') or result.get('error')}")
+            
+        elif choice == '7':
             print("Exiting...")
             break
         
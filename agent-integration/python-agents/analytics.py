@@ -0,0 +1,339 @@
+"""
+Vectorized workload and velocity analytics
+Computes capacity and delivery metrics over columnar task data in whole-array NumPy passes
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+from export import ENUM_VALUES, rows_to_batch
+from models import Task
+
+STATUSES = ENUM_VALUES['status'].to_pylist()
+PRIORITIES = ENUM_VALUES['priority'].to_pylist()
+DONE = STATUSES.index('done')
+
+HOUR = np.timedelta64(1, 'h')
+DAY = np.timedelta64(1, 'D')
+
+
+# ============= COLUMN HELPERS =============
+
+def _ids(column) -> pa.Array:
+    """ID column as a single string array"""
+    column = column.cast(pa.string())
+    return column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+
+
+def _codes(column, values: pa.Array) -> np.ndarray:
+    """Enum column as int8 positions in `values` (-1 for NULL or unknown)"""
+    return pc.fill_null(pc.index_in(column.cast(pa.string()), value_set=values), -1).to_numpy().astype(np.int8)
+
+
+def _times(column) -> np.ndarray:
+    """Timestamp column as naive UTC datetime64[us] (NaT for NULL)"""
+    return column.cast(pa.timestamp('us', tz='UTC')).cast(pa.timestamp('us')).to_numpy(zero_copy_only=False)
+
+
+def _floats(column) -> np.ndarray:
+    """Numeric column as float64 (NaN for NULL)"""
+    return pc.fill_null(column.cast(pa.float64()), float('nan')).to_numpy()
+
+
+def _lookup(keys: pa.Array, values: pa.Array) -> np.ndarray:
+    """Position of each value in `keys` (-1 when absent), via Arrow's hash join"""
+    return pc.fill_null(pc.index_in(values, value_set=keys), -1).to_numpy().astype(np.int64)
+
+
+def _now(now: Optional[datetime]) -> np.datetime64:
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(now, 'us')
+
+
+# ============= DATA CONTAINER =============
+
+@dataclass
+class WorkloadData:
+    """
+    Columnar view of tasks, assignments and time entries.
+
+    Tasks are rows 0..n-1. Assignments and time entries refer to tasks by row
+    index and to users by index into `users`, so every metric below is a
+    bincount, mask or sort over flat arrays.
+    """
+    task_ids: np.ndarray
+    status: np.ndarray
+    priority: np.ndarray
+    created_at: np.ndarray
+    completed_at: np.ndarray
+    due_date: np.ndarray
+    estimated_hours: np.ndarray
+    actual_hours: np.ndarray
+    users: np.ndarray
+    assignee_task: np.ndarray
+    assignee_user: np.ndarray
+    entry_task: np.ndarray
+    entry_user: np.ndarray
+    entry_hours: np.ndarray
+    entry_date: np.ndarray
+
+    @classmethod
+    def from_arrow(cls, tables: Dict[str, pa.Table]) -> 'WorkloadData':
+        """
+        Build from Arrow tables, e.g. the result of export.load_export.
+
+        Args:
+            tables: 'tasks' plus optional 'task_assignees' and 'time_entries'
+
+        Returns:
+            WorkloadData; assignments and time entries for unknown tasks or without a user are dropped
+        """
+        tasks = tables['tasks']
+        assignees = tables.get('task_assignees')
+        entries = tables.get('time_entries')
+
+        empty = pa.array([], pa.string())
+        task_ids = _ids(tasks.column('id'))
+        a_task = _ids(assignees.column('task_id')) if assignees is not None else empty
+        a_user = _ids(assignees.column('user_id')) if assignees is not None else empty
+        e_task = _ids(entries.column('task_id')) if entries is not None else empty
+        e_user = _ids(entries.column('user_id')) if entries is not None else empty
+
+        a_index = _lookup(task_ids, a_task)
+        e_index = _lookup(task_ids, e_task)
+        a_keep = (a_index >= 0) & pc.is_valid(a_user).to_numpy(zero_copy_only=False)
+        e_keep = (e_index >= 0) & pc.is_valid(e_user).to_numpy(zero_copy_only=False)
+
+        # One user vocabulary shared by assignments and time entries
+        kept_users = pa.concat_arrays([a_user.filter(a_keep), e_user.filter(e_keep)]).dictionary_encode()
+        users = kept_users.dictionary.to_numpy(zero_copy_only=False)
+        user_codes = kept_users.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+        n_assigned = int(a_keep.sum())
+        a_codes, e_codes = user_codes[:n_assigned], user_codes[n_assigned:]
+
+        if entries is not None:
+            e_hours = _floats(entries.column('hours'))[e_keep]
+            e_date = entries.column('date').cast(pa.timestamp('s')).to_numpy(zero_copy_only=False)
+            e_date = e_date.astype('datetime64[D]')[e_keep]
+        else:
+            e_hours = np.array([], dtype=np.float64)
+            e_date = np.array([], dtype='datetime64[D]')
+
+        return cls(
+            task_ids=task_ids.to_numpy(zero_copy_only=False),
+            status=_codes(tasks.column('status'), ENUM_VALUES['status']),
+            priority=_codes(tasks.column('priority'), ENUM_VALUES['priority']),
+            created_at=_times(tasks.column('created_at')),
+            completed_at=_times(tasks.column('completed_at')),
+            due_date=_times(tasks.column('due_date')),
+            estimated_hours=_floats(tasks.column('estimated_hours')),
+            actual_hours=_floats(tasks.column('actual_hours')),
+            users=users,
+            assignee_task=a_index[a_keep],
+            assignee_user=a_codes,
+            entry_task=e_index[e_keep],
+            entry_user=e_codes,
+            entry_hours=e_hours,
+            entry_date=e_date,
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        tasks: List[Dict[str, Any]],
+        assignees: Optional[List[Dict[str, Any]]] = None,
+        time_entries: Optional[List[Dict[str, Any]]] = None
+    ) -> 'WorkloadData':
+        """
+        Build from API row dictionaries.
+
+        Assignees may be passed separately or left embedded in each task's
+        `assignees` list, as returned by list_tasks.
+        """
+        if assignees is None:
+            assignees = [
+                {'task_id': task['id'], 'user_id': a.get('user_id')}
+                for task in tasks
+                for a in task.get('assignees') or []
+            ]
+
+        tables = {
+            'tasks': pa.Table.from_batches([rows_to_batch('tasks', tasks)]),
+            'task_assignees': pa.Table.from_batches([rows_to_batch('task_assignees', assignees)]),
+            'time_entries': pa.Table.from_batches([rows_to_batch('time_entries', time_entries or [])]),
+        }
+        return cls.from_arrow(tables)
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task], time_entries: Optional[List[Dict[str, Any]]] = None) -> 'WorkloadData':
+        """Build from decoded Task records (see models.py)"""
+        return cls.from_records([task.to_row() for task in tasks], time_entries=time_entries)
+
+    @property
+    def is_open(self) -> np.ndarray:
+        return self.status != DONE
+
+    def logged_hours_per_task(self) -> np.ndarray:
+        """Hours from time entries per task, falling back to tasks.actual_hours"""
+        logged = np.bincount(self.entry_task, weights=self.entry_hours, minlength=len(self.task_ids))
+        has_entries = np.bincount(self.entry_task, minlength=len(self.task_ids)) > 0
+        return np.where(has_entries, logged, self.actual_hours)
+
+
+# ============= METRICS =============
+
+def user_load(data: WorkloadData, now: Optional[datetime] = None, window_days: int = 7) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-user load figures.
+
+    Args:
+        data: Workload data
+        now: Reference time (defaults to the current time)
+        window_days: Window for recent logged hours and completions
+
+    Returns:
+        Dictionary of user ID to open task count, open estimated hours,
+        overdue count, open tasks by priority, hours logged and tasks
+        completed within the window
+    """
+    now = _now(now)
+    window_start = now - np.timedelta64(window_days, 'D')
+    n_users = len(data.users)
+    t, u = data.assignee_task, data.assignee_user
+
+    open_rows = data.is_open[t]
+    overdue_rows = open_rows & (data.due_date[t] < now)
+    completed_rows = ~open_rows & (data.completed_at[t] >= window_start)
+    estimate = np.nan_to_num(data.estimated_hours[t])
+
+    open_tasks = np.bincount(u, weights=open_rows, minlength=n_users)
+    open_hours = np.bincount(u, weights=estimate * open_rows, minlength=n_users)
+    overdue = np.bincount(u, weights=overdue_rows, minlength=n_users)
+    completed = np.bincount(u, weights=completed_rows, minlength=n_users)
+
+    # Open tasks per (user, priority) in one pass over a flattened index
+    prio = data.priority[t]
+    valid = open_rows & (prio >= 0)
+    by_priority = np.bincount(
+        u[valid] * len(PRIORITIES) + prio[valid],
+        minlength=n_users * len(PRIORITIES)
+    ).reshape(n_users, len(PRIORITIES))
+
+    recent = data.entry_date >= window_start.astype('datetime64[D]')
+    logged = np.bincount(data.entry_user[recent], weights=data.entry_hours[recent], minlength=n_users)
+
+    return {
+        str(user): {
+            'open_tasks': int(open_tasks[i]),
+            'open_estimated_hours': float(open_hours[i]),
+            'overdue': int(overdue[i]),
+            'open_by_priority': dict(zip(PRIORITIES, by_priority[i].tolist())),
+            'logged_hours': float(logged[i]),
+            'completed': int(completed[i]),
+        }
+        for i, user in enumerate(data.users)
+    }
+
+
+def cycle_times(data: WorkloadData) -> np.ndarray:
+    """Hours from creation to completion for every completed task"""
+    done = ~np.isnat(data.completed_at) & ~np.isnat(data.created_at)
+    return (data.completed_at[done] - data.created_at[done]) / HOUR
+
+
+def cycle_time_summary(data: WorkloadData) -> Dict[str, float]:
+    """Count, mean and percentiles of cycle time in hours"""
+    hours = cycle_times(data)
+    if len(hours) == 0:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0}
+    p50, p90 = np.percentile(hours, [50, 90])
+    return {'count': int(len(hours)), 'mean': float(hours.mean()), 'p50': float(p50), 'p90': float(p90)}
+
+
+def throughput(data: WorkloadData, period: str = 'W') -> Dict[str, int]:
+    """
+    Completed tasks per period.
+
+    Args:
+        data: Workload data
+        period: 'D', 'W' (weeks starting Monday) or 'M'
+
+    Returns:
+        Dictionary of period start (ISO date) to completed task count
+    """
+    completed = data.completed_at[~np.isnat(data.completed_at)].astype('datetime64[D]')
+    if period == 'W':
+        # NumPy weeks start on Thursday (the epoch's weekday); align to Mondays
+        buckets = completed - ((completed.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    else:
+        buckets = completed.astype(f'datetime64[{period}]').astype('datetime64[D]')
+
+    starts, counts = np.unique(buckets, return_counts=True)
+    return {str(b): int(c) for b, c in zip(starts, counts)}
+
+
+def estimate_accuracy(data: WorkloadData) -> Dict[str, float]:
+    """
+    Compare estimated_hours with hours actually spent.
+
+    Returns:
+        Number of tasks with both figures, their totals, the overall
+        actual/estimated ratio and the median per-task ratio
+    """
+    actual = data.logged_hours_per_task()
+    compared = (data.estimated_hours > 0) & ~np.isnan(actual)
+    estimated = data.estimated_hours[compared]
+    spent = actual[compared]
+
+    if len(estimated) == 0:
+        return {'tasks_compared': 0, 'total_estimated': 0.0, 'total_actual': 0.0, 'ratio': 0.0, 'median_ratio': 0.0}
+
+    return {
+        'tasks_compared': int(len(estimated)),
+        'total_estimated': float(estimated.sum()),
+        'total_actual': float(spent.sum()),
+        'ratio': float(spent.sum() / estimated.sum()),
+        'median_ratio': float(np.median(spent / estimated)),
+    }
+
+
+def burndown(data: WorkloadData, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """
+    Open task count at the end of each day in [start, end].
+
+    Uses two sorted searches instead of a pass over tasks per day.
+
+    Returns:
+        List of {'date', 'remaining'} points
+    """
+    days = np.arange(_now(start).astype('datetime64[D]'), _now(end).astype('datetime64[D]') + DAY, DAY)
+    day_ends = (days + DAY).astype('datetime64[us]')
+
+    created = np.sort(data.created_at[~np.isnat(data.created_at)])
+    completed = np.sort(data.completed_at[~np.isnat(data.completed_at)])
+    remaining = np.searchsorted(created, day_ends) - np.searchsorted(completed, day_ends)
+
+    return [{'date': str(d), 'remaining': int(r)} for d, r in zip(days, remaining)]
+
+
+def capacity_report(
+    data: WorkloadData,
+    weekly_capacity_hours: float = 40.0,
+    now: Optional[datetime] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-user load with remaining capacity, for use in assignment decisions.
+
+    Available hours are the weekly capacity minus estimated hours of open
+    assigned work and can be negative for overloaded members.
+    """
+    report = user_load(data, now=now)
+    for figures in report.values():
+        figures['available_hours'] = weekly_capacity_hours - figures['open_estimated_hours']
+    return report
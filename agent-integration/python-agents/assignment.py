@@ -0,0 +1,174 @@
+"""
+Capacity-aware batch assignment for the unassigned backlog
+Places tasks deterministically by priority, due date, expertise and remaining capacity
+"""
+
+import re
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+
+from task_management_tools import REQUEST_TIMEOUT, post_idempotent, post_json
+from analytics import WorkloadData, capacity_report
+from models import Task
+
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Hours assumed for tasks without an estimate
+DEFAULT_ESTIMATE_HOURS = 4.0
+
+# How much one matching expertise term is worth against load, in units of
+# "fraction of weekly capacity". 0.25 means a match outweighs a quarter week of extra load.
+# A term such as 'product-strategy' matches when all of its words are in the task.
+EXPERTISE_WEIGHT = 0.25
+
+
+@dataclass
+class Member:
+    """A team member as seen by the solver"""
+    user_id: str
+    capacity_hours: float = 40.0
+    load_hours: float = 0.0
+    expertise: List[str] = field(default_factory=list)
+
+
+@dataclass
+class AssignmentPlan:
+    """Solver output: tasks it placed, and tasks left for the coordinator agent (with a reason)"""
+    assignments: List[Dict[str, Any]] = field(default_factory=list)
+    leftovers: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def _task_order(task: Task) -> tuple:
+    """Most urgent first: priority, then due date (undated last), then larger work first"""
+    estimate = task.estimated_hours or DEFAULT_ESTIMATE_HOURS
+    return (
+        PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK)),
+        task.due_date is None,
+        task.due_date or '',
+        -estimate,
+        task.id,
+    )
+
+
+def _leftover(task: Task, reason: str) -> Dict[str, Any]:
+    return {'task_id': task.id, 'title': task.title, 'priority': task.priority, 'reason': reason}
+
+
+def plan_assignments(
+    tasks: List[Task],
+    members: List[Member],
+    default_estimate: float = DEFAULT_ESTIMATE_HOURS
+) -> AssignmentPlan:
+    """
+    Assign a backlog in one greedy pass.
+
+    Tasks are taken most urgent first. Each goes to the member with the lowest
+    cost, where cost is the member's load after taking the task as a fraction
+    of capacity, reduced by EXPERTISE_WEIGHT per matching expertise term.
+    Expertise is a bonus: a task nobody's expertise matches goes to the least
+    loaded member with room. Taking the largest tasks first within a priority
+    keeps the final loads balanced.
+
+    A task is left for the coordinator only when nobody has room for it.
+
+    Args:
+        tasks: Unassigned tasks
+        members: Candidate members with current load and capacity
+        default_estimate: Hours assumed for tasks without an estimate
+
+    Returns:
+        AssignmentPlan with task_id/user_id pairs and leftover task_id/reason entries
+    """
+    plan = AssignmentPlan()
+    if not members:
+        plan.leftovers = [_leftover(task, 'no_members') for task in tasks]
+        return plan
+
+    members = sorted(members, key=lambda m: m.user_id)
+    capacity = np.array([max(m.capacity_hours, 1e-9) for m in members])
+    load = np.array([m.load_hours for m in members], dtype=np.float64)
+    # Each term as the set of its words, tokenized like the task text
+    expertise = [[words for words in map(_words, m.expertise) if words] for m in members]
+
+    for task in sorted(tasks, key=_task_order):
+        estimate = task.estimated_hours or default_estimate
+        words = _words(f"{task.title} {task.description or ''}")
+        matches = np.array(
+            [sum(term <= words for term in terms) for terms in expertise], dtype=np.float64
+        )
+
+        fits = load + estimate <= capacity
+        if not fits.any():
+            plan.leftovers.append(_leftover(task, 'no_capacity'))
+            continue
+
+        cost = (load + estimate) / capacity - EXPERTISE_WEIGHT * matches
+        cost[~fits] = np.inf
+        best = int(np.argmin(cost))
+
+        load[best] += estimate
+        plan.assignments.append({
+            'task_id': task.id,
+            'user_id': members[best].user_id,
+            'estimated_hours': estimate,
+            'expertise_matches': int(matches[best]),
+        })
+
+    return plan
+
+
+# ============= API HELPERS =============
+
+def fetch_members(
+    organization_id: str,
+    open_tasks: List[Task],
+    weekly_capacity_hours: float = 40.0
+) -> List[Member]:
+    """
+    Load organization members with their current load.
+
+    Load comes from open estimated hours on already assigned tasks (see
+    analytics.capacity_report). Capacity and expertise come from the
+    profile's work_capacity and expertise columns (014_profile_expertise.sql);
+    members without a work_capacity get weekly_capacity_hours.
+    """
+    response = post_json(
+        'ai-agent-api',
+        {'action': 'list_members', 'params': {'organization_id': organization_id}},
+        timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to list members: {response.text}")
+
+    report = capacity_report(WorkloadData.from_tasks(open_tasks), weekly_capacity_hours)
+
+    members = []
+    for row in response.json()['members']:
+        profile = row.get('profile') or {}
+        work_capacity = profile.get('work_capacity')
+        members.append(Member(
+            user_id=row['user_id'],
+            capacity_hours=float(work_capacity) if work_capacity is not None else weekly_capacity_hours,
+            load_hours=report.get(row['user_id'], {}).get('open_estimated_hours', 0.0),
+            expertise=list(profile.get('expertise') or []),
+        ))
+    return members
+
+
+def apply_assignments(plan: AssignmentPlan) -> Dict[str, Any]:
+    """Write every planned assignment with a single bulk_assign call"""
+    if not plan.assignments:
+        return {'success': True, 'assigned': 0}
+
+    assignments = [{'task_id': a['task_id'], 'user_id': a['user_id']} for a in plan.assignments]
+    response = post_idempotent('ai-agent-api', {'action': 'bulk_assign', 'params': {'assignments': assignments}})
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {'error': f"Failed to bulk assign tasks: {response.text}"}
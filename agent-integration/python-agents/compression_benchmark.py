@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark for edge function payloads
+Measures byte savings and encode/decode time for representative request and
+response bodies, and estimates end-to-end latency on a few link speeds.
+With --live, list_tasks is also timed against the deployment in .env.
+"""
+
+import sys
+import gzip
+import json
+import time
+import random
+import statistics
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+from task_management_tools import COMPRESS_MIN_BYTES, brotli
+
+# Link speeds to estimate latency for: (name, megabits per second, round trip ms)
+LINKS = [
+    ('mobile', 5, 80),
+    ('broadband', 50, 30),
+    ('datacenter', 1000, 2),
+]
+
+WORDS = (
+    'the project deadline review meeting follow up client release design budget '
+    'schedule update draft report customer feedback team action item please need '
+    'by friday next week launch marketing engineering testing bug fix priority '
+    'migration database onboarding contract invoice sprint retro roadmap'
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_transcript(rng: random.Random, turns: int = 400) -> Dict[str, Any]:
+    """process_email_content request for a long meeting transcript"""
+    speakers = ['Alex', 'Sam', 'Jordan', 'Priya', 'Chen']
+    lines = [f"{rng.choice(speakers)}: {_sentence(rng, rng.randint(8, 30))}" for _ in range(turns)]
+    return {
+        'content_type': 'email',
+        'content': '\n'.join(lines),
+        'metadata': {'sender': 'alex@example.com', 'subject': 'Weekly planning'},
+        'organization_id': 'a3c1f7e2-5b7d-4a8e-9f0c-1d2e3f4a5b6c',
+    }
+
+
+def make_processed_content(rng: random.Random, projects: int = 8, tasks: int = 15) -> Dict[str, Any]:
+    """save_processed_content request (ProcessedContent.model_dump())"""
+    def task():
+        return {
+            'title': _sentence(rng, 5),
+            'description': _sentence(rng, 25),
+            'priority': rng.choice(['low', 'medium', 'high', 'critical']),
+            'due_date': f"2024-0{rng.randint(1, 9)}-{rng.randint(10, 28)}",
+            'assignee_email': f"user{rng.randint(1, 20)}@example.com",
+        }
+
+    return {
+        'content_type': 'transcript',
+        'organization_id': 'a3c1f7e2-5b7d-4a8e-9f0c-1d2e3f4a5b6c',
+        'processed_data': {
+            'projects': [
+                {'name': _sentence(rng, 3), 'description': _sentence(rng, 20), 'tasks': [task() for _ in range(tasks)]}
+                for _ in range(projects)
+            ],
+            'standalone_tasks': [task() for _ in range(tasks)],
+            'summary': ' '.join(_sentence(rng, 20) for _ in range(6)),
+        },
+    }
+
+
+def make_task_listing(rng: random.Random, count: int) -> Dict[str, Any]:
+    """list_tasks response: tasks with embedded project, assignees and comment count"""
+    projects = [
+        {'id': f"{rng.getrandbits(128):032x}", 'name': _sentence(rng, 3), 'organization_id': 'org-1', 'status': 'active'}
+        for _ in range(20)
+    ]
+    users = [
+        {'user_id': f"{rng.getrandbits(128):032x}",
+         'profiles': {'email': f"user{i}@example.com", 'full_name': f"User {i}"}}
+        for i in range(30)
+    ]
+    tasks = []
+    for index in range(count):
+        project = rng.choice(projects)
+        tasks.append({
+            'id': f"{rng.getrandbits(128):032x}",
+            'project_id': project['id'],
+            'parent_task_id': None,
+            'title': _sentence(rng, 6),
+            'description': _sentence(rng, rng.randint(0, 40)) if rng.random() < 0.7 else None,
+            'status': rng.choice(['todo', 'in_progress', 'review', 'done', 'blocked']),
+            'priority': rng.choice(['low', 'medium', 'high', 'critical']),
+            'position': index,
+            'due_date': f"2024-0{rng.randint(1, 9)}-{rng.randint(10, 28)}T17:00:00+00:00",
+            'estimated_hours': rng.choice([None, 1, 2, 4, 8]),
+            'progress': rng.randint(0, 100),
+            'created_at': '2024-01-15T09:30:12.345678+00:00',
+            'updated_at': '2024-02-01T14:12:45.123456+00:00',
+            'project': project,
+            'assignees': rng.sample(users, rng.randint(0, 2)),
+            'comments': [{'count': rng.randint(0, 12)}],
+        })
+    return {'tasks': tasks}
+
+
+def _codecs() -> List[Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    """(name, compress, decompress) with the settings the client and edge functions use"""
+    codecs = [
+        ('identity', lambda data: data, lambda data: data),
+        ('gzip-6', lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+    ]
+    if brotli is not None:
+        codecs.append(('br-5', lambda data: brotli.compress(data, quality=5), brotli.decompress))
+    return codecs
+
+
+def _time_ms(func: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure(payload: Dict[str, Any], repeat: int = 5) -> List[Dict[str, Any]]:
+    """Size and median encode/decode time of one payload under each codec"""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    results = []
+    for name, compress, decompress in _codecs():
+        encoded = compress(raw)
+        results.append({
+            'codec': name,
+            'bytes': len(encoded),
+            'ratio': len(encoded) / len(raw),
+            'encode_ms': _time_ms(lambda: compress(raw), repeat),
+            'decode_ms': _time_ms(lambda: decompress(encoded), repeat),
+        })
+    return results
+
+
+def estimated_latency_ms(result: Dict[str, Any], mbps: float, rtt_ms: float) -> float:
+    """Round trip plus encode, transfer and decode time (ignores TCP slow start, which favours compression further)"""
+    transfer_ms = result['bytes'] * 8 / (mbps * 1000)
+    return rtt_ms + result['encode_ms'] + transfer_ms + result['decode_ms']
+
+
+def live(repeat: int = 5) -> None:
+    """Time list_tasks against the deployment with each Accept-Encoding"""
+    import requests
+    from task_management_tools import SUPABASE_EDGE_FUNCTION_URL, HEADERS
+
+    print(f"\nlist_tasks against {SUPABASE_EDGE_FUNCTION_URL}")
+    print(f"{'accept-encoding':<18}{'wire bytes':>12}{'median ms':>11}")
+    for accept in ['identity'] + [codec[:codec.index('-')] for codec, _, _ in _codecs()[1:]]:
+        samples = []
+        wire = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = requests.post(
+                f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
+                headers={**HEADERS, 'Accept-Encoding': accept},
+                json={'action': 'list_tasks', 'params': {}},
+                stream=True
+            )
+            wire = sum(len(chunk) for chunk in response.raw.stream(64 * 1024, decode_content=False))
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{accept:<18}{wire:>12,}{statistics.median(samples):>11.1f}")
+
+
+def main():
+    """python compression_benchmark.py [--live]"""
+    rng = random.Random(7)
+    payloads = [
+        ('process_email_content request (transcript)', make_transcript(rng)),
+        ('save_processed_content request', make_processed_content(rng)),
+        ('list_tasks response, 100 tasks', make_task_listing(rng, 100)),
+        ('list_tasks response, 2000 tasks', make_task_listing(rng, 2000)),
+    ]
+    if brotli is None:
+        print("brotli is not installed; only gzip is measured (pip install brotli)")
+    print(f"Request bodies from {COMPRESS_MIN_BYTES:,} bytes are compressed (TOOL_COMPRESS_MIN_BYTES)")
+
+    for title, payload in payloads:
+        results = measure(payload)
+        print(f"\n{title}")
+        print(f"{'codec':<10}{'bytes':>12}{'ratio':>8}{'encode ms':>11}{'decode ms':>11}" +
+              ''.join(f"{name + ' ms':>15}" for name, _, _ in LINKS))
+        for result in results:
+            print(
+                f"{result['codec']:<10}{result['bytes']:>12,}{result['ratio']:>8.2f}"
+                f"{result['encode_ms']:>11.2f}{result['decode_ms']:>11.2f}" +
+                ''.join(f"{estimated_latency_ms(result, mbps, rtt):>15.1f}" for _, mbps, rtt in LINKS)
+            )
+
+    if '--live' in sys.argv[1:]:
+        live()
+
+
+if __name__ == "__main__":
+    main()
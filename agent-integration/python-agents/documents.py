@@ -0,0 +1,537 @@
+"""
+Streaming ingestion of large documents into task extraction
+Local files (PDF, DOCX, text exports) are memory-mapped and read one page at a
+time; pages are packed into chunks of bounded size and handed to extraction
+through a bounded queue, so memory stays flat however long the document is.
+
+    python documents.py [--dry-run] PATH [PATH...]
+"""
+
+import os
+import sys
+import mmap
+import time
+import codecs
+import asyncio
+import zipfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+from xml.etree import ElementTree
+
+# Characters per extraction chunk (a few thousand tokens)
+CHUNK_CHARS = 12_000
+
+# Tail of the previous chunk sent along with each chunk, so an item split
+# across the boundary is seen whole
+OVERLAP_CHARS = 600
+
+# Text exports and Word files without pagination are cut into pages of about
+# this many characters, at a line or paragraph break
+PAGE_CHARS = 4_000
+
+# Chunks read ahead of extraction. The reader waits when the queue is full, so
+# at most this many chunks plus the ones being extracted are held in memory.
+MAX_PENDING_CHUNKS = 4
+
+# Bytes of a text file decoded at a time
+READ_BYTES = 64 * 1024
+
+TEXT_EXTENSIONS = {'', '.txt', '.text', '.md', '.markdown', '.rst', '.csv', '.log', '.eml'}
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class DocumentError(Exception):
+    """Raised when a document cannot be read"""
+
+
+@dataclass
+class Page:
+    """One page of text; `fraction` is the share of the document read once it is done"""
+    number: int
+    text: str
+    fraction: Optional[float] = None
+
+
+@dataclass
+class Chunk:
+    """Consecutive pages' text, sized for one extraction call"""
+    index: int
+    first_page: int
+    last_page: int
+    text: str
+    # End of the previous chunk, for continuity only (it was extracted already)
+    context: str = ''
+
+
+@dataclass
+class IngestProgress:
+    """Progress of one document, passed to the progress callback after each chunk"""
+    path: str
+    pages_read: int = 0
+    chunks_read: int = 0
+    chunks_done: int = 0
+    chunks_failed: int = 0
+    fraction: Optional[float] = None
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+# ============= PAGE READERS =============
+
+class _MappedFile:
+    """
+    A read-only memory map of a file.
+
+    Pages of the map that were read are handed back to the kernel as reading
+    moves on (`release`), so the process's resident memory does not grow with
+    the file; the data stays in the page cache.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files cannot be mapped
+        self.view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._released = 0
+        if self.view is not None and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self.view.madvise(mmap.MADV_SEQUENTIAL)
+
+    def release(self, end: int) -> None:
+        """Drop the mapped pages before byte `end` from this process's resident set"""
+        end -= end % mmap.PAGESIZE
+        if self.view is None or end <= self._released or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        self.view.madvise(mmap.MADV_DONTNEED, self._released, end - self._released)
+        self._released = end
+
+    # File interface over the map, for readers that take a file object
+    # (mmap itself is not `seekable()` before Python 3.13)
+    def read(self, size: int = -1) -> bytes:
+        return self.view.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.view.seek(offset, whence)
+        return self.view.tell()
+
+    def tell(self) -> int:
+        return self.view.tell()
+
+    def seekable(self) -> bool:
+        return True
+
+    def forget(self) -> None:
+        """Drop all mapped pages from the resident set, for files read out of order"""
+        if self.view is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            self.view.madvise(mmap.MADV_DONTNEED)
+
+    def close(self) -> None:
+        if self.view is not None:
+            self.view.close()
+        self._file.close()
+
+    def __enter__(self) -> '_MappedFile':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _page_break(text: str, limit: int) -> int:
+    """Where to end a page of `text`: at the last line (or word) break before `limit`"""
+    for separator in ('\n\n', '\n', ' '):
+        cut = text.rfind(separator, 0, limit)
+        if cut > limit // 2:
+            return cut + len(separator)
+    return limit
+
+
+def iter_text_pages(path: str, page_chars: int = PAGE_CHARS) -> Iterator[Page]:
+    """
+    Read a text export page by page. Form feeds end a page; otherwise a page
+    ends at a line break after about `page_chars` characters.
+    """
+    with _MappedFile(path) as mapped:
+        if mapped.view is None:
+            return
+        view = mapped.view
+        start = len(codecs.BOM_UTF8) if view[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        buffer = ''
+        number = 0
+
+        for offset in range(start, mapped.size, READ_BYTES):
+            end = min(offset + READ_BYTES, mapped.size)
+            buffer += decoder.decode(view[offset:end])
+            mapped.release(end)
+            while True:
+                form_feed = buffer.find('\f', 0, page_chars)
+                if form_feed >= 0:
+                    text, buffer = buffer[:form_feed], buffer[form_feed + 1:]
+                elif len(buffer) > page_chars:
+                    cut = _page_break(buffer, page_chars)
+                    text, buffer = buffer[:cut], buffer[cut:]
+                else:
+                    break
+                number += 1
+                yield Page(number, text, end / mapped.size)
+
+        buffer += decoder.decode(b'', final=True)
+        while buffer:
+            form_feed = buffer.find('\f', 0, page_chars)
+            if form_feed >= 0:
+                text, buffer = buffer[:form_feed], buffer[form_feed + 1:]
+            else:
+                cut = _page_break(buffer, page_chars) if len(buffer) > page_chars else len(buffer)
+                text, buffer = buffer[:cut], buffer[cut:]
+            number += 1
+            yield Page(number, text, 1.0 if not buffer else None)
+
+
+def iter_pdf_pages(path: str) -> Iterator[Page]:
+    """Read a PDF's text layer page by page (needs the `pypdf` package)"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise DocumentError("Reading PDFs needs the pypdf package (pip install pypdf)") from None
+
+    with _MappedFile(path) as mapped:
+        if mapped.view is None:
+            raise DocumentError(f"{path} is empty")
+        # pypdf reads through the map like a file: only the cross-reference
+        # table and the objects of the page being extracted are loaded
+        reader = PdfReader(mapped)
+        total = len(reader.pages)
+        for index in range(total):
+            text = reader.pages[index].extract_text() or ''
+            # The reader caches every object it resolves (content streams,
+            # fonts); dropping them keeps memory flat over the page count
+            resolved = getattr(reader, 'resolved_objects', None)
+            if resolved is not None:
+                resolved.clear()
+            mapped.forget()
+            yield Page(index + 1, text, (index + 1) / total)
+
+
+class _CountingReader:
+    """File wrapper that counts the bytes read through it"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.position += len(data)
+        return data
+
+
+def iter_docx_pages(path: str, page_chars: int = PAGE_CHARS) -> Iterator[Page]:
+    """
+    Read a Word document page by page. word/document.xml is parsed as a stream,
+    so the element tree never holds more than the paragraph being read.
+
+    Pages end at explicit page breaks and at the page breaks Word recorded when
+    it last laid the document out. Documents without them are cut after about
+    `page_chars` characters, at a paragraph break.
+    """
+    with _MappedFile(path) as mapped:
+        if mapped.view is None:
+            raise DocumentError(f"{path} is empty")
+        try:
+            archive = zipfile.ZipFile(mapped)
+        except zipfile.BadZipFile:
+            raise DocumentError(f"{path} is not a Word document") from None
+
+        with archive:
+            try:
+                info = archive.getinfo('word/document.xml')
+            except KeyError:
+                raise DocumentError(f"{path} is not a Word document") from None
+
+            with archive.open(info) as member:
+                stream = _CountingReader(member)
+                parts: List[str] = []
+                size = 0
+                number = 0
+                depth = 0
+                body = None
+
+                def flush() -> Optional[Page]:
+                    nonlocal parts, size, number
+                    text = ''.join(parts)
+                    parts, size = [], 0
+                    if not text.strip():
+                        return None
+                    number += 1
+                    return Page(number, text, stream.position / (info.file_size or 1))
+
+                for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+                    if event == 'start':
+                        depth += 1
+                        if element.tag == _W + 'body':
+                            body = element
+                        continue
+                    depth -= 1
+                    tag = element.tag
+
+                    if tag == _W + 't':
+                        parts.append(element.text or '')
+                        size += len(element.text or '')
+                    elif tag == _W + 'tab':
+                        parts.append('\t')
+                    elif tag in (_W + 'br', _W + 'cr'):
+                        if element.get(_W + 'type') == 'page':
+                            page = flush()
+                            if page:
+                                yield page
+                        else:
+                            parts.append('\n')
+                    elif tag == _W + 'lastRenderedPageBreak':
+                        page = flush()
+                        if page:
+                            yield page
+                    elif tag == _W + 'p':
+                        parts.append('\n')
+                        size += 1
+                        element.clear()
+                        # The zip member is read through the map front to back
+                        mapped.release(mapped.tell())
+                        if size >= page_chars:
+                            page = flush()
+                            if page:
+                                yield page
+
+                    # Read elements directly under <w:body> are dropped from the tree
+                    if depth == 2 and body is not None:
+                        body.clear()
+
+                page = flush()
+                if page:
+                    page.fraction = 1.0
+                    yield page
+
+
+PAGE_READERS: Dict[str, Callable[[str], Iterator[Page]]] = {
+    '.pdf': iter_pdf_pages,
+    '.docx': iter_docx_pages,
+}
+
+
+def iter_pages(path: str) -> Iterator[Page]:
+    """Read a PDF, Word document or text export page by page, by file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    reader = PAGE_READERS.get(extension)
+    if reader is None and extension in TEXT_EXTENSIONS:
+        reader = iter_text_pages
+    if reader is None:
+        raise DocumentError(f"Unsupported document type: {extension}")
+    return reader(path)
+
+
+# ============= CHUNKING =============
+
+def _pieces(text: str, limit: int) -> Iterator[str]:
+    """Split a page longer than `limit` at paragraph, line or word breaks"""
+    while len(text) > limit:
+        cut = _page_break(text, limit)
+        yield text[:cut]
+        text = text[cut:]
+    if text:
+        yield text
+
+
+def iter_chunks(
+    pages: Iterable[Page],
+    chunk_chars: int = CHUNK_CHARS,
+    overlap_chars: int = OVERLAP_CHARS
+) -> Iterator[Chunk]:
+    """
+    Pack consecutive pages into chunks of at most `chunk_chars` characters.
+
+    Yields:
+        Chunks in document order, each with the end of the one before as context
+    """
+    parts: List[str] = []
+    size = 0
+    first_page = last_page = 0
+    context = ''
+    index = 0
+
+    def emit() -> Chunk:
+        nonlocal parts, size, context, index
+        text = '\n\n'.join(parts)
+        chunk = Chunk(index, first_page, last_page, text, context)
+        tail = text[-overlap_chars:] if overlap_chars else ''
+        # Start the context at a word, not mid-word
+        context = tail[tail.find(' ') + 1:] if ' ' in tail and len(text) > overlap_chars else tail
+        parts, size = [], 0
+        index += 1
+        return chunk
+
+    for page in pages:
+        for piece in _pieces(page.text.strip(), chunk_chars):
+            if parts and size + len(piece) > chunk_chars:
+                yield emit()
+            if not parts:
+                first_page = page.number
+            parts.append(piece)
+            size += len(piece) + 2
+            last_page = page.number
+
+    if parts:
+        yield emit()
+
+
+# ============= INGESTION =============
+
+async def ingest_document(
+    path: str,
+    extract: Callable[[Chunk], Awaitable[Any]],
+    on_progress: Optional[Callable[[IngestProgress], None]] = None,
+    concurrency: int = 2,
+    max_pending: int = MAX_PENDING_CHUNKS
+) -> Dict[str, Any]:
+    """
+    Read a document chunk by chunk and pass each chunk to `extract`.
+
+    The document is read in a thread that hands chunks over through a queue of
+    `max_pending`; `concurrency` chunks are extracted at a time. Results of
+    `extract` are not kept, so memory does not depend on the document's length.
+
+    Args:
+        path: PDF, DOCX or text file
+        extract: Coroutine function called once per chunk
+        on_progress: Called with the progress after each chunk
+        concurrency: Chunks extracted at a time
+        max_pending: Chunks read ahead of extraction
+
+    Returns:
+        Pages and chunks read, chunks that failed (with the first errors) and the time taken
+    """
+    if not os.path.isfile(path):
+        raise DocumentError(f"No such file: {path}")
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(max_pending)
+    progress = IngestProgress(path)
+    stop = threading.Event()
+    errors: List[str] = []
+    read_error: List[BaseException] = []
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def read() -> None:
+        try:
+            for chunk in iter_chunks(track(iter_pages(path))):
+                if stop.is_set():
+                    break
+                progress.chunks_read += 1
+                put(chunk)
+        except BaseException as error:
+            read_error.append(error)
+        finally:
+            for _ in range(concurrency):
+                put(None)
+
+    def track(pages: Iterator[Page]) -> Iterator[Page]:
+        for page in pages:
+            progress.pages_read = page.number
+            if page.fraction is not None:
+                progress.fraction = page.fraction
+            yield page
+
+    async def worker() -> None:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                return
+            try:
+                await extract(chunk)
+                progress.chunks_done += 1
+            except Exception as error:
+                progress.chunks_failed += 1
+                if len(errors) < 10:
+                    errors.append(f"pages {chunk.first_page}-{chunk.last_page}: {error}")
+            if on_progress:
+                on_progress(progress)
+
+    reader = loop.run_in_executor(None, read)
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        # When extraction stops early, unblock the reader so its thread ends
+        stop.set()
+        while not reader.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.01)
+    await reader
+
+    if read_error:
+        error = read_error[0]
+        if isinstance(error, DocumentError):
+            raise error
+        raise DocumentError(f"Failed to read {path}: {error}") from error
+
+    return {
+        'path': path,
+        'pages': progress.pages_read,
+        'chunks': progress.chunks_read,
+        'failed': progress.chunks_failed,
+        'errors': errors,
+        'seconds': round(progress.elapsed, 1),
+    }
+
+
+# ============= COMMAND LINE INTERFACE =============
+
+def print_progress(progress: IngestProgress) -> None:
+    """One progress line per document, rewritten in place"""
+    share = f" ({progress.fraction:.0%})" if progress.fraction is not None else ''
+    print(
+        f"\r{os.path.basename(progress.path)}: page {progress.pages_read}{share}, "
+        f"{progress.chunks_done} chunks done, {progress.chunks_failed} failed, {progress.elapsed:.0f}s",
+        end='', flush=True
+    )
+
+
+async def main():
+    """Extract tasks from documents: python documents.py [--dry-run] PATH [PATH...]"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    paths = [arg for arg in args if arg != '--dry-run']
+    if not paths:
+        print("Usage: python documents.py [--dry-run] PATH [PATH...]")
+        sys.exit(1)
+
+    swarm = None
+    if not dry_run:
+        from agent_swarm import TaskManagementSwarm
+        swarm = TaskManagementSwarm(os.getenv('ORGANIZATION_ID', 'default-org-id'))
+
+    # A dry run reads and chunks the documents without calling the model
+    async def skip(chunk: Chunk) -> None:
+        pass
+
+    for path in paths:
+        if swarm is None:
+            result = await ingest_document(path, skip, print_progress)
+        else:
+            result = await swarm.process_document(path, on_progress=print_progress)
+        print(f"\r{path}: {result['pages']} pages, {result['chunks']} chunks, "
+              f"{result['failed']} failed in {result['seconds']}s")
+        for error in result['errors']:
+            print(f"  {error}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,258 @@
+"""
+Columnar export of organization data for offline analytics
+Tables are streamed from ai-agent-api and written to Arrow/Parquet in row groups of ROW_GROUP_SIZE
+"""
+
+import os
+import json
+from typing import Dict, List, Optional, Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from streaming import stream_records
+
+# Arrow IPC files can be memory-mapped without a decode step; Parquet is smaller on disk
+EXPORT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+_TIMESTAMP = pa.timestamp('us', tz='UTC')
+_ENUM = pa.dictionary(pa.int8(), pa.string())
+
+# Postgres enum values. Enum columns are dictionary encoded against these fixed
+# dictionaries, since an Arrow file allows only one dictionary per column.
+ENUM_VALUES = {
+    'status': pa.array(['todo', 'in_progress', 'review', 'done', 'blocked']),
+    'priority': pa.array(['critical', 'high', 'medium', 'low']),
+}
+
+# Column types mirror supabase/migrations: 001_initial_schema.sql plus the task
+# columns added by 007_recurring_tasks.sql and 008_project_rollups.sql. An explicit
+# schema keeps every batch identical even when a batch has only NULLs in a column.
+EXPORT_SCHEMAS = {
+    'tasks': pa.schema([
+        ('id', pa.string()),
+        ('project_id', pa.string()),
+        ('parent_task_id', pa.string()),
+        ('title', pa.string()),
+        ('description', pa.string()),
+        ('status', _ENUM),
+        ('priority', _ENUM),
+        ('position', pa.int32()),
+        ('due_date', _TIMESTAMP),
+        ('start_date', _TIMESTAMP),
+        ('estimated_hours', pa.float64()),
+        ('actual_hours', pa.float64()),
+        ('progress', pa.int8()),
+        ('is_recurring', pa.bool_()),
+        ('recurrence_pattern', pa.string()),
+        ('created_by', pa.string()),
+        ('created_at', _TIMESTAMP),
+        ('updated_at', _TIMESTAMP),
+        ('completed_at', _TIMESTAMP),
+        ('completed_by', pa.string()),
+        ('recurrence_parent_id', pa.string()),
+        ('recurrence_generated_until', _TIMESTAMP),
+        ('logged_hours', pa.float64()),
+    ]),
+    'task_assignees': pa.schema([
+        ('id', pa.string()),
+        ('task_id', pa.string()),
+        ('user_id', pa.string()),
+        ('assigned_by', pa.string()),
+        ('assigned_at', _TIMESTAMP),
+    ]),
+    'time_entries': pa.schema([
+        ('id', pa.string()),
+        ('task_id', pa.string()),
+        ('user_id', pa.string()),
+        ('description', pa.string()),
+        ('hours', pa.float64()),
+        ('date', pa.date32()),
+        ('created_at', _TIMESTAMP),
+        ('updated_at', _TIMESTAMP),
+    ]),
+    'activity_logs': pa.schema([
+        ('id', pa.string()),
+        ('organization_id', pa.string()),
+        ('entity_type', pa.string()),
+        ('entity_id', pa.string()),
+        ('action', pa.string()),
+        ('changes', pa.string()),
+        ('user_id', pa.string()),
+        ('created_at', _TIMESTAMP),
+    ]),
+}
+
+# JSONB columns are kept as JSON text
+_JSON_COLUMNS = {'recurrence_pattern', 'changes'}
+
+# Rows buffered per table before they are written. API pages are far smaller,
+# and a Parquet row group per page would make scans slow and the footer large.
+ROW_GROUP_SIZE = 128 * 1024
+
+
+def rows_to_batch(table: str, rows: List[Dict[str, Any]]) -> pa.RecordBatch:
+    """
+    Convert API rows into a record batch with the table's export schema.
+
+    Args:
+        table: One of EXPORT_SCHEMAS
+        rows: Row dictionaries as returned by the API
+
+    Returns:
+        RecordBatch; columns missing from the rows are filled with NULLs
+    """
+    schema = EXPORT_SCHEMAS[table]
+    columns = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if field.name in _JSON_COLUMNS:
+            values = [json.dumps(v) if v is not None else None for v in values]
+
+        if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+            # ISO-8601 strings parse in one vectorized cast
+            columns.append(pa.array(values, pa.string()).cast(field.type))
+        elif pa.types.is_dictionary(field.type):
+            dictionary = ENUM_VALUES[field.name]
+            indices = pc.index_in(pa.array(values, pa.string()), value_set=dictionary).cast(pa.int8())
+            columns.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+        else:
+            columns.append(pa.array(values, field.type))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _open_writer(path: str, schema: pa.Schema, file_format: str):
+    if file_format == 'parquet':
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    return pa.ipc.new_file(path, schema)
+
+
+def _write_row_groups(writer, batches: List[pa.RecordBatch], final: bool = False) -> List[pa.RecordBatch]:
+    """
+    Write the buffered rows in groups of ROW_GROUP_SIZE, each one Parquet row
+    group or one Arrow record batch. Returns the batches still buffered: the
+    rows short of a full group, or none when `final`.
+    """
+    table = pa.Table.from_batches(batches)
+    written = table.num_rows if final else table.num_rows - table.num_rows % ROW_GROUP_SIZE
+    for start in range(0, written, ROW_GROUP_SIZE):
+        group = table.slice(start, min(ROW_GROUP_SIZE, written - start))
+        if isinstance(writer, pq.ParquetWriter):
+            writer.write_table(group, row_group_size=ROW_GROUP_SIZE)
+        else:
+            writer.write_table(group.combine_chunks())
+    return [batch for batch in table.slice(written).to_batches() if batch.num_rows]
+
+
+def export_tasks(
+    organization_id: str,
+    output_dir: str,
+    file_format: str = 'arrow',
+    tables: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Export an organization's tasks, assignees, time entries and activity logs.
+
+    Rows are buffered per table and written ROW_GROUP_SIZE at a time, so memory
+    use is bounded by one row group per table regardless of how much history
+    the organization has.
+
+    Args:
+        organization_id: Organization to export
+        output_dir: Directory to write one file per table into
+        file_format: 'arrow' (memory-mappable IPC) or 'parquet'
+        tables: Subset of tables to export (defaults to all)
+
+    Returns:
+        Dictionary with the row count and path of each exported table
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    tables = tables or list(EXPORT_SCHEMAS)
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = {t: os.path.join(output_dir, t + EXPORT_FORMATS[file_format]) for t in tables}
+    writers = {t: _open_writer(paths[t], EXPORT_SCHEMAS[t], file_format) for t in tables}
+    counts = {t: 0 for t in tables}
+    buffered = {t: [] for t in tables}
+    buffered_rows = {t: 0 for t in tables}
+
+    try:
+        payload = {
+            'action': 'export_tasks',
+            'params': {'organization_id': organization_id, 'tables': tables}
+        }
+        for record in stream_records('ai-agent-api', payload, 'export tasks'):
+            if record['type'] != 'batch':
+                continue
+            table = record['table']
+            buffered[table].append(rows_to_batch(table, record['rows']))
+            buffered_rows[table] += len(record['rows'])
+            counts[table] += len(record['rows'])
+            if buffered_rows[table] >= ROW_GROUP_SIZE:
+                buffered[table] = _write_row_groups(writers[table], buffered[table])
+                buffered_rows[table] = sum(batch.num_rows for batch in buffered[table])
+
+        for table in tables:
+            if buffered[table]:
+                _write_row_groups(writers[table], buffered[table], final=True)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return {'counts': counts, 'paths': paths}
+
+
+def load_export(output_dir: str) -> Dict[str, pa.Table]:
+    """
+    Load an export directory as Arrow tables.
+
+    Arrow files are memory-mapped, so columns are paged in from disk on access
+    rather than read up front. Parquet files are read through a memory map.
+
+    Args:
+        output_dir: Directory written by export_tasks
+
+    Returns:
+        Dictionary of table name to pyarrow Table
+    """
+    loaded = {}
+    for table in EXPORT_SCHEMAS:
+        arrow_path = os.path.join(output_dir, table + EXPORT_FORMATS['arrow'])
+        parquet_path = os.path.join(output_dir, table + EXPORT_FORMATS['parquet'])
+
+        if os.path.exists(arrow_path):
+            source = pa.memory_map(arrow_path, 'r')
+            loaded[table] = pa.ipc.open_file(source).read_all()
+        elif os.path.exists(parquet_path):
+            loaded[table] = pq.read_table(parquet_path, memory_map=True)
+
+    return loaded
+
+
+# ============= COMMAND LINE INTERFACE =============
+
+def main():
+    """Export the configured organization: python export.py OUTPUT_DIR [arrow|parquet]"""
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if len(sys.argv) < 2:
+        print("Usage: python export.py OUTPUT_DIR [arrow|parquet]")
+        sys.exit(1)
+
+    output_dir = sys.argv[1]
+    file_format = sys.argv[2] if len(sys.argv) > 2 else 'arrow'
+    org_id = os.getenv('ORGANIZATION_ID', 'default-org-id')
+
+    result = export_tasks(org_id, output_dir, file_format)
+    for table, count in result['counts'].items():
+        print(f"{table}: {count} rows -> {result['paths'][table]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Load test for the agent stack against a local database
+Runs concurrent swarm workers and UI-style board readers against local
+stand-ins of the edge functions, and reports throughput, tail latency and
+database load per scenario. Seed the database first (seed_data.py).
+
+    python load_test.py [DURATION_SECONDS] [SCENARIO ...]
+
+The stand-ins issue the same queries as the ai-agent-api actions and the
+app's getTasks (get_board_tasks, run as a signed-in member so RLS applies),
+directly over asyncpg. That measures the database side of each request; HTTP,
+edge runtime and PostgREST overhead are not included.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Any
+
+from seed_data import DEFAULT_DSN, check_local
+
+# Concurrent swarm workers and board readers per scenario, and the pause
+# between a client's requests (agents spend most of their time in model calls)
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    'readers': {'workers': 0, 'readers': 32, 'think_ms': 50},
+    'swarm': {'workers': 32, 'readers': 0, 'think_ms': 50},
+    'mixed': {'workers': 16, 'readers': 16, 'think_ms': 50},
+    'burst': {'workers': 64, 'readers': 8, 'think_ms': 0},
+}
+
+# Tasks per board read; the app's getTasks accepts a limit for large boards
+BOARD_PAGE_SIZE = 500
+
+# Share of worker cycles that also search for related work or load project stats
+SEARCH_SHARE = 0.3
+PROJECT_STATS_SHARE = 0.1
+SEARCH_QUERIES = ['billing migration', 'release notes', '"login page" bug', 'invoice export -draft', 'roadmap']
+
+# Seconds between database load samples
+SAMPLE_INTERVAL = 1.0
+
+DB_COUNTERS = (
+    'xact_commit', 'xact_rollback', 'blks_read', 'blks_hit', 'tup_returned', 'tup_fetched',
+    'tup_inserted', 'tup_updated', 'tup_deleted', 'deadlocks', 'temp_bytes',
+)
+
+
+# ============= EDGE FUNCTION STAND-INS =============
+
+class EdgeStandIn:
+    """The queries behind the ai-agent-api actions a swarm worker uses"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def find_suitable_agent_tasks(self) -> List[Dict[str, Any]]:
+        return await self.connection.fetch(
+            """SELECT t.*, p.name AS project_name
+               FROM public.tasks t
+               JOIN public.projects p ON p.id = t.project_id
+               WHERE t.status = 'todo' AND t.priority IN ('low', 'medium')
+                 AND NOT EXISTS (SELECT 1 FROM public.task_assignees ta WHERE ta.task_id = t.id)
+               ORDER BY t.due_date ASC NULLS LAST, t.priority
+               LIMIT 20"""
+        )
+
+    async def list_tasks(self, organization_id, status: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.connection.fetch(
+            """SELECT t.*, to_jsonb(p) AS project,
+                      (SELECT coalesce(jsonb_agg(jsonb_build_object('user_id', ta.user_id, 'profiles', to_jsonb(pr))), '[]')
+                       FROM public.task_assignees ta
+                       LEFT JOIN public.profiles pr ON pr.id = ta.user_id
+                       WHERE ta.task_id = t.id) AS assignees,
+                      (SELECT count(*) FROM public.comments c WHERE c.task_id = t.id) AS comment_count
+               FROM public.tasks t
+               JOIN public.projects p ON p.id = t.project_id
+               WHERE p.organization_id = $1 AND t.status = $2
+               ORDER BY t.created_at DESC
+               LIMIT $3""",
+            organization_id, status, limit
+        )
+
+    async def assign_task(self, task_id, user_id) -> bool:
+        status = await self.connection.execute(
+            """INSERT INTO public.task_assignees (task_id, user_id) VALUES ($1, $2)
+               ON CONFLICT (task_id, user_id) DO NOTHING""",
+            task_id, user_id
+        )
+        return status.endswith(' 1')
+
+    async def update_task(self, task_id, status: str, progress: int) -> None:
+        await self.connection.execute(
+            'UPDATE public.tasks SET status = $2, progress = $3 WHERE id = $1',
+            task_id, status, progress
+        )
+
+    async def add_comment(self, task_id, user_id, content: str) -> None:
+        await self.connection.execute(
+            'INSERT INTO public.comments (task_id, user_id, content) VALUES ($1, $2, $3)',
+            task_id, user_id, f"[AI Agent]: {content}"
+        )
+
+    async def search_tasks(self, query: str, organization_id) -> List[Dict[str, Any]]:
+        return await self.connection.fetch(
+            'SELECT * FROM public.search_tasks($1, $2, NULL, NULL, 21, 0)', query, organization_id
+        )
+
+    async def list_projects_with_stats(self, organization_id) -> List[Dict[str, Any]]:
+        return await self.connection.fetch(
+            """SELECT p.*, to_jsonb(s) AS stats
+               FROM public.projects p
+               LEFT JOIN public.project_stats s ON s.project_id = p.id
+               WHERE p.organization_id = $1
+               ORDER BY p.created_at DESC
+               LIMIT 50""",
+            organization_id
+        )
+
+
+async def get_board_tasks(connection, user_id, project_ids: List[Any]) -> List[Any]:
+    """The app's getTasks: get_board_tasks as the signed-in user, under RLS"""
+    async with connection.transaction():
+        await connection.execute('SET LOCAL ROLE authenticated')
+        await connection.execute(
+            "SELECT set_config('request.jwt.claims', $1, true), set_config('request.jwt.claim.sub', $2, true)",
+            json.dumps({'sub': str(user_id), 'role': 'authenticated'}), str(user_id)
+        )
+        return await connection.fetch(
+            'SELECT public.get_board_tasks($1::uuid[], $2, 0)', project_ids, BOARD_PAGE_SIZE
+        )
+
+
+# ============= LOAD GENERATION =============
+
+class Recorder:
+    """Latencies (ms) and errors per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.first_errors: Dict[str, str] = {}
+
+    async def time(self, operation: str, call):
+        start = time.perf_counter()
+        try:
+            result = await call
+        except Exception as error:
+            self.errors[operation] += 1
+            self.first_errors.setdefault(operation, f"{type(error).__name__}: {error}")
+            return None
+        self.latencies[operation].append((time.perf_counter() - start) * 1000)
+        return result
+
+
+async def load_fixture(connection) -> Dict[str, Any]:
+    """Seeded organizations, their project members, and the members' projects"""
+    rows = await connection.fetch(
+        """SELECT p.organization_id, pm.project_id, pm.user_id
+           FROM public.project_members pm
+           JOIN public.projects p ON p.id = pm.project_id
+           JOIN public.organizations o ON o.id = p.organization_id
+           WHERE o.settings->>'synthetic' = 'true'"""
+    )
+    if not rows:
+        raise SystemExit("No seeded data found; run seed_data.py first")
+
+    members = defaultdict(list)
+    user_projects = defaultdict(list)
+    for row in rows:
+        members[row['project_id']].append(row['user_id'])
+        user_projects[row['user_id']].append(row['project_id'])
+    return {
+        'organizations': sorted({row['organization_id'] for row in rows}),
+        'members': members,
+        'user_projects': user_projects,
+    }
+
+
+async def swarm_worker(pool, fixture, recorder: Recorder, deadline: float, think_ms: int, seed: int) -> None:
+    """Claims suitable tasks and works them through to done, like an execute_suitable_tasks run"""
+    rng = random.Random(seed)
+    async with pool.acquire() as connection:
+        api = EdgeStandIn(connection)
+        while time.monotonic() < deadline:
+            cycle_start = time.perf_counter()
+            organization_id = rng.choice(fixture['organizations'])
+
+            candidates = await recorder.time('find_suitable_agent_tasks', api.find_suitable_agent_tasks())
+            if candidates:
+                task = rng.choice(candidates)
+                members = fixture['members'].get(task['project_id'])
+                user_id = rng.choice(members) if members else None
+                # Another worker may have claimed it first; then this cycle only looked
+                if user_id and await recorder.time('assign_task', api.assign_task(task['id'], user_id)):
+                    await recorder.time('update_task', api.update_task(task['id'], 'in_progress', 10))
+                    await recorder.time('add_comment', api.add_comment(task['id'], user_id, 'Started working on this.'))
+                    await recorder.time('update_task', api.update_task(task['id'], 'done', 100))
+
+            if rng.random() < SEARCH_SHARE:
+                await recorder.time('search_tasks', api.search_tasks(rng.choice(SEARCH_QUERIES), organization_id))
+            if rng.random() < PROJECT_STATS_SHARE:
+                await recorder.time('list_projects', api.list_projects_with_stats(organization_id))
+                await recorder.time('list_tasks', api.list_tasks(organization_id, 'in_progress'))
+
+            recorder.latencies['worker_cycle'].append((time.perf_counter() - cycle_start) * 1000)
+            if think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+
+
+async def board_reader(pool, fixture, recorder: Recorder, deadline: float, think_ms: int, seed: int) -> None:
+    """A signed-in member reloading their board"""
+    rng = random.Random(seed)
+    user_id = rng.choice(list(fixture['user_projects']))
+    project_ids = fixture['user_projects'][user_id]
+    async with pool.acquire() as connection:
+        while time.monotonic() < deadline:
+            await recorder.time('get_board_tasks', get_board_tasks(connection, user_id, project_ids))
+            if think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+
+
+# ============= DATABASE LOAD =============
+
+async def database_counters(connection) -> Dict[str, int]:
+    row = await connection.fetchrow(
+        f"SELECT {', '.join(DB_COUNTERS)} FROM pg_stat_database WHERE datname = current_database()"
+    )
+    return dict(row)
+
+
+async def sample_activity(connection, samples: List[Dict[str, int]], deadline: float) -> None:
+    """Active backends and backends waiting on locks, once per SAMPLE_INTERVAL"""
+    while time.monotonic() < deadline:
+        row = await connection.fetchrow(
+            """SELECT count(*) FILTER (WHERE state = 'active') AS active,
+                      count(*) FILTER (WHERE wait_event_type = 'Lock') AS lock_waits
+               FROM pg_stat_activity
+               WHERE datname = current_database() AND pid <> pg_backend_pid()"""
+        )
+        samples.append(dict(row))
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+
+async def top_statements(connection, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+    """Statements by total execution time since the scenario started, when pg_stat_statements is installed"""
+    installed = await connection.fetchval("SELECT to_regclass('pg_stat_statements') IS NOT NULL")
+    if not installed:
+        return None
+    rows = await connection.fetch(
+        """SELECT calls, total_exec_time, mean_exec_time, left(regexp_replace(query, '\\s+', ' ', 'g'), 90) AS query
+           FROM pg_stat_statements
+           WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+           ORDER BY total_exec_time DESC
+           LIMIT $1""",
+        limit
+    )
+    return [dict(row) for row in rows]
+
+
+# ============= REPORTING =============
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _bytes(count: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.0f} TB"
+
+
+def report(name: str, scenario: Dict[str, int], elapsed: float, recorder: Recorder,
+           counters: Dict[str, int], samples: List[Dict[str, int]],
+           statements: Optional[List[Dict[str, Any]]]) -> None:
+    print(f"\nscenario {name}: {scenario['workers']} swarm workers, {scenario['readers']} board readers, "
+          f"{elapsed:.0f}s, think {scenario['think_ms']} ms")
+    print(f"{'operation':<28}{'count':>8}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for operation in sorted(set(recorder.latencies) | set(recorder.errors)):
+        ordered = sorted(recorder.latencies.get(operation, []))
+        if ordered:
+            print(f"{operation:<28}{len(ordered):>8,}{len(ordered) / elapsed:>9.1f}"
+                  f"{_percentile(ordered, 0.5):>9.1f}{_percentile(ordered, 0.95):>9.1f}"
+                  f"{_percentile(ordered, 0.99):>9.1f}{ordered[-1]:>9.1f}{recorder.errors.get(operation, 0):>8}")
+        else:
+            print(f"{operation:<28}{0:>8}{'':>45}{recorder.errors[operation]:>8}")
+    for operation, message in recorder.first_errors.items():
+        print(f"  first {operation} error: {message}")
+
+    reads = counters['blks_read'] + counters['blks_hit']
+    written = counters['tup_inserted'] + counters['tup_updated'] + counters['tup_deleted']
+    active = [sample['active'] for sample in samples] or [0]
+    print(
+        f"db: {counters['xact_commit'] / elapsed:,.0f} commits/s, {counters['xact_rollback']} rollbacks, "
+        f"cache hit {counters['blks_hit'] / reads if reads else 1:.1%}, "
+        f"rows read {(counters['tup_returned'] + counters['tup_fetched']) / elapsed:,.0f}/s, "
+        f"rows written {written / elapsed:,.0f}/s, "
+        f"active backends mean {sum(active) / len(active):.1f} max {max(active)}, "
+        f"lock waiters max {max((sample['lock_waits'] for sample in samples), default=0)}, "
+        f"deadlocks {counters['deadlocks']}, temp {_bytes(counters['temp_bytes'])}"
+    )
+    if statements:
+        print("top statements by total time:")
+        for row in statements:
+            print(f"  {row['total_exec_time']:>10,.0f} ms {row['calls']:>8,} calls "
+                  f"{row['mean_exec_time']:>8.2f} ms/call  {row['query']}")
+
+
+async def run_scenario(dsn: str, name: str, duration: float) -> None:
+    import asyncpg
+
+    scenario = SCENARIOS[name]
+    clients = scenario['workers'] + scenario['readers']
+    pool = await asyncpg.create_pool(dsn, min_size=clients, max_size=clients)
+    monitor = await asyncpg.connect(dsn)
+    try:
+        async with pool.acquire() as connection:
+            fixture = await load_fixture(connection)
+        if await monitor.fetchval("SELECT to_regclass('pg_stat_statements') IS NOT NULL"):
+            await monitor.execute('SELECT pg_stat_statements_reset()')
+
+        recorder = Recorder()
+        samples: List[Dict[str, int]] = []
+        before = await database_counters(monitor)
+        start = time.monotonic()
+        deadline = start + duration
+        await asyncio.gather(
+            sample_activity(monitor, samples, deadline),
+            *(swarm_worker(pool, fixture, recorder, deadline, scenario['think_ms'], seed)
+              for seed in range(scenario['workers'])),
+            *(board_reader(pool, fixture, recorder, deadline, scenario['think_ms'], 1000 + seed)
+              for seed in range(scenario['readers'])),
+        )
+        elapsed = time.monotonic() - start
+        after = await database_counters(monitor)
+        counters = {key: after[key] - before[key] for key in DB_COUNTERS}
+        report(name, scenario, elapsed, recorder, counters, samples, await top_statements(monitor))
+    finally:
+        await monitor.close()
+        await pool.close()
+
+
+def main():
+    """python load_test.py [DURATION_SECONDS] [SCENARIO ...]"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    args = sys.argv[1:]
+    duration = float(args.pop(0)) if args and args[0].replace('.', '', 1).isdigit() else 30.0
+    names = args or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s) {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+        sys.exit(1)
+
+    dsn = os.getenv('LOCAL_DB_URL', DEFAULT_DSN)
+    check_local(dsn)
+    for name in names:
+        asyncio.run(run_scenario(dsn, name, duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Shared scheduler for model calls made by the agent swarm
+Keeps every Runner.run in the process under the provider's request and token limits
+"""
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Used when a call does not say how many tokens it expects to use
+DEFAULT_ESTIMATED_TOKENS = 2000
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket: `rate_per_minute` units per minute up to `capacity`.
+
+    The balance may go negative when a call turns out to use more than it
+    reserved; later callers then wait until the debt is refilled.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units are available and take them. Waiters are served in arrival order."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Take (positive) or return (negative) units after the fact"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        """Empty the bucket, pausing new calls until it refills"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, 'status_code', None) == 429
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+    """Total tokens reported by an agents RunResult, if available"""
+    usage = getattr(getattr(result, 'context_wrapper', None), 'usage', None)
+    return getattr(usage, 'total_tokens', None)
+
+
+class ModelCallScheduler:
+    """
+    Admits model calls by priority under request, token and concurrency limits.
+
+    - Requests and tokens per minute are enforced with token buckets.
+    - Waiting calls are admitted critical first, FIFO within a priority.
+    - Concurrency adapts AIMD-style: +1/limit per success, halved on a 429,
+      so the swarm settles just under the provider limit instead of every
+      caller backing off and retrying at once.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_retries: int = 5
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._counters = {'completed': 0, 'failed': 0, 'rate_limited': 0}
+
+    # ----- admission -----
+
+    def _dispatch(self):
+        while self._waiting and self.active < int(self.limit):
+            _, _, future = heapq.heappop(self._waiting)
+            if future.done():  # caller was cancelled while queued
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    async def _acquire_slot(self, priority: str):
+        rank = PRIORITY_RANK.get(priority, len(PRIORITY_RANK))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (rank, next(self._sequence), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        self.active -= 1
+        self._dispatch()
+
+    # ----- feedback -----
+
+    def _on_success(self):
+        self._counters['completed'] += 1
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+        self._dispatch()
+
+    def _on_rate_limited(self):
+        self._counters['rate_limited'] += 1
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self.requests.drain()
+
+    # ----- public API -----
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        priority: str = 'medium',
+        estimated_tokens: int = DEFAULT_ESTIMATED_TOKENS
+    ) -> Any:
+        """
+        Run a model call once it is admitted, retrying on rate limits.
+
+        Args:
+            call: Zero-argument function returning the awaitable to run, e.g.
+                `lambda: Runner.run(agent, input=prompt)`; it is called again on retry
+            priority: Task priority (critical, high, medium, low)
+            estimated_tokens: Tokens reserved up front; corrected from the
+                result's reported usage when available
+
+        Returns:
+            The call's result. Raises the last error once retries are exhausted.
+        """
+        attempt = 0
+        while True:
+            await self._acquire_slot(priority)
+            try:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(estimated_tokens)
+                result = await call()
+            except Exception as error:
+                if not _is_rate_limited(error) or attempt >= self.max_retries:
+                    self._counters['failed'] += 1
+                    raise
+                self._on_rate_limited()
+                delay = _retry_after(error) or min(60.0, 2 ** attempt) * (0.5 + random.random())
+            else:
+                used = _usage_tokens(result)
+                if used is not None:
+                    self.tokens.adjust(used - estimated_tokens)
+                self._on_success()
+                return result
+            finally:
+                self._release_slot()
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, in-flight and queued calls, and outcome counters"""
+        return {
+            'concurrency_limit': int(self.limit),
+            'active': self.active,
+            'queued': sum(1 for _, _, f in self._waiting if not f.done()),
+            **self._counters
+        }
+
+
+_scheduler: Optional[ModelCallScheduler] = None
+
+
+def get_scheduler() -> ModelCallScheduler:
+    """
+    Process-wide scheduler shared by every swarm, configured from
+    MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE and MODEL_MAX_CONCURRENCY.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelCallScheduler(
+            requests_per_minute=float(os.getenv('MODEL_REQUESTS_PER_MINUTE', 500)),
+            tokens_per_minute=float(os.getenv('MODEL_TOKENS_PER_MINUTE', 200_000)),
+            max_concurrency=int(os.getenv('MODEL_MAX_CONCURRENCY', 16))
+        )
+    return _scheduler
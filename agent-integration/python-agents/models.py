@@ -0,0 +1,240 @@
+"""
+Typed records for tasks, projects and assignees
+Compact slotted classes decoded straight from API response bytes, used in
+place of the raw nested dictionaries when many tasks are held at once
+"""
+
+import sys
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # orjson is optional; the standard library decoder is slower but equivalent
+    loads = json.loads
+
+# Enum values from the schema. Decoded rows point at these shared strings
+# instead of each holding its own copy.
+_SHARED = {
+    value: value for value in (
+        'todo', 'in_progress', 'review', 'done', 'blocked',
+        'critical', 'high', 'medium', 'low',
+        'planning', 'active', 'on_hold', 'completed', 'archived',
+    )
+}
+
+
+def _shared(value: Optional[str]) -> Optional[str]:
+    """Enum strings are shared; ids that repeat across rows (projects, users) are interned"""
+    if value is None:
+        return None
+    return _SHARED.get(value) or sys.intern(value)
+
+
+@dataclass(slots=True)
+class Assignee:
+    """A user assigned to a task"""
+    user_id: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @property
+    def display_name(self) -> str:
+        return self.full_name or self.email or self.user_id
+
+
+@dataclass(slots=True)
+class Project:
+    """A project, shared by every task decoded in the same response"""
+    id: str
+    name: str
+    organization_id: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Project':
+        return cls(
+            id=_shared(data['id']),
+            name=data.get('name') or '',
+            organization_id=_shared(data.get('organization_id')),
+            description=data.get('description'),
+            status=_shared(data.get('status')),
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            created_at=data.get('created_at'),
+            updated_at=data.get('updated_at'),
+        )
+
+
+@dataclass(slots=True)
+class Task:
+    """
+    A task with its project and assignees.
+
+    Timestamps are kept as the ISO-8601 strings the API sends; they are only
+    parsed where a calculation needs them (see analytics.py).
+    """
+    id: str
+    title: str
+    status: str = 'todo'
+    priority: str = 'medium'
+    description: Optional[str] = None
+    project_id: Optional[str] = None
+    parent_task_id: Optional[str] = None
+    position: int = 0
+    due_date: Optional[str] = None
+    start_date: Optional[str] = None
+    estimated_hours: Optional[float] = None
+    actual_hours: Optional[float] = None
+    progress: int = 0
+    is_recurring: bool = False
+    recurrence_pattern: Optional[Dict[str, Any]] = None
+    created_by: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    completed_by: Optional[str] = None
+    project: Optional[Project] = None
+    assignees: Tuple[Assignee, ...] = ()
+    comment_count: int = 0
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        projects: Optional[Dict[str, Project]] = None,
+        assignees: Optional[Dict[str, Assignee]] = None
+    ) -> 'Task':
+        """
+        Build from an API task row, including the embedded project, assignees
+        (with profiles) and comment count that list_tasks returns.
+
+        Args:
+            data: Task row
+            projects: Cache of already decoded projects, shared across rows
+            assignees: Cache of already decoded assignees, shared across rows
+        """
+        projects = {} if projects is None else projects
+        assignees = {} if assignees is None else assignees
+        get = data.get
+
+        project = None
+        project_data = get('project')
+        if project_data:
+            project = projects.get(project_data['id'])
+            if project is None:
+                project = projects[project_data['id']] = Project.from_dict(project_data)
+
+        task_assignees = ()
+        rows = get('assignees')
+        if rows:
+            task_assignees = []
+            for row in rows:
+                user_id = row.get('user_id')
+                if user_id is None:
+                    continue
+                assignee = assignees.get(user_id)
+                if assignee is None:
+                    profile = row.get('profiles') or {}
+                    assignee = assignees[user_id] = Assignee(
+                        sys.intern(user_id), profile.get('email'), profile.get('full_name')
+                    )
+                task_assignees.append(assignee)
+            task_assignees = tuple(task_assignees)
+
+        # PostgREST returns embedded counts as [{"count": n}]
+        comments = get('comments')
+        comment_count = comments[0].get('count', 0) if comments.__class__ is list and comments else 0
+
+        # Positional, in field order: noticeably faster than keywords for 23 fields
+        return cls(
+            data['id'],
+            get('title') or '',
+            _shared(get('status') or 'todo'),
+            _shared(get('priority') or 'medium'),
+            get('description'),
+            _shared(get('project_id')),
+            get('parent_task_id'),
+            get('position') or 0,
+            get('due_date'),
+            get('start_date'),
+            get('estimated_hours'),
+            get('actual_hours'),
+            get('progress') or 0,
+            bool(get('is_recurring')),
+            get('recurrence_pattern'),
+            _shared(get('created_by')),
+            get('created_at'),
+            get('updated_at'),
+            get('completed_at'),
+            _shared(get('completed_by')),
+            project,
+            task_assignees,
+            comment_count,
+        )
+
+    @property
+    def is_assigned(self) -> bool:
+        return bool(self.assignees)
+
+    def to_row(self) -> Dict[str, Any]:
+        """Flat tasks-table row, with assignees as [{'user_id': ...}] (the shape analytics and export expect)"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'parent_task_id': self.parent_task_id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'priority': self.priority,
+            'position': self.position,
+            'due_date': self.due_date,
+            'start_date': self.start_date,
+            'estimated_hours': self.estimated_hours,
+            'actual_hours': self.actual_hours,
+            'progress': self.progress,
+            'is_recurring': self.is_recurring,
+            'recurrence_pattern': self.recurrence_pattern,
+            'created_by': self.created_by,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'completed_at': self.completed_at,
+            'completed_by': self.completed_by,
+            'assignees': [{'user_id': a.user_id} for a in self.assignees],
+        }
+
+
+class TaskDecoder:
+    """
+    Decodes task rows while sharing projects and assignees between them.
+
+    Keep one decoder for a whole listing (e.g. every page of a stream) so each
+    project and user is decoded and stored once, however many tasks refer to it.
+    """
+
+    def __init__(self):
+        self.projects: Dict[str, Project] = {}
+        self.assignees: Dict[str, Assignee] = {}
+
+    def task(self, data: Dict[str, Any]) -> Task:
+        return Task.from_dict(data, self.projects, self.assignees)
+
+    def tasks(self, rows: List[Dict[str, Any]]) -> List[Task]:
+        return [Task.from_dict(row, self.projects, self.assignees) for row in rows]
+
+
+def decode_tasks(body: bytes) -> List[Task]:
+    """Decode a list_tasks response body ({"tasks": [...]}) into Task records"""
+    return TaskDecoder().tasks(loads(body).get('tasks') or [])
+
+
+def decode_projects(body: bytes) -> List[Project]:
+    """Decode a list_projects response body ({"projects": [...]}) into Project records"""
+    return [Project.from_dict(row) for row in loads(body).get('projects') or []]
@@ -0,0 +1,185 @@
+"""
+Realtime change events for the agents
+Task, comment and assignee changes are pushed from Postgres (LISTEN/NOTIFY) and
+delivered to handlers in debounced, coalesced batches instead of polling the API
+"""
+
+import os
+import json
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Channel written by public.notify_task_change (supabase/migrations/004_change_notifications.sql)
+CHANNEL = 'task_changes'
+
+
+@dataclass
+class ChangeEvent:
+    """One row change, as announced by the database trigger"""
+    table: str
+    op: str  # INSERT, UPDATE or DELETE
+    id: Optional[str] = None
+    task_id: Optional[str] = None
+    project_id: Optional[str] = None
+    received_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_payload(cls, payload: str) -> 'ChangeEvent':
+        data = json.loads(payload)
+        return cls(
+            table=data['table'],
+            op=data['op'],
+            id=data.get('id'),
+            task_id=data.get('task_id'),
+            project_id=data.get('project_id'),
+        )
+
+    @property
+    def key(self) -> Tuple[str, Optional[str]]:
+        return (self.table, self.id)
+
+
+Handler = Callable[[List[ChangeEvent]], Awaitable[None]]
+
+
+def _merge(earlier: ChangeEvent, later: ChangeEvent) -> Optional[ChangeEvent]:
+    """
+    Collapse two changes to the same row into one.
+
+    A row inserted and deleted inside the window disappears entirely; an
+    insert followed by updates is still reported as an insert.
+    """
+    if earlier.op == 'INSERT' and later.op == 'DELETE':
+        return None
+    if earlier.op == 'INSERT':
+        later.op = 'INSERT'
+    return later
+
+
+class EventDispatcher:
+    """
+    Debounces and coalesces change events before handing them to subscribers.
+
+    Events are held until `debounce_seconds` pass without a new one, but never
+    longer than `max_delay_seconds` after the first held event, so a burst of
+    writes becomes one batch while a steady trickle is still delivered within
+    the max delay. Repeated changes to the same row are merged.
+    """
+
+    def __init__(self, debounce_seconds: float = 0.25, max_delay_seconds: float = 1.0):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._subscribers: List[Tuple[Optional[set], Handler]] = []
+        self._pending: Dict[Tuple[str, Optional[str]], ChangeEvent] = {}
+        self._first_at: Optional[float] = None
+        self._last_at: float = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, handler: Handler, tables: Optional[List[str]] = None):
+        """
+        Register an async handler for batches of events.
+
+        Args:
+            handler: Called with the list of coalesced events
+            tables: Only deliver events for these tables (default: all)
+        """
+        self._subscribers.append((set(tables) if tables else None, handler))
+
+    def publish(self, event: ChangeEvent):
+        """Queue an event for the next batch. Must be called from the event loop."""
+        previous = self._pending.pop(event.key, None)
+        merged = _merge(previous, event) if previous else event
+        if merged is not None:
+            self._pending[event.key] = merged
+
+        now = time.monotonic()
+        self._last_at = now
+        if self._first_at is None:
+            self._first_at = now
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_when_quiet())
+
+    async def _flush_when_quiet(self):
+        # Keeps going while handlers run, so events published meanwhile form the next batch
+        while self._pending:
+            now = time.monotonic()
+            wake = min(self._last_at + self.debounce_seconds, self._first_at + self.max_delay_seconds)
+            if now < wake:
+                await asyncio.sleep(wake - now)
+                continue
+            await self.flush()
+        self._first_at = None
+
+    async def flush(self):
+        """Deliver everything pending now"""
+        events = list(self._pending.values())
+        self._pending.clear()
+        self._first_at = None
+        if not events:
+            return
+
+        for tables, handler in self._subscribers:
+            selected = [e for e in events if tables is None or e.table in tables]
+            if selected:
+                try:
+                    await handler(selected)
+                except Exception as error:
+                    print(f"Change handler failed: {error}")
+
+
+# ============= EVENT SOURCES =============
+
+class PostgresChangeSource:
+    """
+    Feeds a dispatcher from Postgres LISTEN/NOTIFY.
+
+    Needs a direct database connection string (SUPABASE_DB_URL), since edge
+    functions and PostgREST cannot hold a LISTEN open. Requires asyncpg.
+    """
+
+    def __init__(self, dispatcher: EventDispatcher, dsn: Optional[str] = None, channel: str = CHANNEL):
+        self.dispatcher = dispatcher
+        self.dsn = dsn or os.getenv('SUPABASE_DB_URL')
+        self.channel = channel
+        self._connection = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.dispatcher.publish(ChangeEvent.from_payload(payload))
+
+    async def start(self):
+        import asyncpg
+
+        if not self.dsn:
+            raise ValueError('SUPABASE_DB_URL is required for Postgres change events')
+        self._connection = await asyncpg.connect(self.dsn)
+        await self._connection.add_listener(self.channel, self._on_notify)
+
+    async def stop(self):
+        if self._connection is not None:
+            await self._connection.remove_listener(self.channel, self._on_notify)
+            await self._connection.close()
+            self._connection = None
+
+
+class LocalChangeSource:
+    """
+    In-process stand-in for the database: emit() publishes events directly.
+    Used for local runs and tests without a Postgres connection.
+    """
+
+    def __init__(self, dispatcher: EventDispatcher):
+        self.dispatcher = dispatcher
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def emit(self, table: str, op: str, id: Optional[str] = None,
+             task_id: Optional[str] = None, project_id: Optional[str] = None):
+        if table == 'tasks' and task_id is None:
+            task_id = id
+        self.dispatcher.publish(ChangeEvent(table, op, id, task_id, project_id))
@@ -0,0 +1,394 @@
+"""
+Local read replica of one organization's task data
+A SQLite mirror of projects, tasks, assignees and dependencies, kept current from
+updated_at watermarks, so agent reads do not need a round-trip to the edge functions
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
+
+from streaming import stream_records
+
+# Watermarks are moved back by this much on every sync. updated_at is the
+# writing transaction's start time, so a long transaction can commit rows
+# stamped earlier than rows already seen; re-reading the overlap picks them up.
+SYNC_OVERLAP_SECONDS = 30
+
+# Reads through the tools sync first when the last sync is older than this
+DEFAULT_MAX_AGE_SECONDS = 30
+
+# Mirrors supabase/migrations/001_initial_schema.sql, including its indexes
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    organization_id TEXT,
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT,
+    color TEXT,
+    icon TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    budget REAL,
+    created_by TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    archived_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    project_id TEXT,
+    parent_task_id TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT,
+    priority TEXT,
+    position INTEGER,
+    due_date TEXT,
+    start_date TEXT,
+    estimated_hours REAL,
+    actual_hours REAL,
+    progress INTEGER,
+    is_recurring INTEGER,
+    recurrence_pattern TEXT,
+    created_by TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    completed_at TEXT,
+    completed_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS task_assignees (
+    id TEXT PRIMARY KEY,
+    task_id TEXT,
+    user_id TEXT,
+    assigned_by TEXT,
+    assigned_at TEXT,
+    UNIQUE(task_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS task_dependencies (
+    id TEXT PRIMARY KEY,
+    task_id TEXT,
+    depends_on_task_id TEXT,
+    created_at TEXT,
+    UNIQUE(task_id, depends_on_task_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    watermark TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_projects_org ON projects(organization_id);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON task_assignees(user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_project_position ON tasks(project_id, position);
+CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at);
+-- Covers analyze_workload, which then never touches the table rows
+CREATE INDEX IF NOT EXISTS idx_tasks_workload ON tasks(status, priority, due_date);
+CREATE INDEX IF NOT EXISTS idx_task_assignees_task ON task_assignees(task_id);
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_task ON task_dependencies(task_id);
+"""
+
+# Mirrored tables with the column their watermark follows (see ai-agent-api sync_changes)
+SYNC_COLUMNS = {
+    'projects': 'updated_at',
+    'tasks': 'updated_at',
+    'task_assignees': 'assigned_at',
+    'task_dependencies': 'created_at',
+    'deleted_rows': 'deleted_at',
+}
+
+_TIMESTAMP_COLUMNS = {
+    'created_at', 'updated_at', 'archived_at', 'due_date', 'start_date',
+    'completed_at', 'assigned_at', 'deleted_at'
+}
+_JSON_COLUMNS = {'recurrence_pattern'}
+
+
+def _normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Rewrite an ISO-8601 timestamp as fixed-width UTC, so that timestamps sort and
+    compare correctly as text. Plain dates (projects.start_date) are kept as is.
+    """
+    if value is None or len(value) <= 10:
+        return value
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+class LocalReplica:
+    """
+    SQLite mirror of one organization, synced incrementally from ai-agent-api.
+
+    Only reads are served locally; writes keep going through the API and show
+    up here on the next sync. The reads return the same shapes as the
+    list_tasks, list_projects and analyze_workload tools, except that embedded
+    profiles, organizations and comment counts are not mirrored.
+    """
+
+    def __init__(
+        self,
+        organization_id: str,
+        path: Optional[str] = None,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS
+    ):
+        self.organization_id = organization_id
+        self.path = path or os.getenv('LOCAL_REPLICA_PATH', f"replica-{organization_id}.db")
+        self.max_age_seconds = max_age_seconds
+        self.last_synced: Optional[float] = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._columns = {
+            table: [row['name'] for row in self._db.execute(f'PRAGMA table_info({table})')]
+            for table in ('projects', 'tasks', 'task_assignees', 'task_dependencies')
+        }
+
+    def close(self):
+        self._db.close()
+
+    # ============= SYNC =============
+
+    def _watermarks(self) -> Dict[str, str]:
+        return {row['table_name']: row['watermark'] for row in self._db.execute('SELECT * FROM sync_state')}
+
+    def _upsert(self, table: str, rows: List[Dict[str, Any]]):
+        columns = self._columns[table]
+        values = []
+        for row in rows:
+            record = []
+            for column in columns:
+                value = row.get(column)
+                if column in _TIMESTAMP_COLUMNS:
+                    value = _normalize_timestamp(value)
+                elif column in _JSON_COLUMNS and value is not None:
+                    value = json.dumps(value)
+                record.append(value)
+            values.append(record)
+
+        placeholders = ', '.join('?' for _ in columns)
+        self._db.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            values
+        )
+
+    def _apply_tombstones(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            if row['table_name'] in self._columns:
+                self._db.execute(f"DELETE FROM {row['table_name']} WHERE id = ?", (row['row_id'],))
+
+    def _clear(self):
+        for table in self._columns:
+            self._db.execute(f"DELETE FROM {table}")
+        self._db.execute('DELETE FROM sync_state')
+
+    def sync(self) -> Dict[str, int]:
+        """
+        Pull every row changed since the last sync and apply it in one transaction.
+
+        Returns:
+            Number of rows received per table
+        """
+        with self._lock:
+            overlap = timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            since = {
+                table: (datetime.fromisoformat(mark) - overlap).isoformat()
+                for table, mark in self._watermarks().items()
+            }
+            payload = {
+                'action': 'sync_changes',
+                'params': {'organization_id': self.organization_id, 'since': since}
+            }
+
+            counts = {table: 0 for table in SYNC_COLUMNS}
+            newest = {}
+            with self._db:
+                for record in stream_records('ai-agent-api', payload, 'sync replica'):
+                    if record['type'] == 'resync':
+                        # Tombstones this replica has not seen were purged: start over
+                        self._clear()
+                        continue
+                    if record['type'] == 'end':
+                        # Tombstones up to the server's clock have been seen, even if none came
+                        synced_at = _normalize_timestamp(record.get('synced_at'))
+                        if synced_at is not None:
+                            newest['deleted_rows'] = max(newest.get('deleted_rows') or synced_at, synced_at)
+                        continue
+                    if record['type'] != 'batch' or not record['rows']:
+                        continue
+                    table, rows = record['table'], record['rows']
+                    if table == 'deleted_rows':
+                        self._apply_tombstones(rows)
+                    else:
+                        self._upsert(table, rows)
+                    counts[table] += len(rows)
+                    # Pages arrive in watermark order, so the last row is the newest
+                    newest[table] = _normalize_timestamp(rows[-1][SYNC_COLUMNS[table]])
+
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO sync_state (table_name, watermark) VALUES (?, ?)',
+                    [(table, mark) for table, mark in newest.items() if mark is not None]
+                )
+
+            self.last_synced = time.monotonic()
+            return counts
+
+    def ensure_fresh(self):
+        """Sync if the replica has not been synced within max_age_seconds"""
+        if self.last_synced is None or time.monotonic() - self.last_synced > self.max_age_seconds:
+            self.sync()
+
+    # ============= READS =============
+
+    def _task_dicts(self, rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
+        tasks = [dict(row) for row in rows]
+        if not tasks:
+            return tasks
+
+        ids = [task['id'] for task in tasks]
+        placeholders = ', '.join('?' for _ in ids)
+        assignees: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self._db.execute(
+            f"SELECT task_id, user_id FROM task_assignees WHERE task_id IN ({placeholders})", ids
+        ):
+            assignees.setdefault(row['task_id'], []).append({'user_id': row['user_id']})
+        dependencies: Dict[str, List[str]] = {}
+        for row in self._db.execute(
+            f"SELECT task_id, depends_on_task_id FROM task_dependencies WHERE task_id IN ({placeholders})", ids
+        ):
+            dependencies.setdefault(row['task_id'], []).append(row['depends_on_task_id'])
+
+        project_ids = list({task['project_id'] for task in tasks if task['project_id']})
+        projects = {}
+        if project_ids:
+            placeholders = ', '.join('?' for _ in project_ids)
+            projects = {
+                row['id']: dict(row)
+                for row in self._db.execute(f"SELECT * FROM projects WHERE id IN ({placeholders})", project_ids)
+            }
+
+        for task in tasks:
+            task['is_recurring'] = bool(task['is_recurring'])
+            if task['recurrence_pattern'] is not None:
+                task['recurrence_pattern'] = json.loads(task['recurrence_pattern'])
+            task['project'] = projects.get(task['project_id'])
+            task['assignees'] = assignees.get(task['id'], [])
+            task['dependencies'] = dependencies.get(task['id'], [])
+        return tasks
+
+    def list_tasks(
+        self,
+        project_id: Optional[str] = None,
+        status: Optional[str] = None,
+        assignee_id: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """Same filters and ordering as the list_tasks action (newest first)"""
+        query = 'SELECT t.* FROM tasks t'
+        conditions, args = [], []
+        if assignee_id:
+            query += ' JOIN task_assignees a ON a.task_id = t.id'
+            conditions.append('a.user_id = ?')
+            args.append(assignee_id)
+        if project_id:
+            conditions.append('t.project_id = ?')
+            args.append(project_id)
+        if status:
+            conditions.append('t.status = ?')
+            args.append(status)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY t.created_at DESC LIMIT ?'
+        args.append(limit)
+
+        with self._lock:
+            return {'tasks': self._task_dicts(self._db.execute(query, args).fetchall())}
+
+    def has_project(self, project_id: str) -> bool:
+        """Whether the project is mirrored here, i.e. belongs to this organization"""
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM projects WHERE id = ?', (project_id,)).fetchone() is not None
+
+    def list_projects(self, limit: int = 50) -> Dict[str, Any]:
+        """Same ordering as the list_projects action (newest first)"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT * FROM projects ORDER BY created_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return {'projects': [dict(row) for row in rows]}
+
+    def analyze_workload(self, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Same metrics as the analyze_workload action, computed in one pass"""
+        now = datetime.now(timezone.utc)
+        week_from_now = now + timedelta(days=7)
+
+        query = 'SELECT t.status, t.priority, t.due_date FROM tasks t'
+        args = []
+        if user_id:
+            query += ' JOIN task_assignees a ON a.task_id = t.id WHERE a.user_id = ?'
+            args.append(user_id)
+        query = f"""
+            SELECT status, priority, COUNT(*) AS total,
+                   SUM(due_date < ?) AS overdue,
+                   SUM(due_date >= ? AND due_date <= ?) AS due_this_week
+            FROM ({query})
+            GROUP BY status, priority
+        """
+        args = [now.isoformat(timespec='microseconds'), now.isoformat(timespec='microseconds'),
+                week_from_now.isoformat(timespec='microseconds')] + args
+
+        metrics = {
+            'total_tasks': 0,
+            'by_status': {},
+            'by_priority': {},
+            'overdue': 0,
+            'due_this_week': 0,
+        }
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        for row in rows:
+            metrics['total_tasks'] += row['total']
+            metrics['by_status'][row['status']] = metrics['by_status'].get(row['status'], 0) + row['total']
+            metrics['by_priority'][row['priority']] = metrics['by_priority'].get(row['priority'], 0) + row['total']
+            metrics['overdue'] += row['overdue'] or 0
+            metrics['due_this_week'] += row['due_this_week'] or 0
+
+        return {'workload': metrics}
+
+
+# ============= COMMAND LINE INTERFACE =============
+
+def main():
+    """Create or refresh the replica for the configured organization: python replica.py [PATH]"""
+    import sys
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    org_id = os.getenv('ORGANIZATION_ID', 'default-org-id')
+    replica = LocalReplica(org_id, sys.argv[1] if len(sys.argv) > 1 else None)
+    started = time.perf_counter()
+    counts = replica.sync()
+    print(f"Synced {replica.path} in {time.perf_counter() - started:.2f}s")
+    for table, count in counts.items():
+        print(f"  {table}: {count} rows")
+    replica.close()
+
+
+if __name__ == "__main__":
+    main()
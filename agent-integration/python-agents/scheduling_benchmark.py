@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Simulation benchmark for the swarm's task scheduling
+Replays a synthetic stream of tasks through a fixed pool of workers and compares
+on-time completion and waiting times for FIFO, strict priority and TaskQueue
+"""
+
+import sys
+import heapq
+import random
+import statistics
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+from models import Task
+from task_queue import TaskQueue, PRIORITY_RANK
+
+PRIORITY_MIX = {'critical': 0.05, 'high': 0.20, 'medium': 0.45, 'low': 0.30}
+
+# Mean hours between arrival and due date beyond the work itself, per priority
+MEAN_SLACK_HOURS = {'critical': 4, 'high': 16, 'medium': 48, 'low': 120}
+
+# Share of tasks that have a due date
+DATED_SHARE = 0.7
+
+MEAN_EFFORT_HOURS = 3.0
+
+# Simulated time starts here; only differences matter
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def generate_tasks(count: int, load: float, workers: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Synthetic workload at a given utilisation (1.0 = arrivals exactly match worker capacity).
+
+    Returns:
+        Dictionaries with arrival, actual effort and the Task the scheduler sees
+        (whose estimate is off from the actual effort by up to 25% either way)
+    """
+    rng = random.Random(seed)
+    rate = load * workers / MEAN_EFFORT_HOURS  # arrivals per hour
+    priorities, weights = zip(*PRIORITY_MIX.items())
+
+    arrival = 0.0
+    tasks = []
+    for index in range(count):
+        arrival += rng.expovariate(rate)
+        priority = rng.choices(priorities, weights)[0]
+        estimate = min(16.0, max(0.25, rng.lognormvariate(0, 0.8) * MEAN_EFFORT_HOURS / 1.377))
+        effort = estimate * rng.uniform(0.75, 1.25)
+
+        due = None
+        if rng.random() < DATED_SHARE:
+            due = arrival + estimate + rng.expovariate(1 / MEAN_SLACK_HOURS[priority])
+
+        tasks.append({
+            'arrival': arrival,
+            'effort': effort,
+            'due': due,
+            'task': Task(
+                id=f"task-{index}",
+                title=f"Task {index}",
+                priority=priority,
+                estimated_hours=round(estimate, 2),
+                due_date=_iso(due) if due is not None else None,
+            ),
+        })
+    return tasks
+
+
+def _iso(hours: float) -> str:
+    return datetime.fromtimestamp(EPOCH + hours * 3600, tz=timezone.utc).isoformat()
+
+
+class FifoPolicy:
+    name = 'fifo'
+
+    def __init__(self):
+        self.queue = deque()
+
+    def push(self, item: Dict[str, Any], now: float):
+        self.queue.append(item)
+
+    def pop(self, now: float) -> Dict[str, Any]:
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class StrictPriorityPolicy:
+    """Highest priority first, FIFO within a priority (no aging)"""
+    name = 'strict priority'
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, item: Dict[str, Any], now: float):
+        heapq.heappush(self.heap, (PRIORITY_RANK[item['task'].priority], now, item['task'].id, item))
+
+    def pop(self, now: float) -> Dict[str, Any]:
+        return heapq.heappop(self.heap)[-1]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class TaskQueuePolicy:
+    name = 'task queue'
+
+    def __init__(self):
+        self.queue = TaskQueue()
+        self.items = {}
+
+    def push(self, item: Dict[str, Any], now: float):
+        self.items[item['task'].id] = item
+        self.queue.push(item['task'], now=EPOCH + now * 3600)
+
+    def pop(self, now: float) -> Dict[str, Any]:
+        return self.items.pop(self.queue.pop(now=EPOCH + now * 3600).id)
+
+    def __len__(self):
+        return len(self.queue)
+
+
+def simulate(tasks: List[Dict[str, Any]], policy, workers: int) -> List[Dict[str, Any]]:
+    """
+    Run the workload through `workers` parallel slots.
+
+    Returns:
+        One record per task with its start and finish time (hours)
+    """
+    free_at = [0.0] * workers
+    heapq.heapify(free_at)
+    pending = deque(tasks)
+    done = []
+
+    while pending or len(policy):
+        now = heapq.heappop(free_at)
+        if not len(policy) and pending and pending[0]['arrival'] > now:
+            now = pending[0]['arrival']
+        while pending and pending[0]['arrival'] <= now:
+            item = pending.popleft()
+            policy.push(item, item['arrival'])
+
+        item = policy.pop(now)
+        finish = now + item['effort']
+        done.append({**item, 'start': now, 'finish': finish})
+        heapq.heappush(free_at, finish)
+
+    return done
+
+
+def summarize(done: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """On-time share of dated tasks, and waiting hours, overall and per priority"""
+    def on_time(records):
+        dated = [r for r in records if r['due'] is not None]
+        return sum(r['finish'] <= r['due'] for r in dated) / len(dated) if dated else None
+
+    def waits(records):
+        values = sorted(r['start'] - r['arrival'] for r in records)
+        if not values:
+            return None
+        return {
+            'mean': statistics.fmean(values),
+            'p95': values[int(0.95 * (len(values) - 1))],
+            'max': values[-1],
+        }
+
+    by_priority = {p: [r for r in done if r['task'].priority == p] for p in PRIORITY_MIX}
+    return {
+        'on_time': on_time(done),
+        'on_time_by_priority': {p: on_time(records) for p, records in by_priority.items()},
+        'wait_by_priority': {p: waits(records) for p, records in by_priority.items()},
+    }
+
+
+def _pct(value: Optional[float]) -> str:
+    return f"{value * 100:5.1f}%" if value is not None else "    -"
+
+
+def main():
+    """Compare policies: python scheduling_benchmark.py [TASKS] [WORKERS]"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    policies = [FifoPolicy, StrictPriorityPolicy, TaskQueuePolicy]
+
+    for load in (0.7, 0.85, 0.95, 1.05):
+        tasks = generate_tasks(count, load, workers, seed=42)
+        print(f"\nLoad {load:.2f} ({count} tasks, {workers} workers)")
+        print(f"{'policy':<16}{'on time':>8}  " + ''.join(f"{p:>10}" for p in PRIORITY_MIX) +
+              f"{'low wait p95':>14}{'low wait max':>14}")
+        for policy_class in policies:
+            stats = summarize(simulate(tasks, policy_class(), workers))
+            low = stats['wait_by_priority']['low']
+            print(
+                f"{policy_class.name:<16}{_pct(stats['on_time']):>8}  " +
+                ''.join(f"{_pct(stats['on_time_by_priority'][p]):>10}" for p in PRIORITY_MIX) +
+                f"{low['p95']:>13.1f}h{low['max']:>13.1f}h"
+            )
+
+
+if __name__ == "__main__":
+    main()
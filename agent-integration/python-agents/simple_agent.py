@@ -68,18 +68,29 @@ def create_task_directly(title, description, project_id, priority='medium'):
         print(f"❌ Error: {response.text}")
         return None
 
+# The last task listing and its ETag; while nothing changed, the API answers
+# a listing request that sends the ETag back with an empty 304
+last_listing = {'etag': None, 'tasks': None}
+
 def list_my_tasks():
     """Show current tasks"""
     print("📋 Your current tasks:")
     
     url = f"{SUPABASE_URL}/functions/v1/ai-agent-api"
-    response = requests.post(url, headers=headers, json={
+    request_headers = dict(headers)
+    if last_listing['etag']:
+        request_headers['If-None-Match'] = last_listing['etag']
+    response = requests.post(url, headers=request_headers, json={
         'action': 'list_tasks',
         'params': {'limit': 5}
     })
     
     if response.status_code == 200:
-        tasks = response.json()['tasks']
+        last_listing['etag'] = response.headers.get('ETag')
+        last_listing['tasks'] = response.json()['tasks']
+    
+    if response.status_code in (200, 304) and last_listing['tasks'] is not None:
+        tasks = last_listing['tasks']
         for task in tasks:
             project_name = task.get('project', {}).get('name', 'No Project')
             print(f"  • {task['title']} ({task['status']}) - {project_name}")
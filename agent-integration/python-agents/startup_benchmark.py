@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the agent entry points
+Measures each module's import time with `python -X importtime` in a fresh
+interpreter and fails when any entry point exceeds its budget
+"""
+
+import os
+import re
+import sys
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+# Cumulative import time budget per entry point, in milliseconds. Modules that
+# are imported by cron/serverless invocations must not pull in the agents SDK;
+# it is imported when the first agent is built.
+BUDGETS_MS = {
+    'task_management_tools': 400,
+    'agent_swarm': 500,
+    'streaming': 400,
+    'replica': 450,
+    'realtime': 150,
+    'models': 100,
+    'model_scheduler': 150,
+    'swarm_supervisor': 150,
+    'documents': 150,
+    'simple_agent': 250,
+    'export': 700,
+    'analytics': 700,
+    'assignment': 700,
+}
+
+# Imports that must stay deferred for every entry point above
+DEFERRED_IMPORTS = {'agents', 'openai'}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, float]], set]:
+    """
+    Import `module` once in a fresh interpreter.
+
+    Returns:
+        Cumulative import time in ms, the heaviest direct imports (name, ms)
+        and the set of top-level packages that were imported
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    total = 0.0
+    children = []
+    packages = set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth = len(match.group(3)) // 2
+        name = match.group(4)
+        packages.add(name.split('.')[0])
+        if depth == 0 and name == module:
+            total = cumulative_ms
+        elif depth == 1:
+            children.append((name, cumulative_ms))
+
+    children.sort(key=lambda child: child[1], reverse=True)
+    return total, children[:5], packages
+
+
+def run(runs: int = 5) -> bool:
+    """Measure every entry point `runs` times and report the median against its budget"""
+    ok = True
+    print(f"{'entry point':<24}{'median ms':>10}{'budget ms':>11}")
+    for module, budget in BUDGETS_MS.items():
+        samples = []
+        packages = set()
+        heaviest = []
+        for _ in range(runs):
+            total, heaviest, packages = measure(module)
+            samples.append(total)
+        median = statistics.median(samples)
+        leaked = DEFERRED_IMPORTS & packages
+
+        status = 'ok'
+        if median > budget:
+            status = 'OVER BUDGET'
+        if leaked:
+            status = f"imports {', '.join(sorted(leaked))}"
+        print(f"{module:<24}{median:>10.1f}{budget:>11}  {status}")
+
+        if status != 'ok':
+            ok = False
+            for name, ms in heaviest:
+                print(f"    {name:<30}{ms:>8.1f} ms")
+    return ok
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sys.exit(0 if run(runs) else 1)
@@ -0,0 +1,166 @@
+"""
+Streaming clients for the Task Management edge functions
+Records are parsed and yielded as they arrive instead of buffering the whole response
+"""
+
+import requests
+from typing import Dict, Iterator, Optional, Any
+
+from task_management_tools import HEADERS, idempotent_headers, post_json
+from models import loads
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Same headers as the tools, plus the opt-in for a streamed response
+STREAM_HEADERS = {**HEADERS, 'Accept': NDJSON_CONTENT_TYPE}
+
+# Bytes read from the socket at a time while looking for record boundaries
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamError(Exception):
+    """Raised when a stream cannot be opened or the server reports a failure mid-stream"""
+
+
+def iter_ndjson(response: requests.Response, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse a newline-delimited JSON response.
+
+    Args:
+        response: A response opened with stream=True
+        chunk_size: Bytes to read per network chunk
+
+    Yields:
+        One decoded record per line. Raises StreamError on an `error` record
+    """
+    for line in response.iter_lines(chunk_size=chunk_size):
+        if not line:
+            continue
+        record = loads(line)
+        if record.get('type') == 'error':
+            raise StreamError(record.get('error', 'Unknown streaming error'))
+        yield record
+
+
+def stream_records(
+    function_name: str,
+    payload: Dict[str, Any],
+    description: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """POST to an edge function and yield its NDJSON records"""
+    with post_json(function_name, payload, headers or STREAM_HEADERS, stream=True) as response:
+        if response.status_code != 200:
+            raise StreamError(f"Failed to {description}: {response.text}")
+
+        # Older deployments ignore the Accept header and answer with one JSON body
+        if NDJSON_CONTENT_TYPE not in response.headers.get('Content-Type', ''):
+            raise StreamError(f"Failed to {description}: server does not support streaming")
+
+        yield from iter_ndjson(response)
+
+
+# ============= TASK STREAMS =============
+
+def stream_tasks(
+    project_id: Optional[str] = None,
+    status: Optional[str] = None,
+    assignee_id: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream tasks one at a time. Without a limit, every matching task is streamed.
+
+    Args:
+        project_id: Filter by project ID
+        status: Filter by status (todo, in_progress, review, done, blocked)
+        assignee_id: Filter by assignee user ID
+        organization_id: Filter by the organization owning the task's project
+        limit: Maximum number of tasks to return
+
+    Yields:
+        Task dictionaries in the same shape as list_tasks
+    """
+    params = {
+        'project_id': project_id,
+        'status': status,
+        'assignee_id': assignee_id,
+        'organization_id': organization_id,
+        'limit': limit
+    }
+
+    # Remove None values
+    params = {k: v for k, v in params.items() if v is not None}
+
+    for record in stream_records('ai-agent-api', {'action': 'list_tasks', 'params': params}, 'stream tasks'):
+        if record['type'] == 'task':
+            yield record['data']
+
+
+def stream_suitable_agent_tasks(organization_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream tasks that are suitable for agent automation.
+
+    Args:
+        organization_id: Only stream tasks in this organization's projects
+
+    Yields:
+        Task dictionaries with an added 'category' key (documentation, testing, etc.)
+    """
+    params = {'organization_id': organization_id} if organization_id else {}
+    payload = {'action': 'find_suitable_agent_tasks', 'params': params}
+
+    for record in stream_records('ai-agent-api', payload, 'stream suitable tasks'):
+        if record['type'] == 'task':
+            yield {**record['data'], 'category': record['category']}
+
+
+# ============= CONTENT PROCESSING STREAMS =============
+
+def stream_email_extraction(content: str, metadata: Optional[Dict] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Extract and create tasks from an email via ai-task-processor, reporting progress.
+
+    Args:
+        content: Email body text
+        metadata: Sender, subject and other context
+
+    Yields:
+        Events: 'status', 'processed' (the extraction), one 'task' per created task, then 'end'
+    """
+    payload = {
+        'action': 'process_email',
+        'data': {'content': content, 'metadata': metadata or {'source': 'agent'}}
+    }
+
+    yield from stream_records('ai-task-processor', payload, 'process email')
+
+
+def stream_processed_content(
+    processed_data: Dict[str, Any],
+    organization_id: str,
+    content_type: str = "email",
+    idempotency_key: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Save processed content, yielding each project and task as it is created.
+
+    Args:
+        processed_data: Structured data with projects and tasks (ProcessedContent.model_dump())
+        organization_id: Organization to create items in
+        content_type: Type of content (email, transcript, document)
+        idempotency_key: Pass the same key when retrying a failed stream; the
+            server then replays the first attempt's records instead of saving twice
+
+    Yields:
+        Events: 'project', 'task' and 'item_error' records, then 'end' with the totals
+    """
+    payload = {
+        'content_type': content_type,
+        'organization_id': organization_id,
+        'processed_data': processed_data
+    }
+
+    headers = {**idempotent_headers(idempotency_key), 'Accept': NDJSON_CONTENT_TYPE}
+    yield from stream_records('content-processor', payload, 'save processed content', headers)
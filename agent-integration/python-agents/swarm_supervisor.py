@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Supervisor that shards organizations' swarms across a pool of processes
+Each organization is owned by one worker process, chosen by consistent
+hashing, so its swarm stays warm in one place and only about 1/N of the
+organizations move when a worker joins or leaves. Workers share nothing but
+their job queues: the supervisor routes each job to its owner's inbox, and
+results and load stats come back on one shared queue.
+
+    python swarm_supervisor.py [PROCESSES]
+
+Without arguments, one worker per core runs auto_assign_backlog for every
+organization in ORGANIZATION_IDS each SWARM_INTERVAL seconds.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+from collections import deque
+from typing import Dict, List, Optional, Any, Iterable
+
+# Ring points per worker; more points spread organizations more evenly
+VIRTUAL_NODES = 160
+
+# Seconds between a worker's load reports
+STATS_INTERVAL = 2.0
+
+# Swarm methods a job may run, with the organization's swarm as `self`
+JOB_METHODS = {'analyze_and_assign_tasks', 'auto_assign_backlog', 'execute_suitable_tasks', 'process_email', 'process_document'}
+
+# Jobs that re-read current state, so running one again after its worker died
+# mid-job does no harm. Other jobs (process_email creates tasks) are reported
+# as failed instead.
+REPEATABLE_METHODS = {'analyze_and_assign_tasks', 'auto_assign_backlog'}
+
+# Provider limits are shared by the pool, so each worker gets a slice of them
+# (see model_scheduler.get_scheduler)
+MODEL_LIMIT_VARIABLES = {
+    'MODEL_REQUESTS_PER_MINUTE': 500,
+    'MODEL_TOKENS_PER_MINUTE': 200_000,
+    'MODEL_MAX_CONCURRENCY': 16,
+}
+
+
+class HashRing:
+    """Consistent hash ring mapping keys (organization ids) to nodes (worker ids)"""
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._owners.values()
+
+    def __len__(self) -> int:
+        return len(set(self._owners.values()))
+
+    def add(self, node: str) -> None:
+        for replica in range(self.virtual_nodes):
+            point = self._hash(f"{node}#{replica}")
+            if point not in self._owners:
+                bisect.insort(self._points, point)
+                self._owners[point] = node
+
+    def remove(self, node: str) -> None:
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def owner(self, key: str) -> Optional[str]:
+        """The node owning `key`: the first point clockwise from the key's hash"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+# ============= WORKER PROCESS =============
+
+def _jsonable(value: Any) -> Any:
+    """Results cross the process boundary as plain JSON data"""
+    return json.loads(json.dumps(value, default=lambda obj: getattr(obj, 'model_dump', lambda: str(obj))()))
+
+
+def _worker_main(worker_id: str, inbox, outbox, concurrency: int, limits: Dict[str, str]) -> None:
+    """Entry point of a worker process: runs jobs for the organizations it owns"""
+    os.environ.update(limits)
+    import asyncio
+    from agent_swarm import TaskManagementSwarm
+
+    swarms: Dict[str, TaskManagementSwarm] = {}
+    org_locks: Dict[str, asyncio.Lock] = {}
+    stats = {'completed': 0, 'failed': 0, 'running': 0, 'busy_seconds': 0.0}
+
+    def report_stats():
+        outbox.put({
+            'type': 'stats', 'worker': worker_id, 'pid': os.getpid(),
+            'organizations': len(swarms), 'cpu_seconds': time.process_time(), **stats,
+        })
+
+    async def run_job(job, slots: asyncio.Semaphore):
+        org = job['organization_id']
+        lock = org_locks.setdefault(org, asyncio.Lock())
+        # One job per organization at a time, so two passes never assign the same backlog
+        async with slots, lock:
+            stats['running'] += 1
+            start = time.perf_counter()
+            try:
+                swarm = swarms.get(org)
+                if swarm is None:
+                    swarm = swarms[org] = TaskManagementSwarm(org)
+                result = await getattr(swarm, job['method'])(**job['kwargs'])
+                message = {'ok': True, 'result': _jsonable(result)}
+                stats['completed'] += 1
+            except Exception as error:
+                message = {'ok': False, 'error': f"{type(error).__name__}: {error}"}
+                stats['failed'] += 1
+            elapsed = time.perf_counter() - start
+            stats['running'] -= 1
+            stats['busy_seconds'] += elapsed
+            outbox.put({
+                'type': 'result', 'worker': worker_id, 'job_id': job['job_id'],
+                'organization_id': org, 'ms': elapsed * 1000, **message,
+            })
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(concurrency)
+        running = set()
+        last_report = 0.0
+        outbox.put({'type': 'started', 'worker': worker_id, 'pid': os.getpid()})
+
+        while True:
+            try:
+                message = await loop.run_in_executor(None, inbox.get, True, STATS_INTERVAL)
+            except queue.Empty:
+                message = None
+
+            if message is None:
+                pass
+            elif message['type'] == 'job':
+                task = asyncio.create_task(run_job(message, slots))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            elif message['type'] == 'release':
+                # The organization moved to another worker; drop its warm state once idle
+                lock = org_locks.get(message['organization_id'])
+                if lock is None or not lock.locked():
+                    swarms.pop(message['organization_id'], None)
+                    org_locks.pop(message['organization_id'], None)
+            elif message['type'] == 'stop':
+                await asyncio.gather(*running)
+                report_stats()
+                return
+
+            if time.monotonic() - last_report >= STATS_INTERVAL:
+                report_stats()
+                last_report = time.monotonic()
+
+    asyncio.run(main())
+
+
+# ============= SUPERVISOR =============
+
+class SwarmSupervisor:
+    """
+    Shards organizations across worker processes and routes their jobs.
+
+    Jobs are plain messages (organization, swarm method, keyword arguments).
+    When a worker dies, its repeatable jobs go to the organization's owner
+    again (a restarted worker, or the next one on the ring) and the rest are
+    reported as failed. Call poll() regularly to collect results and stats and
+    to notice dead workers.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        concurrency: int = 4,
+        virtual_nodes: int = VIRTUAL_NODES,
+        restart: bool = True
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.restart = restart
+        self.ring = HashRing(virtual_nodes=virtual_nodes)
+        self._context = multiprocessing.get_context('spawn')
+        self._outbox = self._context.Queue()
+        self._workers: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._job_ids = itertools.count(1)
+        # Jobs with no live worker to take them yet
+        self._pending: deque = deque()
+        self.organizations: set = set()
+        self.results: deque = deque(maxlen=1000)
+
+    def _limits(self) -> Dict[str, str]:
+        """Each worker's slice of the model provider limits"""
+        return {
+            name: str(max(1, int(float(os.getenv(name, default)) / self.processes)))
+            for name, default in MODEL_LIMIT_VARIABLES.items()
+        }
+
+    def _spawn(self, worker_id: str) -> None:
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_id, inbox, self._outbox, self.concurrency, self._limits()),
+            name=f"swarm-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        previous = self._workers.get(worker_id, {})
+        self._workers[worker_id] = {
+            'process': process,
+            'inbox': inbox,
+            'in_flight': {},
+            'stopping': False,
+            'stats': {},
+            'latencies': previous.get('latencies', deque(maxlen=500)),
+            'restarts': previous.get('restarts', -1) + 1,
+        }
+
+    def start(self) -> None:
+        for _ in range(self.processes):
+            self.add_worker()
+
+    def add_worker(self) -> str:
+        """Start a worker and move the organizations it now owns over to it"""
+        worker_id = f"w{next(self._ids)}"
+        owners_before = self.assignments()
+        self._spawn(worker_id)
+        self.ring.add(worker_id)
+        self._release_moved(owners_before)
+        self._dispatch_pending()
+        return worker_id
+
+    def remove_worker(self, worker_id: str) -> None:
+        """Stop a worker after its running jobs; its organizations move to the others"""
+        worker = self._workers[worker_id]
+        self.ring.remove(worker_id)
+        worker['stopping'] = True
+        worker['inbox'].put({'type': 'stop'})
+
+    def assignments(self) -> Dict[str, Optional[str]]:
+        """Owning worker of every organization seen so far"""
+        return {org: self.ring.owner(org) for org in self.organizations}
+
+    def _release_moved(self, owners_before: Dict[str, Optional[str]]) -> None:
+        for org, owner in owners_before.items():
+            if owner and self.ring.owner(org) != owner and owner in self._workers:
+                self._workers[owner]['inbox'].put({'type': 'release', 'organization_id': org})
+
+    def submit(self, organization_id: str, method: str, **kwargs) -> int:
+        """Queue `method` for the organization's swarm; returns the job id"""
+        if method not in JOB_METHODS:
+            raise ValueError(f"Unknown swarm method {method!r}; expected one of {sorted(JOB_METHODS)}")
+        self.organizations.add(organization_id)
+        job = {
+            'type': 'job', 'job_id': next(self._job_ids),
+            'organization_id': organization_id, 'method': method, 'kwargs': kwargs,
+        }
+        self._route(job)
+        return job['job_id']
+
+    def _route(self, job: Dict[str, Any]) -> None:
+        owner = self.ring.owner(job['organization_id'])
+        if owner is None:
+            self._pending.append(job)
+            return
+        worker = self._workers[owner]
+        worker['in_flight'][job['job_id']] = job
+        worker['inbox'].put(job)
+
+    def _dispatch_pending(self) -> None:
+        while self._pending and len(self.ring):
+            self._route(self._pending.popleft())
+
+    def poll(self, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Collect results and stats from the workers, and recover from dead ones.
+
+        Args:
+            timeout: Seconds to wait for the first message
+
+        Returns:
+            Job results received since the last poll
+        """
+        results = self._receive(timeout)
+        dead = [worker_id for worker_id, worker in self._workers.items() if not worker['process'].is_alive()]
+        if dead:
+            # Whatever they sent before exiting, so finished jobs are not run again
+            results += self._receive(0.0)
+            results += self._recover(dead)
+        return results
+
+    def _receive(self, timeout: float) -> List[Dict[str, Any]]:
+        results = []
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                message = self._outbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return results
+            # After the first message, only take what is already there
+            deadline = min(deadline, time.monotonic())
+
+            worker = self._workers.get(message['worker'])
+            if worker is None:
+                continue
+            if message['type'] == 'stats':
+                worker['stats'] = message
+            elif message['type'] == 'result':
+                worker['in_flight'].pop(message['job_id'], None)
+                worker['latencies'].append(message['ms'])
+                results.append(message)
+                self.results.append(message)
+
+    def _recover(self, dead: List[str]) -> List[Dict[str, Any]]:
+        failed = []
+        for worker_id in dead:
+            worker = self._workers[worker_id]
+            orphaned = list(worker['in_flight'].values())
+            if worker['stopping']:
+                del self._workers[worker_id]
+            elif self.restart:
+                # Same id, same ring points: its organizations come back to it
+                self._spawn(worker_id)
+            else:
+                self.ring.remove(worker_id)
+                del self._workers[worker_id]
+            for job in orphaned:
+                if job['method'] in REPEATABLE_METHODS:
+                    self._route(job)
+                    continue
+                message = {
+                    'type': 'result', 'worker': worker_id, 'job_id': job['job_id'],
+                    'organization_id': job['organization_id'], 'ms': None,
+                    'ok': False, 'error': 'Worker exited before the job finished',
+                }
+                failed.append(message)
+                self.results.append(message)
+        return failed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load per shard: owned organizations, queued and running jobs, throughput, latency and CPU"""
+        owned: Dict[str, int] = {}
+        for owner in self.assignments().values():
+            if owner:
+                owned[owner] = owned.get(owner, 0) + 1
+
+        shards = {}
+        for worker_id, worker in self._workers.items():
+            reported = worker['stats']
+            latencies = sorted(worker['latencies'])
+            shards[worker_id] = {
+                'pid': worker['process'].pid,
+                'alive': worker['process'].is_alive(),
+                'stopping': worker['stopping'],
+                'restarts': worker['restarts'],
+                'organizations_owned': owned.get(worker_id, 0),
+                'organizations_loaded': reported.get('organizations', 0),
+                'outstanding': len(worker['in_flight']),
+                'running': reported.get('running', 0),
+                'completed': reported.get('completed', 0),
+                'failed': reported.get('failed', 0),
+                'busy_seconds': round(reported.get('busy_seconds', 0.0), 1),
+                'cpu_seconds': round(reported.get('cpu_seconds', 0.0), 1),
+                'p50_ms': latencies[len(latencies) // 2] if latencies else None,
+                'p95_ms': latencies[int(len(latencies) * 0.95)] if latencies else None,
+            }
+        return shards
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Stop every worker after its running jobs"""
+        for worker_id in list(self._workers):
+            if not self._workers[worker_id]['stopping']:
+                self.remove_worker(worker_id)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers.values():
+            worker['process'].join(max(0.0, deadline - time.monotonic()))
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+        self.poll()
+        self._workers.clear()
+
+
+# ============= COMMAND LINE INTERFACE =============
+
+def print_stats(supervisor: SwarmSupervisor) -> None:
+    print(f"\n{'shard':<7}{'pid':>8}{'orgs':>6}{'queued':>8}{'running':>9}{'done':>7}{'failed':>8}"
+          f"{'busy s':>8}{'cpu s':>7}{'p50 ms':>9}{'p95 ms':>9}")
+    for worker_id, shard in sorted(supervisor.stats().items()):
+        p50 = f"{shard['p50_ms']:.0f}" if shard['p50_ms'] is not None else '-'
+        p95 = f"{shard['p95_ms']:.0f}" if shard['p95_ms'] is not None else '-'
+        print(f"{worker_id:<7}{shard['pid'] or '-':>8}{shard['organizations_owned']:>6}"
+              f"{shard['outstanding'] - shard['running']:>8}{shard['running']:>9}{shard['completed']:>7}"
+              f"{shard['failed']:>8}{shard['busy_seconds']:>8}{shard['cpu_seconds']:>7}{p50:>9}{p95:>9}")
+
+
+def main():
+    """python swarm_supervisor.py [PROCESSES]"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    organizations = [org.strip() for org in os.getenv('ORGANIZATION_IDS', '').split(',') if org.strip()]
+    if not organizations:
+        print("Set ORGANIZATION_IDS to a comma-separated list of organization ids")
+        sys.exit(1)
+    interval = float(os.getenv('SWARM_INTERVAL', 300))
+
+    supervisor = SwarmSupervisor(processes)
+    supervisor.start()
+    print(f"{supervisor.processes} workers sharding {len(organizations)} organizations (Ctrl+C to stop)")
+    try:
+        while True:
+            for org in organizations:
+                supervisor.submit(org, 'auto_assign_backlog')
+            next_round = time.monotonic() + interval
+            next_report = time.monotonic() + STATS_INTERVAL
+            while time.monotonic() < next_round:
+                for result in supervisor.poll(timeout=min(STATS_INTERVAL, max(0.0, next_round - time.monotonic()))):
+                    if not result['ok']:
+                        print(f"{result['organization_id']}: {result['error']}")
+                if time.monotonic() >= next_report:
+                    print_stats(supervisor)
+                    next_report = time.monotonic() + STATS_INTERVAL
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
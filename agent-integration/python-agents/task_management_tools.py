@@ -5,9 +5,16 @@ These tools allow agents to interact with the Supabase backend
 
 import os
 import json
+import time
+import gzip
+import uuid
+import random
+import functools
+import threading
+import contextvars
 import requests
-from typing import Dict, List, Optional, Any
-from agents import function_tool
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 from pydantic import BaseModel, Field
 
 # Get configuration from environment
@@ -23,13 +30,343 @@ HEADERS = {
     'x-agent-key': AI_AGENT_KEY
 }
 
+# Request bodies of at least this many bytes are sent compressed (0 disables).
+# Brotli is used when the `brotli` package is installed, gzip otherwise;
+# responses are compressed by the edge functions for the same encodings.
+COMPRESS_MIN_BYTES = int(os.getenv('TOOL_COMPRESS_MIN_BYTES', 2048))
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip compresses a little less
+    brotli = None
+
+
+def encode_body(payload: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a request body, compressing it when it is large enough to be worth it.
+
+    Returns:
+        The body bytes and the headers to send with them (Content-Encoding, if compressed)
+    """
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if not COMPRESS_MIN_BYTES or len(body) < COMPRESS_MIN_BYTES:
+        return body, {}
+    if brotli is not None:
+        return brotli.compress(body, quality=5), {'Content-Encoding': 'br'}
+    return gzip.compress(body, compresslevel=6), {'Content-Encoding': 'gzip'}
+
+
+def post_json(
+    function_name: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs
+) -> requests.Response:
+    """POST a JSON body to an edge function, compressed when large (see encode_body)"""
+    body, encoding_headers = encode_body(payload)
+    return requests.post(
+        f"{SUPABASE_EDGE_FUNCTION_URL}/{function_name}",
+        headers={**(headers or HEADERS), **encoding_headers},
+        data=body,
+        **kwargs
+    )
+
+
+# Write tools send an Idempotency-Key that stays the same across retries, so a
+# retry after a timeout gets the original result back instead of writing twice
+REQUEST_TIMEOUT = float(os.getenv('TOOL_REQUEST_TIMEOUT', 30))
+MAX_RETRIES = int(os.getenv('TOOL_MAX_RETRIES', 4))
+# 409: the first attempt is still running; 5xx: failed writes release their key
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+
+def idempotent_headers(key: Optional[str] = None) -> Dict[str, str]:
+    """Default headers plus an Idempotency-Key (a new one unless `key` is given)"""
+    return {**HEADERS, 'Idempotency-Key': key or str(uuid.uuid4())}
+
+
+def post_idempotent(function_name: str, payload: Dict[str, Any], key: Optional[str] = None) -> requests.Response:
+    """
+    POST a write to an edge function, retrying with the same Idempotency-Key.
+
+    Args:
+        function_name: Edge function to call (ai-agent-api, content-processor)
+        payload: Request body
+        key: Idempotency key; generated when not given
+
+    Returns:
+        The final response. Connection errors are raised once retries are exhausted
+    """
+    body, encoding_headers = encode_body(payload)
+    headers = {**idempotent_headers(key), **encoding_headers}
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = requests.post(
+                f"{SUPABASE_EDGE_FUNCTION_URL}/{function_name}",
+                headers=headers,
+                data=body,
+                timeout=REQUEST_TIMEOUT
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                time.sleep(int(retry_after))
+                continue
+        time.sleep(min(8.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+
+
+# list_tasks, list_projects and analyze_workload answer with an ETag. The parsed
+# result is kept per request, and the next identical request sends the ETag back:
+# while the data is unchanged the API answers 304 without a body, and the kept
+# result is returned as is (callers must not modify it)
+READ_CACHE_SIZE = int(os.getenv('TOOL_READ_CACHE_SIZE', 64))
+
+_read_cache: 'OrderedDict[str, Tuple[str, Dict[str, Any]]]' = OrderedDict()
+_read_cache_lock = threading.Lock()
+
+
+def post_cached(function_name: str, payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], requests.Response]:
+    """
+    POST a read to an edge function, revalidating the result kept from the last identical request.
+
+    Returns:
+        The result (None when the request failed) and the response
+    """
+    key = json.dumps(payload, sort_keys=True)
+    with _read_cache_lock:
+        cached = _read_cache.get(key)
+        if cached is not None:
+            _read_cache.move_to_end(key)
+
+    headers = {**HEADERS, 'If-None-Match': cached[0]} if cached is not None else HEADERS
+    response = post_json(function_name, payload, headers=headers)
+
+    if response.status_code == 304 and cached is not None:
+        return cached[1], response
+    if response.status_code != 200:
+        return None, response
+
+    result = response.json()
+    etag = response.headers.get('ETag')
+    if etag and READ_CACHE_SIZE > 0:
+        with _read_cache_lock:
+            _read_cache[key] = (etag, result)
+            _read_cache.move_to_end(key)
+            while len(_read_cache) > READ_CACHE_SIZE:
+                _read_cache.popitem(last=False)
+    return result, response
+
+
+# Optional local read replicas (see replica.py), one per organization. Reads
+# by list_tasks, list_projects and analyze_workload that a replica covers (its
+# organization, or a project it mirrors) come from it; the rest, and every
+# write, still use the API.
+_replicas: Dict[str, Any] = {}
+
+
+def use_local_replica(replica, organization_id: Optional[str] = None) -> None:
+    """
+    Serve an organization's reads from a replica.LocalReplica.
+
+    Args:
+        replica: The replica, registered for its organization; None to read from the API again
+        organization_id: With replica None, the organization whose replica is dropped
+    """
+    if replica is not None:
+        _replicas[replica.organization_id] = replica
+    else:
+        _replicas.pop(organization_id, None)
+
+
+def _replica_for(organization_id: Optional[str] = None, project_id: Optional[str] = None):
+    """The fresh replica holding the rows a read asks for, or None when it has to use the API"""
+    if organization_id is not None:
+        candidates = [_replicas[organization_id]] if organization_id in _replicas else []
+    elif project_id is not None:
+        # A project belongs to one organization, so at most one replica mirrors it
+        candidates = list(_replicas.values())
+    else:
+        # Every organization's rows; no replica holds them all
+        return None
+
+    for replica in candidates:
+        replica.ensure_fresh()
+        if project_id is None or replica.has_project(project_id):
+            return replica
+    return None
+
+
+class LazyTool:
+    """
+    A tool function whose agents.FunctionTool is built on first use.
+
+    Importing the agents SDK costs seconds, so the tools only import it when an
+    agent is actually constructed (`.tool`). The wrapper stays callable as the
+    plain function, for scripts that use the API without an agent.
+    """
+
+    def __init__(self, func):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self._tool = None
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    @property
+    def tool(self):
+        if self._tool is None:
+            from agents import function_tool
+            self._tool = function_tool(self.func)
+        return self._tool
+
+
+def agent_tool(func) -> LazyTool:
+    """Mark a function as an agent tool (built lazily, see LazyTool)"""
+    return LazyTool(func)
+
+
+# ============= BATCHING =============
+# Inside `with ToolBatch()` the write tools queue their call instead of sending
+# it and return a BatchRef to its result. Leaving the block sends the queue as
+# one `batch` request, which the API runs in one transaction (012_agent_batches.sql).
+MAX_BATCH_OPERATIONS = 100
+
+_active_batch: contextvars.ContextVar = contextvars.ContextVar('tool_batch', default=None)
+
+
+class BatchRef:
+    """
+    The result of a queued write, or a part of it (`created['task']['id']`).
+
+    Passed to a later tool in the same batch, it is sent as a reference that the
+    API replaces with the value. Once the batch was sent, `result` holds the value.
+    """
+
+    def __init__(self, batch: 'ToolBatch', step: int, path: Tuple[str, ...] = ()):
+        self._batch = batch
+        self._step = step
+        self._path = path
+
+    def __getitem__(self, key) -> 'BatchRef':
+        return BatchRef(self._batch, self._step, self._path + (str(key),))
+
+    def __iter__(self):
+        # Without this, `in` and list() would index the reference forever
+        raise TypeError('A BatchRef has no value until its batch is sent; use .result')
+
+    def __repr__(self) -> str:
+        return f"BatchRef({'.'.join((str(self._step),) + self._path)})"
+
+    def to_json(self, batch: 'ToolBatch') -> Dict[str, str]:
+        if batch is not self._batch:
+            raise ValueError('A BatchRef can only be used in the batch that created it')
+        return {'$ref': '.'.join((str(self._step),) + self._path)}
+
+    @property
+    def result(self) -> Any:
+        if self._batch.error:
+            return {'error': self._batch.error}
+        if self._batch.results is None:
+            raise RuntimeError('The batch has not been sent yet')
+        value = self._batch.results[self._step]
+        for key in self._path:
+            value = value[int(key)] if isinstance(value, list) else value[key]
+        return value
+
+
+class ToolBatch:
+    """
+    Collects write tool calls and sends them as one request.
+
+        with ToolBatch() as batch:
+            created = create_task("Write release notes", project_id)
+            assign_task(created['task']['id'], user_id)
+            add_comment(created['task']['id'], "Drafted from the changelog")
+        print(created.result, batch.error)
+
+    The calls run in order in one transaction: either all of them are applied
+    or none is, and `error` says why. Leaving the block with an exception
+    discards the queued calls.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.operations: List[Dict[str, Any]] = []
+        self.results: Optional[List[Dict[str, Any]]] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    def add(self, action: str, params: Dict[str, Any]) -> BatchRef:
+        """Queue a write action; returns a reference to its result"""
+        if self.results is not None or self.error:
+            raise RuntimeError('This batch was already sent')
+        if len(self.operations) == MAX_BATCH_OPERATIONS:
+            raise ValueError(f"A batch takes at most {MAX_BATCH_OPERATIONS} operations")
+        self.operations.append({'action': action, 'params': params})
+        return BatchRef(self, len(self.operations) - 1)
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, BatchRef):
+            return value.to_json(self)
+        if isinstance(value, dict):
+            return {key: self._encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(item) for item in value]
+        return value
+
+    def send(self) -> Dict[str, Any]:
+        """
+        Send the queued calls as one `batch` request.
+
+        Returns:
+            Dictionary with the results in call order, or an error
+        """
+        if not self.operations:
+            self.results = []
+            return {'results': []}
+
+        operations = [
+            {'action': operation['action'], 'params': self._encode(operation['params'])}
+            for operation in self.operations
+        ]
+        response = post_idempotent('ai-agent-api', {'action': 'batch', 'params': {'operations': operations}}, key=self.key)
+
+        if response.status_code == 200:
+            self.results = response.json()['results']
+            return {'results': self.results}
+        self.error = f"Failed to run batch: {response.text}"
+        return {'error': self.error}
+
+    def __enter__(self) -> 'ToolBatch':
+        self._token = _active_batch.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _active_batch.reset(self._token)
+        if exc_type is None:
+            self.send()
+        return False
+
+
+def queue_in_batch(action: str, params: Dict[str, Any]) -> Optional[BatchRef]:
+    """Queue a write in the active ToolBatch; returns None when there is none"""
+    batch = _active_batch.get()
+    return batch.add(action, params) if batch is not None else None
+
 # ============= TASK TOOLS =============
 
-@function_tool
+@agent_tool
 def list_tasks(
     project_id: Optional[str] = None,
     status: Optional[str] = None,
     assignee_id: Optional[str] = None,
+    organization_id: Optional[str] = None,
     limit: int = 100
 ) -> Dict[str, Any]:
     """
@@ -39,41 +376,87 @@ def list_tasks(
         project_id: Filter by project ID
         status: Filter by status (todo, in_progress, review, done, blocked)
         assignee_id: Filter by assignee user ID
+        organization_id: Filter by the organization owning the task's project
         limit: Maximum number of tasks to return
     
     Returns:
         Dictionary containing list of tasks
     """
+    replica = _replica_for(organization_id, project_id)
+    if replica is not None:
+        return replica.list_tasks(project_id, status, assignee_id, limit)
+
     params = {
         'project_id': project_id,
         'status': status,
         'assignee_id': assignee_id,
+        'organization_id': organization_id,
         'limit': limit
     }
     
     # Remove None values
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'list_tasks', 'params': params}
-    )
+    result, response = post_cached('ai-agent-api', {'action': 'list_tasks', 'params': params})
     
+    if result is not None:
+        return result
+    else:
+        return {'error': f"Failed to list tasks: {response.text}"}
+
+
+@agent_tool
+def search_tasks(
+    query: str,
+    organization_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Full-text search over task titles, descriptions and comments, best match first.
+    Use this instead of listing and scanning tasks when looking for related work.
+
+    Args:
+        query: Search words, e.g. "billing migration"; supports "quoted phrases", "or" and -excluded words
+        organization_id: Restrict to one organization's projects
+        project_id: Restrict to one project
+        status: Restrict to a status (todo, in_progress, review, done, blocked)
+        limit: Maximum number of results (up to 100)
+        offset: Number of results to skip; pass the previous next_offset to get the next page
+
+    Returns:
+        Dictionary with matching tasks (rank and a highlighted headline with matches in **bold**)
+        and next_offset, which is None on the last page
+    """
+    params = {
+        'query': query,
+        'organization_id': organization_id,
+        'project_id': project_id,
+        'status': status,
+        'limit': limit,
+        'offset': offset
+    }
+    params = {k: v for k, v in params.items() if v is not None}
+
+    response = post_json('ai-agent-api', {'action': 'search_tasks', 'params': params}, timeout=REQUEST_TIMEOUT)
+
     if response.status_code == 200:
         return response.json()
     else:
-        return {'error': f"Failed to list tasks: {response.text}"}
+        return {'error': f"Failed to search tasks: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def create_task(
     title: str,
     project_id: str,
     description: Optional[str] = None,
     priority: str = "medium",
     due_date: Optional[str] = None,
-    status: str = "todo"
+    status: str = "todo",
+    recurrence: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Create a new task in the task management system.
@@ -85,6 +468,10 @@ def create_task(
         priority: Priority level (low, medium, high, critical)
         due_date: Due date in YYYY-MM-DD format
         status: Initial status (todo, in_progress, review, done, blocked)
+        recurrence: RRULE for a recurring task, e.g. "FREQ=WEEKLY;BYDAY=MO" or
+            "FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=12". The task is the first
+            occurrence (due_date is required); later ones are created by
+            materialize_recurring_tasks
     
     Returns:
         Dictionary containing the created task
@@ -97,12 +484,14 @@ def create_task(
         'due_date': due_date,
         'status': status
     }
+    if recurrence:
+        params['recurrence'] = recurrence
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'create_task', 'params': params}
-    )
+    queued = queue_in_batch('create_task', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'create_task', 'params': params})
     
     if response.status_code == 200:
         return response.json()
@@ -110,7 +499,7 @@ def create_task(
         return {'error': f"Failed to create task: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def update_task(
     task_id: str,
     title: Optional[str] = None,
@@ -145,11 +534,11 @@ def update_task(
         'updates': updates
     }
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'update_task', 'params': params}
-    )
+    queued = queue_in_batch('update_task', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'update_task', 'params': params})
     
     if response.status_code == 200:
         return response.json()
@@ -157,7 +546,7 @@ def update_task(
         return {'error': f"Failed to update task: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def assign_task(task_id: str, user_id: str) -> Dict[str, Any]:
     """
     Assign a task to a user.
@@ -174,11 +563,11 @@ def assign_task(task_id: str, user_id: str) -> Dict[str, Any]:
         'user_id': user_id
     }
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'assign_task', 'params': params}
-    )
+    queued = queue_in_batch('assign_task', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'assign_task', 'params': params})
     
     if response.status_code == 200:
         return response.json()
@@ -186,9 +575,69 @@ def assign_task(task_id: str, user_id: str) -> Dict[str, Any]:
         return {'error': f"Failed to assign task: {response.text}"}
 
 
+class TaskAssignment(BaseModel):
+    """A single task-to-user assignment"""
+    task_id: str
+    user_id: str
+
+
+@agent_tool
+def bulk_assign_tasks(assignments: List[TaskAssignment]) -> Dict[str, Any]:
+    """
+    Assign many tasks in a single request.
+    
+    Args:
+        assignments: List of task_id/user_id pairs
+    
+    Returns:
+        Success status and number of new assignments
+    """
+    params = {
+        'assignments': [a.model_dump() for a in assignments]
+    }
+    
+    queued = queue_in_batch('bulk_assign', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'bulk_assign', 'params': params})
+    
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {'error': f"Failed to bulk assign tasks: {response.text}"}
+
+
+@agent_tool
+def materialize_recurring_tasks(organization_id: Optional[str] = None, horizon_days: int = 90) -> Dict[str, Any]:
+    """
+    Create the upcoming occurrences of recurring tasks, up to horizon_days ahead.
+    
+    Runs are incremental: each series continues from where the previous run
+    stopped, so calling this again only creates newly due occurrences.
+    
+    Args:
+        organization_id: Limit to one organization's recurring tasks
+        horizon_days: How far ahead to create occurrences (1-366)
+    
+    Returns:
+        Number of series advanced and tasks created
+    """
+    params = {'horizon_days': horizon_days}
+    if organization_id:
+        params['organization_id'] = organization_id
+    
+    response = post_json('ai-agent-api', {'action': 'materialize_recurring', 'params': params}, timeout=REQUEST_TIMEOUT)
+    
+    if response.status_code == 200:
+        return response.json()
+    else:
+        return {'error': f"Failed to materialize recurring tasks: {response.text}"}
+
+
 # ============= PROJECT TOOLS =============
 
-@function_tool
+@agent_tool
 def create_project(
     name: str,
     organization_id: str,
@@ -214,11 +663,11 @@ def create_project(
         'status': status
     }
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'create_project', 'params': params}
-    )
+    queued = queue_in_batch('create_project', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'create_project', 'params': params})
     
     if response.status_code == 200:
         return response.json()
@@ -226,10 +675,11 @@ def create_project(
         return {'error': f"Failed to create project: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def list_projects(
     organization_id: Optional[str] = None,
-    limit: int = 50
+    limit: int = 50,
+    include_stats: bool = False
 ) -> Dict[str, Any]:
     """
     List projects.
@@ -237,69 +687,86 @@ def list_projects(
     Args:
         organization_id: Filter by organization
         limit: Maximum number of projects to return
+        include_stats: Add each project's precomputed stats: task counts by
+            status, estimated and logged hours, weighted progress and overdue count
     
     Returns:
         Dictionary containing list of projects
     """
+    # The replica has no time entries or rollups, so stats come from the API
+    replica = None if include_stats else _replica_for(organization_id)
+    if replica is not None:
+        return replica.list_projects(limit)
+
     params = {
         'organization_id': organization_id,
         'limit': limit
     }
+    if include_stats:
+        params['include_stats'] = True
     
     # Remove None values
     params = {k: v for k, v in params.items() if v is not None}
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'list_projects', 'params': params}
-    )
+    result, response = post_cached('ai-agent-api', {'action': 'list_projects', 'params': params})
     
-    if response.status_code == 200:
-        return response.json()
+    if result is not None:
+        return result
     else:
         return {'error': f"Failed to list projects: {response.text}"}
 
 
 # ============= ANALYSIS TOOLS =============
 
-@function_tool
-def analyze_workload(user_id: Optional[str] = None) -> Dict[str, Any]:
+@agent_tool
+def analyze_workload(
+    user_id: Optional[str] = None,
+    organization_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Analyze workload metrics for a user or the entire team.
     
     Args:
         user_id: User ID to analyze (optional, analyzes all if not provided)
+        organization_id: Only count tasks in this organization's projects
     
     Returns:
         Workload metrics including task counts by status and priority
     """
-    params = {'user_id': user_id} if user_id else {}
+    replica = _replica_for(organization_id)
+    if replica is not None:
+        return replica.analyze_workload(user_id)
+
+    params = {
+        'user_id': user_id,
+        'organization_id': organization_id
+    }
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'analyze_workload', 'params': params}
-    )
+    # Remove None values
+    params = {k: v for k, v in params.items() if v is not None}
     
-    if response.status_code == 200:
-        return response.json()
+    result, response = post_cached('ai-agent-api', {'action': 'analyze_workload', 'params': params})
+    
+    if result is not None:
+        return result
     else:
         return {'error': f"Failed to analyze workload: {response.text}"}
 
 
-@function_tool
-def find_suitable_agent_tasks() -> Dict[str, Any]:
+@agent_tool
+def find_suitable_agent_tasks(organization_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Find tasks that are suitable for agent automation.
     
+    Args:
+        organization_id: Only find tasks in this organization's projects
+    
     Returns:
         Dictionary of tasks categorized by type (documentation, testing, etc.)
     """
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'find_suitable_agent_tasks', 'params': {}}
+    params = {'organization_id': organization_id} if organization_id else {}
+    response = post_json(
+        'ai-agent-api', {'action': 'find_suitable_agent_tasks', 'params': params}, timeout=REQUEST_TIMEOUT
     )
     
     if response.status_code == 200:
@@ -308,7 +775,7 @@ def find_suitable_agent_tasks() -> Dict[str, Any]:
         return {'error': f"Failed to find suitable tasks: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def add_comment(task_id: str, content: str) -> Dict[str, Any]:
     """
     Add a comment to a task.
@@ -325,11 +792,11 @@ def add_comment(task_id: str, content: str) -> Dict[str, Any]:
         'content': content
     }
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/ai-agent-api",
-        headers=HEADERS,
-        json={'action': 'add_comment', 'params': params}
-    )
+    queued = queue_in_batch('add_comment', params)
+    if queued is not None:
+        return queued
+
+    response = post_idempotent('ai-agent-api', {'action': 'add_comment', 'params': params})
     
     if response.status_code == 200:
         return response.json()
@@ -339,14 +806,31 @@ def add_comment(task_id: str, content: str) -> Dict[str, Any]:
 
 # ============= CONTENT PROCESSING TOOLS =============
 
+class ExtractedTask(BaseModel):
+    """A task extracted from an email or transcript"""
+    title: str
+    description: Optional[str] = None
+    priority: str = Field(default="medium", description="low, medium, high or critical")
+    due_date: Optional[str] = Field(default=None, description="ISO-8601 date")
+    assignee_email: Optional[str] = None
+    project_name: Optional[str] = Field(default=None, description="Existing project for a standalone task")
+
+
+class ExtractedProject(BaseModel):
+    """A project extracted from an email or transcript, with its tasks"""
+    name: str
+    description: Optional[str] = None
+    tasks: List[ExtractedTask] = Field(default_factory=list)
+
+
 class ProcessedContent(BaseModel):
     """Structure for processed content from emails/transcripts"""
-    projects: List[Dict] = Field(default_factory=list)
-    standalone_tasks: List[Dict] = Field(default_factory=list)
+    projects: List[ExtractedProject] = Field(default_factory=list)
+    standalone_tasks: List[ExtractedTask] = Field(default_factory=list)
     summary: str
 
 
-@function_tool
+@agent_tool
 def process_email_content(
     content: str,
     organization_id: str,
@@ -369,16 +853,12 @@ def process_email_content(
     if sender: metadata['sender'] = sender
     if subject: metadata['subject'] = subject
     
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/content-processor",
-        headers=HEADERS,
-        json={
-            'content_type': 'email',
-            'content': content,
-            'metadata': metadata,
-            'organization_id': organization_id
-        }
-    )
+    response = post_json('content-processor', {
+        'content_type': 'email',
+        'content': content,
+        'metadata': metadata,
+        'organization_id': organization_id
+    }, timeout=REQUEST_TIMEOUT)
     
     if response.status_code == 200:
         return response.json()
@@ -386,7 +866,7 @@ def process_email_content(
         return {'error': f"Failed to process email: {response.text}"}
 
 
-@function_tool
+@agent_tool
 def save_processed_content(
     processed_data: ProcessedContent,
     organization_id: str,
@@ -403,15 +883,11 @@ def save_processed_content(
     Returns:
         Results of task/project creation
     """
-    response = requests.post(
-        f"{SUPABASE_EDGE_FUNCTION_URL}/content-processor",
-        headers=HEADERS,
-        json={
-            'content_type': content_type,
-            'organization_id': organization_id,
-            'processed_data': processed_data.model_dump()
-        }
-    )
+    response = post_idempotent('content-processor', {
+        'content_type': content_type,
+        'organization_id': organization_id,
+        'processed_data': processed_data.model_dump(exclude_none=True)
+    })
     
     if response.status_code == 200:
         return response.json()
@@ -0,0 +1,116 @@
+"""
+Priority queue for the tasks the swarm executes
+Orders work by due-date urgency, priority and effort, with aging so that
+low-priority tasks are delayed but never starved
+"""
+
+import time
+import heapq
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models import Task
+
+PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Longest a task of each priority waits in the queue before it is treated as
+# due, in seconds. This is the aging bound: however much higher-priority work
+# keeps arriving, a low task is at the front within a week of being queued.
+PRIORITY_HORIZONS = {
+    'critical': 0.0,
+    'high': 4 * 3600.0,
+    'medium': 24 * 3600.0,
+    'low': 7 * 24 * 3600.0,
+}
+
+# Hours assumed for tasks without an estimate
+DEFAULT_ESTIMATE_HOURS = 4.0
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+class TaskQueue:
+    """
+    Earliest-virtual-deadline-first queue of tasks.
+
+    Each task gets a virtual deadline when it is queued: the earlier of its
+    latest start time (due date minus estimated effort) and its enqueue time
+    plus its priority's horizon. Popping returns the earliest deadline,
+    ties broken by priority, then shorter work, then arrival order.
+
+    Because both terms are fixed when the task is queued, the ordering never
+    changes while tasks wait and a plain binary heap suffices. Undated work is
+    ordered by priority and waiting time.
+
+    A task that reaches the front after it can no longer finish by its due
+    date is re-queued once under its priority horizon alone. Otherwise, under
+    overload, late tasks would always sort first and make every task behind
+    them late as well; this way they keep their place among work of the same
+    priority and are still picked up within the horizon.
+    """
+
+    def __init__(
+        self,
+        horizons: Optional[Dict[str, float]] = None,
+        default_estimate_hours: float = DEFAULT_ESTIMATE_HOURS,
+        clock=time.time
+    ):
+        self.horizons = horizons or PRIORITY_HORIZONS
+        self.default_estimate_hours = default_estimate_hours
+        self.clock = clock
+        self._heap: List[Tuple[float, int, float, int, Optional[float], float, Task]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def deadline(self, task: Task, enqueued_at: float) -> float:
+        """Virtual deadline (epoch seconds) of a task queued at `enqueued_at`"""
+        return min(self._aging_deadline(task, enqueued_at), self._latest_start(task) or float('inf'))
+
+    def _aging_deadline(self, task: Task, enqueued_at: float) -> float:
+        return enqueued_at + self.horizons.get(task.priority, max(self.horizons.values()))
+
+    def _latest_start(self, task: Task) -> Optional[float]:
+        due = _timestamp(task.due_date)
+        if due is None:
+            return None
+        return due - (task.estimated_hours or self.default_estimate_hours) * 3600.0
+
+    def push(self, task: Task, now: Optional[float] = None):
+        """Queue a task; `now` defaults to the queue's clock"""
+        enqueued_at = self.clock() if now is None else now
+        aging_deadline = self._aging_deadline(task, enqueued_at)
+        latest_start = self._latest_start(task)
+        heapq.heappush(self._heap, (
+            aging_deadline if latest_start is None else min(aging_deadline, latest_start),
+            PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK)),
+            task.estimated_hours or self.default_estimate_hours,
+            next(self._sequence),
+            latest_start,
+            aging_deadline,
+            task,
+        ))
+
+    def _settle(self, now: Optional[float]):
+        """Re-queue tasks at the front that can no longer start on time under their aging deadline"""
+        now = self.clock() if now is None else now
+        while self._heap:
+            deadline, rank, estimate, sequence, latest_start, aging_deadline, task = self._heap[0]
+            if latest_start is None or latest_start >= now or deadline >= aging_deadline:
+                return
+            heapq.heapreplace(self._heap, (aging_deadline, rank, estimate, sequence, None, aging_deadline, task))
+
+    def pop(self, now: Optional[float] = None) -> Task:
+        """Remove and return the most urgent task. Raises IndexError when empty"""
+        self._settle(now)
+        return heapq.heappop(self._heap)[-1]
+
+    def peek(self, now: Optional[float] = None) -> Task:
+        self._settle(now)
+        return self._heap[0][-1]
@@ -0,0 +1,80 @@
+"""
+Unit tests for the capacity-aware assignment solver (assignment.plan_assignments)
+Run with: python -m pytest test_assignment.py
+"""
+
+from assignment import Member, plan_assignments
+from models import Task
+
+
+def _assigned(plan):
+    return {a['task_id']: a['user_id'] for a in plan.assignments}
+
+
+def test_multi_word_expertise_terms_match_task_words():
+    members = [
+        Member('pm', expertise=['product-strategy', 'business-analysis']),
+        Member('dev', expertise=['full-stack development']),
+    ]
+    tasks = [
+        Task('strategy', 'Draft product strategy doc', estimated_hours=2),
+        Task('billing', 'full-stack development of billing page', estimated_hours=2),
+    ]
+
+    plan = plan_assignments(tasks, members)
+
+    assert _assigned(plan) == {'strategy': 'pm', 'billing': 'dev'}
+    assert all(a['expertise_matches'] == 1 for a in plan.assignments)
+    assert plan.leftovers == []
+
+
+def test_unmatched_task_is_assigned_on_load():
+    members = [
+        Member('busy', load_hours=30, expertise=['product-strategy']),
+        Member('free', load_hours=5, expertise=['full-stack development']),
+    ]
+
+    plan = plan_assignments([Task('login', 'Fix login bug', estimated_hours=3)], members)
+
+    assert _assigned(plan) == {'login': 'free'}
+    assert plan.assignments[0]['expertise_matches'] == 0
+    assert plan.leftovers == []
+
+
+def test_expertise_outweighs_small_load_difference():
+    members = [
+        Member('a', load_hours=10, expertise=['billing']),
+        Member('b', load_hours=4),
+    ]
+
+    plan = plan_assignments([Task('t', 'Billing export', estimated_hours=2)], members)
+
+    assert _assigned(plan) == {'t': 'a'}
+
+
+def test_partial_term_does_not_match():
+    members = [Member('a', expertise=['product-strategy']), Member('b')]
+
+    plan = plan_assignments([Task('t', 'Product launch', estimated_hours=2)], members)
+
+    assert plan.assignments[0]['expertise_matches'] == 0
+
+
+def test_urgent_tasks_take_capacity_first():
+    members = [Member('only', capacity_hours=10)]
+    tasks = [
+        Task('low', 'Tidy docs', priority='low', estimated_hours=8),
+        Task('critical', 'Outage follow-up', priority='critical', estimated_hours=8),
+    ]
+
+    plan = plan_assignments(tasks, members)
+
+    assert _assigned(plan) == {'critical': 'only'}
+    assert [(l['task_id'], l['reason']) for l in plan.leftovers] == [('low', 'no_capacity')]
+
+
+def test_no_members_leaves_everything():
+    plan = plan_assignments([Task('t', 'Anything')], [])
+
+    assert plan.assignments == []
+    assert plan.leftovers[0]['reason'] == 'no_members'
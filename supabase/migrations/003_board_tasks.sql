@@ -0,0 +1,32 @@
+-- Board data in one round-trip: tasks with their project and assignees
+-- (including profiles) embedded, for the Kanban, Gantt and list views.
+-- Runs as the caller (SECURITY INVOKER), so the normal RLS policies apply.
+CREATE OR REPLACE FUNCTION public.get_board_tasks(
+    p_project_ids UUID[] DEFAULT NULL,
+    p_limit INTEGER DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS SETOF JSONB AS $$
+    SELECT to_jsonb(t) || jsonb_build_object(
+        'project', to_jsonb(p),
+        'assignees', COALESCE(a.assignees, '[]'::jsonb)
+    )
+    FROM public.tasks t
+    LEFT JOIN public.projects p ON p.id = t.project_id
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(
+            to_jsonb(ta) || jsonb_build_object('profiles', to_jsonb(pr))
+            ORDER BY ta.assigned_at
+        ) AS assignees
+        FROM public.task_assignees ta
+        LEFT JOIN public.profiles pr ON pr.id = ta.user_id
+        WHERE ta.task_id = t.id
+    ) a ON TRUE
+    WHERE p_project_ids IS NULL OR t.project_id = ANY(p_project_ids)
+    ORDER BY t.position ASC, t.id
+    LIMIT p_limit
+    OFFSET p_offset;
+$$ LANGUAGE sql STABLE;
+
+-- Serves the per-project filter and position ordering above without a sort
+CREATE INDEX IF NOT EXISTS idx_tasks_project_position ON public.tasks(project_id, position);
@@ -0,0 +1,34 @@
+-- Change notifications for agents: every insert/update/delete on tasks,
+-- comments and task_assignees is announced on the 'task_changes' channel
+-- (LISTEN task_changes). Payloads carry ids only; listeners fetch what they need.
+CREATE OR REPLACE FUNCTION public.notify_task_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := to_jsonb(OLD);
+    ELSE
+        row_data := to_jsonb(NEW);
+    END IF;
+
+    PERFORM pg_notify('task_changes', jsonb_build_object(
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'id', row_data->>'id',
+        'task_id', CASE WHEN TG_TABLE_NAME = 'tasks' THEN row_data->>'id' ELSE row_data->>'task_id' END,
+        'project_id', row_data->>'project_id'
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_tasks_change AFTER INSERT OR UPDATE OR DELETE ON public.tasks
+    FOR EACH ROW EXECUTE FUNCTION public.notify_task_change();
+
+CREATE TRIGGER notify_comments_change AFTER INSERT OR UPDATE OR DELETE ON public.comments
+    FOR EACH ROW EXECUTE FUNCTION public.notify_task_change();
+
+CREATE TRIGGER notify_task_assignees_change AFTER INSERT OR UPDATE OR DELETE ON public.task_assignees
+    FOR EACH ROW EXECUTE FUNCTION public.notify_task_change();
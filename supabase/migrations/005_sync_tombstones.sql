@@ -0,0 +1,123 @@
+-- Incremental sync for local read replicas (agent-integration/python-agents/replica.py).
+-- Replicas pull rows changed since a per-table watermark; deletes leave no row
+-- behind, so they are recorded here as tombstones and pulled the same way.
+-- Tombstones carry the deleted row's organization, so a replica pulls only its
+-- own, and are purged after 30 days; replicas whose tombstone watermark is
+-- older than the purge resync from scratch (deleted_rows_horizon).
+CREATE TABLE public.deleted_rows (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_id UUID NOT NULL,
+    organization_id UUID,
+    deleted_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- No policies: only the service role (edge functions) reads tombstones
+ALTER TABLE public.deleted_rows ENABLE ROW LEVEL SECURITY;
+
+-- Runs before the delete, so cascades find the organization of a project or
+-- task deleted earlier in the same statement in its tombstone
+CREATE OR REPLACE FUNCTION public.record_deleted_row()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent_table TEXT;
+    parent_id UUID;
+    owner UUID;
+BEGIN
+    IF TG_TABLE_NAME = 'projects' THEN
+        owner := OLD.organization_id;
+    ELSE
+        IF TG_TABLE_NAME = 'tasks' THEN
+            parent_table := 'projects';
+            parent_id := OLD.project_id;
+            SELECT p.organization_id INTO owner FROM public.projects p WHERE p.id = parent_id;
+        ELSE
+            parent_table := 'tasks';
+            parent_id := OLD.task_id;
+            SELECT p.organization_id INTO owner
+            FROM public.tasks t
+            JOIN public.projects p ON p.id = t.project_id
+            WHERE t.id = parent_id;
+        END IF;
+
+        IF owner IS NULL THEN
+            SELECT d.organization_id INTO owner
+            FROM public.deleted_rows d
+            WHERE d.table_name = parent_table AND d.row_id = parent_id
+            ORDER BY d.id DESC
+            LIMIT 1;
+        END IF;
+    END IF;
+
+    INSERT INTO public.deleted_rows (table_name, row_id, organization_id)
+    VALUES (TG_TABLE_NAME, OLD.id, owner);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER record_projects_delete BEFORE DELETE ON public.projects
+    FOR EACH ROW EXECUTE FUNCTION public.record_deleted_row();
+
+CREATE TRIGGER record_tasks_delete BEFORE DELETE ON public.tasks
+    FOR EACH ROW EXECUTE FUNCTION public.record_deleted_row();
+
+CREATE TRIGGER record_task_assignees_delete BEFORE DELETE ON public.task_assignees
+    FOR EACH ROW EXECUTE FUNCTION public.record_deleted_row();
+
+CREATE TRIGGER record_task_dependencies_delete BEFORE DELETE ON public.task_dependencies
+    FOR EACH ROW EXECUTE FUNCTION public.record_deleted_row();
+
+-- Tombstones of rows deleted before purged_before have been purged; one row, absent until the first purge
+CREATE TABLE public.deleted_rows_horizon (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    purged_before TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE public.deleted_rows_horizon ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.purge_deleted_rows(older_than INTERVAL DEFAULT '30 days')
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := NOW() - older_than;
+    purged INTEGER;
+BEGIN
+    INSERT INTO public.deleted_rows_horizon AS h (purged_before)
+    VALUES (cutoff)
+    ON CONFLICT (id) DO UPDATE
+    SET purged_before = greatest(h.purged_before, EXCLUDED.purged_before);
+
+    DELETE FROM public.deleted_rows WHERE deleted_at < cutoff;
+    GET DIAGNOSTICS purged = ROW_COUNT;
+    RETURN purged;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION public.purge_deleted_rows(INTERVAL) FROM PUBLIC, anon, authenticated;
+
+-- Read by sync_changes: the database's clock, which becomes the replica's
+-- tombstone watermark, and the purge horizon
+CREATE OR REPLACE FUNCTION public.tombstone_horizon()
+RETURNS TABLE (server_time TIMESTAMPTZ, purged_before TIMESTAMPTZ) AS $$
+    SELECT NOW(), (SELECT h.purged_before FROM public.deleted_rows_horizon h);
+$$ LANGUAGE sql STABLE;
+
+-- Watermark scans: rows ordered by (watermark column, id)
+CREATE INDEX idx_projects_org_updated ON public.projects(organization_id, updated_at, id);
+CREATE INDEX idx_tasks_updated ON public.tasks(updated_at, id);
+CREATE INDEX idx_task_assignees_assigned ON public.task_assignees(assigned_at, id);
+CREATE INDEX idx_task_dependencies_created ON public.task_dependencies(created_at, id);
+CREATE INDEX idx_deleted_rows_org_deleted ON public.deleted_rows(organization_id, deleted_at, id);
+-- Cascades look up their parent's tombstone
+CREATE INDEX idx_deleted_rows_row ON public.deleted_rows(row_id);
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'purge-deleted-rows',
+            '30 3 * * *',
+            'SELECT public.purge_deleted_rows()'
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,43 @@
+-- Idempotency keys for mutating edge function requests (ai-agent-api, content-processor).
+-- The first request with a key claims it; once it succeeds its response is
+-- stored, and retries with the same key get that response instead of writing again.
+CREATE TABLE public.idempotency_keys (
+    key TEXT PRIMARY KEY,                      -- '<function>:<Idempotency-Key header>'
+    request_hash TEXT NOT NULL,                -- SHA-256 of the request body
+    status TEXT NOT NULL DEFAULT 'in_progress' CHECK (status IN ('in_progress', 'completed')),
+    response_status INTEGER,
+    response_body TEXT,
+    content_type TEXT,
+    locked_until TIMESTAMPTZ NOT NULL,         -- an in-progress claim older than this was abandoned
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX idx_idempotency_keys_expires ON public.idempotency_keys(expires_at);
+
+-- No policies: only the service role (edge functions) uses this table
+ALTER TABLE public.idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.purge_expired_idempotency_keys()
+RETURNS INTEGER AS $$
+DECLARE
+    deleted INTEGER;
+BEGIN
+    DELETE FROM public.idempotency_keys WHERE expires_at < NOW();
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    RETURN deleted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Expired keys are also replaced on reuse, so this only bounds the table size
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'purge-expired-idempotency-keys',
+            '17 * * * *',
+            'SELECT public.purge_expired_idempotency_keys()'
+        );
+    END IF;
+END;
+$$;
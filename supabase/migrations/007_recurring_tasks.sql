@@ -0,0 +1,318 @@
+-- Recurring tasks. A task with is_recurring = true is the template of a series
+-- and its first occurrence (at its due date). materialize_recurring_tasks()
+-- inserts the following occurrences up to a horizon as ordinary tasks, in one
+-- statement for all series. Each template remembers how far it has been
+-- generated (recurrence_generated_until, 'infinity' once the series has
+-- ended), so a daily run only expands and inserts what entered the horizon
+-- since the last one.
+--
+-- recurrence_pattern follows RFC 5545 RRULE, as a string and/or as keys:
+--   {"rrule": "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20241231T000000Z"}
+--   {"freq": "monthly", "bymonthday": [1, -1], "count": 12}
+-- Supported: FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL, COUNT, UNTIL,
+-- BYDAY (MO..SU, with DAILY or WEEKLY) and BYMONTHDAY (1..31 or -31..-1 from
+-- the end of the month, with MONTHLY).
+ALTER TABLE public.tasks
+    ADD COLUMN recurrence_parent_id UUID REFERENCES public.tasks(id) ON DELETE SET NULL,
+    ADD COLUMN recurrence_generated_until TIMESTAMPTZ;
+
+-- One instance per occurrence, so overlapping or repeated runs insert nothing twice
+CREATE UNIQUE INDEX idx_tasks_recurrence_instance ON public.tasks(recurrence_parent_id, due_date)
+    WHERE recurrence_parent_id IS NOT NULL;
+
+CREATE INDEX idx_tasks_recurring_templates ON public.tasks(recurrence_generated_until)
+    WHERE is_recurring;
+
+-- Normalized rule: lower-case keys, RRULE string parts merged in (explicit keys
+-- win), UNTIL as a timestamp and BYDAY/BYMONTHDAY as arrays
+CREATE OR REPLACE FUNCTION public.recurrence_rule(pattern JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    rule JSONB;
+    part TEXT;
+    name TEXT;
+    value TEXT;
+BEGIN
+    SELECT coalesce(jsonb_object_agg(lower(k), v), '{}'::jsonb) INTO rule
+    FROM jsonb_each(pattern - 'rrule') AS e(k, v);
+
+    IF jsonb_typeof(pattern->'rrule') = 'string' THEN
+        FOREACH part IN ARRAY string_to_array(regexp_replace(pattern->>'rrule', '^RRULE:', '', 'i'), ';') LOOP
+            name := lower(trim(split_part(part, '=', 1)));
+            value := trim(split_part(part, '=', 2));
+            IF name = '' THEN
+                CONTINUE;
+            END IF;
+            IF name = 'until' AND value ~ '^\d{8}(T\d{6}Z?)?$' THEN
+                value := (to_timestamp(substr(value || 'T000000', 1, 15), 'YYYYMMDD"T"HH24MISS')::timestamp
+                          AT TIME ZONE 'UTC')::text;
+            END IF;
+            rule := jsonb_build_object(name, value) || rule;
+        END LOOP;
+    END IF;
+
+    -- Lists may be given as "MO,TH", ["MO", "TH"] or a single number
+    FOREACH name IN ARRAY ARRAY['byday', 'bymonthday'] LOOP
+        IF jsonb_typeof(rule->name) = 'string' THEN
+            rule := rule || jsonb_build_object(name, to_jsonb(string_to_array(rule->>name, ',')));
+        ELSIF jsonb_typeof(rule->name) = 'number' THEN
+            rule := rule || jsonb_build_object(name, jsonb_build_array(rule->name));
+        END IF;
+    END LOOP;
+
+    RETURN rule;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Occurrences of a series starting at `dtstart` that fall in (after_at, through_at].
+-- The start itself is the series' first occurrence and is never returned; it
+-- does count towards COUNT. Without COUNT, expansion starts at the period
+-- before after_at, so the cost follows the window rather than the series' age.
+CREATE OR REPLACE FUNCTION public.recurrence_occurrences(
+    pattern JSONB,
+    dtstart TIMESTAMPTZ,
+    after_at TIMESTAMPTZ,
+    through_at TIMESTAMPTZ
+)
+RETURNS SETOF TIMESTAMPTZ AS $$
+DECLARE
+    rule JSONB := public.recurrence_rule(pattern);
+    freq TEXT := upper(rule->>'freq');
+    step INTEGER := greatest(coalesce((rule->>'interval')::int, 1), 1);
+    max_count INTEGER := (rule->>'count')::int;
+    last_at TIMESTAMPTZ := least(through_at, coalesce((rule->>'until')::timestamptz, through_at));
+    time_of_day INTERVAL := dtstart - date_trunc('day', dtstart);
+    weekdays INTEGER[];
+    month_days INTEGER[];
+    periods INTEGER;
+    first_period INTEGER := 0;
+    candidates TIMESTAMPTZ[];
+BEGIN
+    IF last_at <= dtstart OR last_at <= after_at THEN
+        RETURN;
+    END IF;
+
+    -- 0 = Monday, as date_trunc('week') counts
+    SELECT array_agg(array_position(ARRAY['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'], upper(d)) - 1)
+    INTO weekdays
+    FROM jsonb_array_elements_text(coalesce(rule->'byday', '[]'::jsonb)) AS d;
+
+    SELECT array_agg(d::int) INTO month_days
+    FROM jsonb_array_elements_text(coalesce(rule->'bymonthday', '[]'::jsonb)) AS d;
+
+    -- Enough periods to reach last_at; candidates beyond it are dropped below
+    periods := floor(extract(epoch FROM last_at - dtstart) / 86400 / step / CASE freq
+        WHEN 'DAILY' THEN 1 WHEN 'WEEKLY' THEN 7 WHEN 'MONTHLY' THEN 28 ELSE 365 END)::int + 1;
+
+    -- Periods ending before after_at hold nothing to return. Counted with the
+    -- longest period, less one for daylight saving, so none that might is skipped.
+    -- COUNT numbers occurrences from the start, so those series expand in full.
+    IF max_count IS NULL AND after_at > dtstart THEN
+        first_period := greatest(floor(extract(epoch FROM after_at - dtstart) / 86400 / step / CASE freq
+            WHEN 'DAILY' THEN 1 WHEN 'WEEKLY' THEN 7 WHEN 'MONTHLY' THEN 31 ELSE 366 END)::int - 1, 0);
+    END IF;
+
+    IF freq = 'DAILY' THEN
+        SELECT array_agg(o ORDER BY o) INTO candidates
+        FROM (SELECT dtstart + make_interval(days => k * step) AS o
+              FROM generate_series(greatest(first_period, 1), periods) AS k) c
+        WHERE weekdays IS NULL OR extract(isodow FROM o)::int - 1 = ANY (weekdays);
+    ELSIF freq = 'WEEKLY' THEN
+        SELECT array_agg(DISTINCT o ORDER BY o) INTO candidates
+        FROM generate_series(first_period, periods) AS k
+        CROSS JOIN LATERAL unnest(coalesce(weekdays, ARRAY[extract(isodow FROM dtstart)::int - 1])) AS d
+        CROSS JOIN LATERAL (
+            SELECT date_trunc('week', dtstart) + make_interval(weeks => k * step, days => d) + time_of_day AS o
+        ) c
+        WHERE o > dtstart;
+    ELSIF freq = 'MONTHLY' THEN
+        -- Days a month doesn't have are skipped, as in RRULE (BYMONTHDAY=31 skips April)
+        SELECT array_agg(DISTINCT o ORDER BY o) INTO candidates
+        FROM generate_series(first_period, periods) AS k
+        CROSS JOIN LATERAL (
+            SELECT date_trunc('month', dtstart) + make_interval(months => k * step) AS month_start
+        ) m
+        CROSS JOIN LATERAL (
+            SELECT extract(day FROM month_start + INTERVAL '1 month' - INTERVAL '1 day')::int AS month_length
+        ) l
+        CROSS JOIN LATERAL unnest(coalesce(month_days, ARRAY[extract(day FROM dtstart)::int])) AS d
+        CROSS JOIN LATERAL (
+            SELECT month_start + make_interval(days => CASE WHEN d > 0 THEN d - 1 ELSE month_length + d END)
+                + time_of_day AS o
+        ) c
+        WHERE d <> 0 AND abs(d) <= month_length AND o > dtstart;
+    ELSIF freq = 'YEARLY' THEN
+        -- A series started on 29 February only recurs in leap years
+        SELECT array_agg(o ORDER BY o) INTO candidates
+        FROM (SELECT dtstart + make_interval(years => k * step) AS o
+              FROM generate_series(greatest(first_period, 1), periods) AS k) c
+        WHERE extract(day FROM o) = extract(day FROM dtstart);
+    ELSE
+        RETURN;
+    END IF;
+
+    -- Numbered from 2: the start is occurrence 1
+    RETURN QUERY
+    SELECT c.o
+    FROM unnest(candidates) WITH ORDINALITY AS c(o, n)
+    WHERE c.o > after_at AND c.o <= last_at AND (max_count IS NULL OR c.n + 1 <= max_count)
+    ORDER BY c.o;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Whether a series has no occurrences after through_at (UNTIL passed, or all
+-- COUNT occurrences at or before it)
+CREATE OR REPLACE FUNCTION public.recurrence_ended(
+    pattern JSONB,
+    dtstart TIMESTAMPTZ,
+    through_at TIMESTAMPTZ
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    rule JSONB := public.recurrence_rule(pattern);
+BEGIN
+    IF (rule->>'until')::timestamptz <= through_at THEN
+        RETURN TRUE;
+    END IF;
+    IF rule ? 'count' THEN
+        RETURN (SELECT count(*) + 1 FROM public.recurrence_occurrences(pattern, dtstart, dtstart, through_at))
+            >= (rule->>'count')::int;
+    END IF;
+    RETURN FALSE;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Reject patterns the engine cannot expand when they are written, rather than
+-- skipping them silently in the batch job
+CREATE OR REPLACE FUNCTION public.validate_recurrence_pattern()
+RETURNS TRIGGER AS $$
+DECLARE
+    rule JSONB;
+    freq TEXT;
+BEGIN
+    IF NOT coalesce(NEW.is_recurring, FALSE) THEN
+        RETURN NEW;
+    END IF;
+    IF NEW.recurrence_pattern IS NULL THEN
+        RAISE EXCEPTION 'Recurring tasks need a recurrence_pattern';
+    END IF;
+
+    rule := public.recurrence_rule(NEW.recurrence_pattern);
+    freq := upper(coalesce(rule->>'freq', ''));
+    IF freq NOT IN ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY') THEN
+        RAISE EXCEPTION 'Unsupported recurrence frequency: %', coalesce(rule->>'freq', '(none)');
+    END IF;
+    IF coalesce((rule->>'interval')::int, 1) < 1 OR coalesce((rule->>'count')::int, 1) < 1 THEN
+        RAISE EXCEPTION 'Recurrence INTERVAL and COUNT must be positive';
+    END IF;
+    PERFORM (rule->>'until')::timestamptz;
+
+    IF rule ? 'byday' AND (freq NOT IN ('DAILY', 'WEEKLY') OR EXISTS (
+        SELECT 1 FROM jsonb_array_elements_text(rule->'byday') AS d
+        WHERE upper(d) NOT IN ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+    )) THEN
+        RAISE EXCEPTION 'BYDAY takes MO..SU and applies to DAILY and WEEKLY recurrences';
+    END IF;
+    IF rule ? 'bymonthday' AND (freq <> 'MONTHLY' OR EXISTS (
+        SELECT 1 FROM jsonb_array_elements_text(rule->'bymonthday') AS d
+        WHERE d !~ '^-?\d{1,2}$' OR d::int = 0 OR abs(d::int) > 31
+    )) THEN
+        RAISE EXCEPTION 'BYMONTHDAY takes 1..31 or -31..-1 and applies to MONTHLY recurrences';
+    END IF;
+
+    -- An ended series whose rule changes may have occurrences again
+    IF TG_OP = 'UPDATE' AND NEW.recurrence_pattern IS DISTINCT FROM OLD.recurrence_pattern
+       AND NEW.recurrence_generated_until = 'infinity' THEN
+        NEW.recurrence_generated_until := NULL;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER validate_tasks_recurrence BEFORE INSERT OR UPDATE OF is_recurring, recurrence_pattern ON public.tasks
+    FOR EACH ROW EXECUTE FUNCTION public.validate_recurrence_pattern();
+
+-- Insert the occurrences of every recurring series (optionally of one
+-- organization) up to NOW() + horizon. Instances copy the template's project,
+-- text, priority, estimate and assignees; a start date keeps the template's
+-- lead time before the due date. Templates locked by a concurrent run are
+-- skipped and picked up next time. Only templates that produced occurrences or
+-- ended are written, so a run leaves the other templates' rows (and their
+-- updated_at, which replicas sync on) alone.
+CREATE OR REPLACE FUNCTION public.materialize_recurring_tasks(
+    horizon INTERVAL DEFAULT INTERVAL '90 days',
+    for_organization UUID DEFAULT NULL
+)
+RETURNS TABLE (templates_advanced INTEGER, tasks_created INTEGER) AS $$
+DECLARE
+    through TIMESTAMPTZ := NOW() + horizon;
+BEGIN
+    RETURN QUERY
+    WITH templates AS (
+        SELECT t.*, coalesce(t.due_date, t.start_date, t.created_at) AS dtstart
+        FROM public.tasks t
+        WHERE t.is_recurring
+          AND t.recurrence_pattern IS NOT NULL
+          AND (t.recurrence_generated_until IS NULL OR t.recurrence_generated_until < through)
+          AND (for_organization IS NULL OR t.project_id IN (
+              SELECT p.id FROM public.projects p WHERE p.organization_id = for_organization
+          ))
+        FOR UPDATE OF t SKIP LOCKED
+    ),
+    inserted AS (
+        INSERT INTO public.tasks (
+            project_id, parent_task_id, title, description, status, priority, position,
+            due_date, start_date, estimated_hours, created_by, recurrence_parent_id
+        )
+        SELECT
+            s.project_id, s.parent_task_id, s.title, s.description, 'todo', s.priority, s.position,
+            o.occurs_at, o.occurs_at - (s.due_date - s.start_date), s.estimated_hours, s.created_by, s.id
+        FROM templates s
+        CROSS JOIN LATERAL public.recurrence_occurrences(
+            s.recurrence_pattern,
+            s.dtstart,
+            greatest(s.dtstart, coalesce(s.recurrence_generated_until, s.dtstart)),
+            through
+        ) AS o(occurs_at)
+        ON CONFLICT (recurrence_parent_id, due_date) WHERE recurrence_parent_id IS NOT NULL DO NOTHING
+        RETURNING id, recurrence_parent_id
+    ),
+    assigned AS (
+        INSERT INTO public.task_assignees (task_id, user_id, assigned_by)
+        SELECT i.id, a.user_id, a.assigned_by
+        FROM inserted i
+        JOIN public.task_assignees a ON a.task_id = i.recurrence_parent_id
+    ),
+    progress AS (
+        SELECT
+            s.id,
+            CASE
+                WHEN public.recurrence_ended(s.recurrence_pattern, s.dtstart, through) THEN 'infinity'
+                WHEN s.id IN (SELECT recurrence_parent_id FROM inserted) THEN through
+                ELSE s.recurrence_generated_until
+            END AS generated_until
+        FROM templates s
+    ),
+    advanced AS (
+        UPDATE public.tasks t
+        SET recurrence_generated_until = g.generated_until
+        FROM progress g
+        WHERE t.id = g.id AND t.recurrence_generated_until IS DISTINCT FROM g.generated_until
+        RETURNING t.id
+    )
+    SELECT (SELECT count(*) FROM advanced)::int, (SELECT count(*) FROM inserted)::int;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'materialize-recurring-tasks',
+            '5 2 * * *',
+            'SELECT public.materialize_recurring_tasks()'
+        );
+    END IF;
+END;
+$$;
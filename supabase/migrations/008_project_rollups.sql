@@ -0,0 +1,316 @@
+-- Precomputed rollups per project and per parent task (over its subtasks).
+-- Statement-level triggers apply each write's changes as deltas, so a project
+-- summary is one row read instead of a scan of its tasks, and bulk inserts
+-- (recurring task materialization, imports) update each rollup once.
+-- project_stats and task_stats add the derived figures.
+
+-- Hours logged in time_entries, kept on the task so that rollups move them
+-- along with it when it changes project or parent
+ALTER TABLE public.tasks ADD COLUMN logged_hours DECIMAL(10, 2) NOT NULL DEFAULT 0;
+
+UPDATE public.tasks t
+SET logged_hours = e.hours
+FROM (SELECT task_id, sum(hours) AS hours FROM public.time_entries GROUP BY task_id) e
+WHERE e.task_id = t.id;
+
+CREATE TABLE public.project_rollups (
+    project_id UUID PRIMARY KEY REFERENCES public.projects(id) ON DELETE CASCADE,
+    task_count INTEGER NOT NULL DEFAULT 0,
+    todo_count INTEGER NOT NULL DEFAULT 0,
+    in_progress_count INTEGER NOT NULL DEFAULT 0,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    done_count INTEGER NOT NULL DEFAULT 0,
+    blocked_count INTEGER NOT NULL DEFAULT 0,
+    estimated_hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    logged_hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    -- Progress weighted by estimate (1 for unestimated tasks); done tasks count as 100
+    progress_points DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    progress_weight DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE public.task_rollups (
+    task_id UUID PRIMARY KEY REFERENCES public.tasks(id) ON DELETE CASCADE,
+    project_id UUID,                           -- the parent's project, for row level security
+    task_count INTEGER NOT NULL DEFAULT 0,
+    todo_count INTEGER NOT NULL DEFAULT 0,
+    in_progress_count INTEGER NOT NULL DEFAULT 0,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    done_count INTEGER NOT NULL DEFAULT 0,
+    blocked_count INTEGER NOT NULL DEFAULT 0,
+    estimated_hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    logged_hours DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    progress_points DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    progress_weight DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO public.project_rollups (
+    project_id, task_count, todo_count, in_progress_count, review_count, done_count, blocked_count,
+    estimated_hours, logged_hours, progress_points, progress_weight
+)
+SELECT
+    t.project_id,
+    count(*),
+    count(*) FILTER (WHERE t.status = 'todo'),
+    count(*) FILTER (WHERE t.status = 'in_progress'),
+    count(*) FILTER (WHERE t.status = 'review'),
+    count(*) FILTER (WHERE t.status = 'done'),
+    count(*) FILTER (WHERE t.status = 'blocked'),
+    coalesce(sum(t.estimated_hours), 0),
+    sum(t.logged_hours),
+    sum(coalesce(nullif(t.estimated_hours, 0), 1) * CASE WHEN t.status = 'done' THEN 100 ELSE coalesce(t.progress, 0) END),
+    sum(coalesce(nullif(t.estimated_hours, 0), 1))
+FROM public.tasks t
+WHERE t.project_id IS NOT NULL
+GROUP BY t.project_id;
+
+INSERT INTO public.task_rollups (
+    task_id, project_id, task_count, todo_count, in_progress_count, review_count, done_count, blocked_count,
+    estimated_hours, logged_hours, progress_points, progress_weight
+)
+SELECT
+    t.parent_task_id,
+    p.project_id,
+    count(*),
+    count(*) FILTER (WHERE t.status = 'todo'),
+    count(*) FILTER (WHERE t.status = 'in_progress'),
+    count(*) FILTER (WHERE t.status = 'review'),
+    count(*) FILTER (WHERE t.status = 'done'),
+    count(*) FILTER (WHERE t.status = 'blocked'),
+    coalesce(sum(t.estimated_hours), 0),
+    sum(t.logged_hours),
+    sum(coalesce(nullif(t.estimated_hours, 0), 1) * CASE WHEN t.status = 'done' THEN 100 ELSE coalesce(t.progress, 0) END),
+    sum(coalesce(nullif(t.estimated_hours, 0), 1))
+FROM public.tasks t
+JOIN public.tasks p ON p.id = t.parent_task_id
+GROUP BY t.parent_task_id, p.project_id;
+
+-- Apply a statement's task changes to the rollups: rows it added count +1,
+-- rows it removed -1, and an update is both (only for rows whose rolled-up
+-- columns changed). Rollups of projects and parents deleted in the same
+-- statement are skipped; their rows are removed by the foreign keys.
+CREATE OR REPLACE FUNCTION public.apply_task_rollups()
+RETURNS TRIGGER AS $$
+DECLARE
+    added public.tasks[] := '{}';
+    removed public.tasks[] := '{}';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT coalesce(array_agg(n::public.tasks), '{}') INTO added FROM new_rows n;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT coalesce(array_agg(o::public.tasks), '{}') INTO removed FROM old_rows o;
+    ELSE
+        SELECT coalesce(array_agg(n::public.tasks), '{}'), coalesce(array_agg(o::public.tasks), '{}')
+        INTO added, removed
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE (n.project_id, n.parent_task_id, n.status, n.progress, n.estimated_hours, n.logged_hours)
+            IS DISTINCT FROM (o.project_id, o.parent_task_id, o.status, o.progress, o.estimated_hours, o.logged_hours);
+
+        -- A parent that moved takes its subtask rollup's visibility with it
+        UPDATE public.task_rollups r
+        SET project_id = n.project_id
+        FROM new_rows n
+        WHERE r.task_id = n.id AND r.project_id IS DISTINCT FROM n.project_id;
+    END IF;
+
+    IF cardinality(added) = 0 AND cardinality(removed) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    WITH changes AS (
+        SELECT 1 AS sign, t.* FROM unnest(added) AS t
+        UNION ALL
+        SELECT -1 AS sign, t.* FROM unnest(removed) AS t
+    ),
+    -- One delta per project and one per parent task
+    deltas AS (
+        SELECT
+            GROUPING(c.parent_task_id) = 1 AS for_project,
+            c.project_id,
+            c.parent_task_id,
+            sum(c.sign) AS task_count,
+            coalesce(sum(c.sign) FILTER (WHERE c.status = 'todo'), 0) AS todo_count,
+            coalesce(sum(c.sign) FILTER (WHERE c.status = 'in_progress'), 0) AS in_progress_count,
+            coalesce(sum(c.sign) FILTER (WHERE c.status = 'review'), 0) AS review_count,
+            coalesce(sum(c.sign) FILTER (WHERE c.status = 'done'), 0) AS done_count,
+            coalesce(sum(c.sign) FILTER (WHERE c.status = 'blocked'), 0) AS blocked_count,
+            sum(c.sign * coalesce(c.estimated_hours, 0)) AS estimated_hours,
+            sum(c.sign * c.logged_hours) AS logged_hours,
+            sum(c.sign * coalesce(nullif(c.estimated_hours, 0), 1)
+                * CASE WHEN c.status = 'done' THEN 100 ELSE coalesce(c.progress, 0) END) AS progress_points,
+            sum(c.sign * coalesce(nullif(c.estimated_hours, 0), 1)) AS progress_weight
+        FROM changes c
+        GROUP BY GROUPING SETS ((c.project_id), (c.parent_task_id))
+    ),
+    project_changes AS (
+        INSERT INTO public.project_rollups AS r (
+            project_id, task_count, todo_count, in_progress_count, review_count, done_count, blocked_count,
+            estimated_hours, logged_hours, progress_points, progress_weight
+        )
+        SELECT
+            d.project_id, d.task_count, d.todo_count, d.in_progress_count, d.review_count, d.done_count,
+            d.blocked_count, d.estimated_hours, d.logged_hours, d.progress_points, d.progress_weight
+        FROM deltas d
+        WHERE d.for_project
+          AND EXISTS (SELECT 1 FROM public.projects p WHERE p.id = d.project_id)
+        ORDER BY d.project_id  -- a fixed lock order, so concurrent bulk writes don't deadlock
+        ON CONFLICT (project_id) DO UPDATE SET
+            task_count = r.task_count + EXCLUDED.task_count,
+            todo_count = r.todo_count + EXCLUDED.todo_count,
+            in_progress_count = r.in_progress_count + EXCLUDED.in_progress_count,
+            review_count = r.review_count + EXCLUDED.review_count,
+            done_count = r.done_count + EXCLUDED.done_count,
+            blocked_count = r.blocked_count + EXCLUDED.blocked_count,
+            estimated_hours = r.estimated_hours + EXCLUDED.estimated_hours,
+            logged_hours = r.logged_hours + EXCLUDED.logged_hours,
+            progress_points = r.progress_points + EXCLUDED.progress_points,
+            progress_weight = r.progress_weight + EXCLUDED.progress_weight,
+            updated_at = NOW()
+    )
+    INSERT INTO public.task_rollups AS r (
+        task_id, project_id, task_count, todo_count, in_progress_count, review_count, done_count, blocked_count,
+        estimated_hours, logged_hours, progress_points, progress_weight
+    )
+    SELECT
+        d.parent_task_id, p.project_id, d.task_count, d.todo_count, d.in_progress_count, d.review_count,
+        d.done_count, d.blocked_count, d.estimated_hours, d.logged_hours, d.progress_points, d.progress_weight
+    FROM deltas d
+    JOIN public.tasks p ON p.id = d.parent_task_id
+    WHERE NOT d.for_project
+    ORDER BY d.parent_task_id
+    ON CONFLICT (task_id) DO UPDATE SET
+        project_id = EXCLUDED.project_id,
+        task_count = r.task_count + EXCLUDED.task_count,
+        todo_count = r.todo_count + EXCLUDED.todo_count,
+        in_progress_count = r.in_progress_count + EXCLUDED.in_progress_count,
+        review_count = r.review_count + EXCLUDED.review_count,
+        done_count = r.done_count + EXCLUDED.done_count,
+        blocked_count = r.blocked_count + EXCLUDED.blocked_count,
+        estimated_hours = r.estimated_hours + EXCLUDED.estimated_hours,
+        logged_hours = r.logged_hours + EXCLUDED.logged_hours,
+        progress_points = r.progress_points + EXCLUDED.progress_points,
+        progress_weight = r.progress_weight + EXCLUDED.progress_weight,
+        updated_at = NOW();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Transition tables allow one event per trigger
+CREATE TRIGGER rollup_tasks_insert AFTER INSERT ON public.tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_task_rollups();
+
+CREATE TRIGGER rollup_tasks_update AFTER UPDATE ON public.tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_task_rollups();
+
+CREATE TRIGGER rollup_tasks_delete AFTER DELETE ON public.tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_task_rollups();
+
+-- Keep tasks.logged_hours equal to the sum of their time entries. The task
+-- update in turn moves the hours into the rollups.
+CREATE OR REPLACE FUNCTION public.apply_time_entry_hours()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE public.tasks t
+        SET logged_hours = t.logged_hours + d.hours
+        FROM (SELECT task_id, sum(hours) AS hours FROM new_rows GROUP BY task_id) d
+        WHERE t.id = d.task_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE public.tasks t
+        SET logged_hours = t.logged_hours - d.hours
+        FROM (SELECT task_id, sum(hours) AS hours FROM old_rows GROUP BY task_id) d
+        WHERE t.id = d.task_id;
+    ELSE
+        UPDATE public.tasks t
+        SET logged_hours = t.logged_hours + d.hours
+        FROM (
+            SELECT task_id, sum(hours) AS hours
+            FROM (
+                SELECT task_id, hours FROM new_rows
+                UNION ALL
+                SELECT task_id, -hours FROM old_rows
+            ) changes
+            GROUP BY task_id
+            HAVING sum(hours) <> 0
+        ) d
+        WHERE t.id = d.task_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER time_entry_hours_insert AFTER INSERT ON public.time_entries
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_time_entry_hours();
+
+CREATE TRIGGER time_entry_hours_update AFTER UPDATE ON public.time_entries
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_time_entry_hours();
+
+CREATE TRIGGER time_entry_hours_delete AFTER DELETE ON public.time_entries
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_time_entry_hours();
+
+-- Overdue counts depend on the clock, so the views count them when read.
+-- These indexes hold open tasks only, so that costs one probe plus one entry
+-- per overdue task.
+CREATE INDEX idx_tasks_open_project_due ON public.tasks(project_id, due_date) WHERE status <> 'done';
+CREATE INDEX idx_tasks_open_parent_due ON public.tasks(parent_task_id, due_date) WHERE status <> 'done';
+
+CREATE VIEW public.project_stats WITH (security_invoker = true) AS
+SELECT
+    r.project_id,
+    r.task_count,
+    r.todo_count,
+    r.in_progress_count,
+    r.review_count,
+    r.done_count,
+    r.blocked_count,
+    r.estimated_hours,
+    r.logged_hours,
+    round(r.progress_points / nullif(r.progress_weight, 0), 1) AS weighted_progress,
+    (
+        SELECT count(*)::int FROM public.tasks t
+        WHERE t.project_id = r.project_id AND t.status <> 'done' AND t.due_date < NOW()
+    ) AS overdue_count,
+    r.updated_at
+FROM public.project_rollups r;
+
+CREATE VIEW public.task_stats WITH (security_invoker = true) AS
+SELECT
+    r.task_id,
+    r.project_id,
+    r.task_count,
+    r.todo_count,
+    r.in_progress_count,
+    r.review_count,
+    r.done_count,
+    r.blocked_count,
+    r.estimated_hours,
+    r.logged_hours,
+    round(r.progress_points / nullif(r.progress_weight, 0), 1) AS weighted_progress,
+    (
+        SELECT count(*)::int FROM public.tasks t
+        WHERE t.parent_task_id = r.task_id AND t.status <> 'done' AND t.due_date < NOW()
+    ) AS overdue_count,
+    r.updated_at
+FROM public.task_rollups r;
+
+-- Written only by the triggers above; readable like the tasks they summarize
+ALTER TABLE public.project_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.task_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Project members can view project rollups"
+    ON public.project_rollups FOR SELECT
+    USING (is_project_member(auth.uid(), project_id));
+
+CREATE POLICY "Project members can view subtask rollups"
+    ON public.task_rollups FOR SELECT
+    USING (is_project_member(auth.uid(), project_id));
@@ -0,0 +1,157 @@
+-- Full-text search over tasks: title (weight A), description (B) and comments (C).
+-- Documents live beside the tasks rather than in a generated column on them,
+-- so listings, sync and exports that select tasks.* don't carry a tsvector per
+-- row, and comment text can be part of the document. Statement-level triggers
+-- keep them current; search_tasks() ranks matches from the GIN index.
+CREATE TABLE public.task_search (
+    task_id UUID PRIMARY KEY REFERENCES public.tasks(id) ON DELETE CASCADE,
+    project_id UUID,
+    document TSVECTOR NOT NULL
+);
+
+CREATE INDEX idx_task_search_document ON public.task_search USING GIN (document);
+CREATE INDEX idx_task_search_project ON public.task_search(project_id);
+
+CREATE OR REPLACE FUNCTION public.task_search_document(task_title TEXT, task_description TEXT, task UUID)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english', coalesce(task_title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(task_description, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(c.content, ' ') FROM public.comments c WHERE c.task_id = task), ''
+        )), 'C');
+$$ LANGUAGE sql STABLE;
+
+INSERT INTO public.task_search (task_id, project_id, document)
+SELECT t.id, t.project_id, public.task_search_document(t.title, t.description, t.id)
+FROM public.tasks t;
+
+CREATE OR REPLACE FUNCTION public.index_task_search()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO public.task_search (task_id, project_id, document)
+        SELECT n.id, n.project_id, public.task_search_document(n.title, n.description, n.id)
+        FROM new_rows n;
+    ELSE
+        UPDATE public.task_search s
+        SET project_id = n.project_id,
+            document = public.task_search_document(n.title, n.description, n.id)
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE s.task_id = n.id
+          AND (n.title, n.description, n.project_id) IS DISTINCT FROM (o.title, o.description, o.project_id);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER index_tasks_search_insert AFTER INSERT ON public.tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.index_task_search();
+
+CREATE TRIGGER index_tasks_search_update AFTER UPDATE ON public.tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.index_task_search();
+
+-- Comment changes rebuild the documents of the tasks they belong to
+CREATE OR REPLACE FUNCTION public.index_comment_search()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_tasks UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT n.task_id) INTO changed_tasks FROM new_rows n;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT o.task_id) INTO changed_tasks FROM old_rows o;
+    ELSE
+        SELECT array_agg(DISTINCT task_id) INTO changed_tasks
+        FROM (
+            SELECT n.task_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.content, n.task_id) IS DISTINCT FROM (o.content, o.task_id)
+            UNION
+            SELECT o.task_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.task_id IS DISTINCT FROM o.task_id
+        ) moved;
+    END IF;
+
+    IF changed_tasks IS NOT NULL THEN
+        UPDATE public.task_search s
+        SET document = public.task_search_document(t.title, t.description, t.id)
+        FROM public.tasks t
+        WHERE t.id = s.task_id AND s.task_id = ANY (changed_tasks);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER index_comments_search_insert AFTER INSERT ON public.comments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.index_comment_search();
+
+CREATE TRIGGER index_comments_search_update AFTER UPDATE ON public.comments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.index_comment_search();
+
+CREATE TRIGGER index_comments_search_delete AFTER DELETE ON public.comments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.index_comment_search();
+
+-- Tasks matching a web-search style query ("billing migration", "invoice -draft",
+-- "\"release notes\" or changelog"), best first. Only the returned page gets a
+-- highlighted snippet, since ts_headline re-parses the text.
+CREATE OR REPLACE FUNCTION public.search_tasks(
+    search_query TEXT,
+    for_organization UUID DEFAULT NULL,
+    for_project UUID DEFAULT NULL,
+    for_status TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 20,
+    result_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    project_id UUID,
+    title TEXT,
+    status TEXT,
+    priority TEXT,
+    due_date TIMESTAMPTZ,
+    rank REAL,
+    headline TEXT
+) AS $$
+    WITH query AS (
+        SELECT websearch_to_tsquery('english', search_query) AS q
+    ),
+    ranked AS (
+        SELECT t.id, t.project_id, t.title, t.description, t.status, t.priority, t.due_date,
+               ts_rank_cd(s.document, query.q, 1) AS rank
+        FROM query
+        JOIN public.task_search s ON s.document @@ query.q
+        JOIN public.tasks t ON t.id = s.task_id
+        WHERE (for_project IS NULL OR s.project_id = for_project)
+          AND (for_organization IS NULL OR s.project_id IN (
+              SELECT p.id FROM public.projects p WHERE p.organization_id = for_organization
+          ))
+          AND (for_status IS NULL OR t.status::text = for_status)
+        ORDER BY rank DESC, t.id
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT
+        r.id, r.project_id, r.title, r.status::text, r.priority::text, r.due_date, r.rank,
+        ts_headline(
+            'english',
+            concat_ws(E'\n', r.title, r.description,
+                      (SELECT string_agg(c.content, E'\n') FROM public.comments c WHERE c.task_id = r.id)),
+            query.q,
+            'StartSel=**, StopSel=**, MaxFragments=2, MinWords=5, MaxWords=20, FragmentDelimiter=" … "'
+        )
+    FROM ranked r, query
+    ORDER BY r.rank DESC, r.id;
+$$ LANGUAGE sql STABLE;
+
+-- Written only by the triggers above; readable like the tasks they index
+ALTER TABLE public.task_search ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Project members can search tasks"
+    ON public.task_search FOR SELECT
+    USING (is_project_member(auth.uid(), project_id));
@@ -0,0 +1,152 @@
+-- activity_logs range-partitioned by month of created_at. Audit queries
+-- (an organization's or an entity's recent history) only touch the months they
+-- cover, and retention drops whole partitions instead of deleting rows.
+-- Partitions are named activity_logs_pYYYYMM; rows outside every partition
+-- land in activity_logs_default and are moved out when their month is created.
+-- Applied in order with 001-009 to a fresh PostgreSQL 16 database.
+ALTER TABLE public.activity_logs RENAME TO activity_logs_unpartitioned;
+ALTER INDEX public.activity_logs_pkey RENAME TO activity_logs_unpartitioned_pkey;
+ALTER INDEX public.idx_activity_logs_entity RENAME TO idx_activity_logs_unpartitioned_entity;
+ALTER INDEX public.idx_activity_logs_org RENAME TO idx_activity_logs_unpartitioned_org;
+
+CREATE TABLE public.activity_logs (
+    id UUID DEFAULT uuid_generate_v4(),
+    organization_id UUID REFERENCES public.organizations(id) ON DELETE CASCADE,
+    entity_type TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    action TEXT NOT NULL,
+    changes JSONB DEFAULT '{}',
+    user_id UUID REFERENCES public.profiles(id),
+    ip_address INET,
+    user_agent TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE public.activity_logs_default PARTITION OF public.activity_logs DEFAULT;
+
+CREATE INDEX idx_activity_logs_entity ON public.activity_logs(entity_type, entity_id, created_at DESC);
+CREATE INDEX idx_activity_logs_org ON public.activity_logs(organization_id, created_at DESC);
+
+-- Creates the monthly partitions from from_month through months_ahead months
+-- from now; existing ones are skipped. Returns the number created.
+CREATE OR REPLACE FUNCTION public.create_activity_log_partitions(
+    from_month TIMESTAMPTZ DEFAULT NOW(),
+    months_ahead INTEGER DEFAULT 3
+)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', from_month);
+    last_month TIMESTAMPTZ := date_trunc('month', NOW()) + make_interval(months => months_ahead);
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'activity_logs_p' || to_char(month_start, 'YYYYMM');
+
+        IF to_regclass('public.' || partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE public.%I (LIKE public.activity_logs INCLUDING DEFAULTS)', partition_name);
+            -- Partitions are reachable through the API like any public table; only the parent's policies grant access
+            EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', partition_name);
+
+            -- Attaching fails while the default partition holds rows for the month, so move them first
+            EXECUTE format(
+                'WITH moved AS (
+                    DELETE FROM public.activity_logs_default
+                    WHERE created_at >= $1 AND created_at < $2
+                    RETURNING *
+                )
+                INSERT INTO public.%I SELECT * FROM moved',
+                partition_name
+            ) USING month_start, month_start + INTERVAL '1 month';
+
+            EXECUTE format(
+                'ALTER TABLE public.activity_logs ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_start + INTERVAL '1 month'
+            );
+            created := created + 1;
+        END IF;
+
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drops the monthly partitions that ended before the retention window, and
+-- expired rows in the default partition. Returns the number of partitions dropped.
+CREATE OR REPLACE FUNCTION public.drop_activity_log_partitions(retention INTERVAL DEFAULT '13 months')
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff TIMESTAMPTZ := date_trunc('month', NOW() - retention);
+    partition_name TEXT;
+    dropped INTEGER := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.activity_logs'::regclass
+          AND c.relname ~ '^activity_logs_p[0-9]{6}$'
+          AND to_timestamp(right(c.relname, 6), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('DROP TABLE public.%I', partition_name);
+        dropped := dropped + 1;
+    END LOOP;
+
+    DELETE FROM public.activity_logs_default WHERE created_at < cutoff;
+
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.maintain_activity_logs(
+    retention INTERVAL DEFAULT '13 months',
+    months_ahead INTEGER DEFAULT 3
+)
+RETURNS TABLE (partitions_created INTEGER, partitions_dropped INTEGER) AS $$
+    SELECT public.create_activity_log_partitions(NOW(), months_ahead),
+           public.drop_activity_log_partitions(retention);
+$$ LANGUAGE sql;
+
+-- Move existing history into the partitioned table
+SELECT public.create_activity_log_partitions(
+    coalesce((SELECT min(created_at) FROM public.activity_logs_unpartitioned), NOW())
+);
+
+INSERT INTO public.activity_logs (
+    id, organization_id, entity_type, entity_id, action, changes,
+    user_id, ip_address, user_agent, created_at
+)
+SELECT id, organization_id, entity_type, entity_id, action, changes,
+       user_id, ip_address, user_agent, coalesce(created_at, NOW())
+FROM public.activity_logs_unpartitioned;
+
+DROP TABLE public.activity_logs_unpartitioned;
+
+ALTER TABLE public.activity_logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.activity_logs_default ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Organization members can view activity logs"
+    ON public.activity_logs FOR SELECT
+    USING (organization_id IN (SELECT get_user_organizations(auth.uid())));
+
+CREATE POLICY "System can create activity logs"
+    ON public.activity_logs FOR INSERT
+    WITH CHECK (true);
+
+-- Keep months_ahead partitions ready and enforce retention daily
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'maintain-activity-logs',
+            '15 2 * * *',
+            'SELECT * FROM public.maintain_activity_logs()'
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,222 @@
+-- Notification fan-out with per-user digests. Events are queued in
+-- notification_events instead of becoming notifications one by one; the flush
+-- turns each user's queued events of one type into a single notification (a
+-- digest when there are several) and inserts them all in one statement.
+-- Unread counts are kept in notification_counters by statement-level triggers.
+-- pg_cron flushes every user's queue each minute; without it, and between
+-- runs, readers flush their own ready events first (flush_my_notification_events).
+CREATE TABLE public.notification_events (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    message TEXT,
+    data JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_notification_events_user ON public.notification_events(user_id, created_at);
+
+-- Digests keep the most recent items, newest first
+CREATE OR REPLACE FUNCTION public.flush_notification_events(
+    quiet INTERVAL DEFAULT '30 seconds',
+    max_wait INTERVAL DEFAULT '5 minutes',
+    digest_items INTEGER DEFAULT 20,
+    for_user UUID DEFAULT NULL
+)
+RETURNS TABLE (events_flushed INTEGER, notifications_created INTEGER) AS $$
+    -- A user's burst is flushed once it has been quiet for `quiet`, or once its
+    -- oldest event has waited `max_wait`, so a steady trickle still gets through
+    WITH ready AS (
+        SELECT user_id
+        FROM public.notification_events
+        WHERE for_user IS NULL OR user_id = for_user
+        GROUP BY user_id
+        HAVING max(created_at) <= NOW() - quiet OR min(created_at) <= NOW() - max_wait
+    ),
+    -- Concurrent flushes skip each other's rows instead of waiting on them
+    claimed AS (
+        SELECT e.id
+        FROM public.notification_events e
+        WHERE e.user_id IN (SELECT user_id FROM ready)
+        FOR UPDATE SKIP LOCKED
+    ),
+    taken AS (
+        DELETE FROM public.notification_events e
+        USING claimed
+        WHERE e.id = claimed.id
+        RETURNING e.*
+    ),
+    grouped AS (
+        SELECT
+            user_id,
+            type,
+            count(*) AS event_count,
+            (array_agg(title ORDER BY created_at DESC, id DESC))[1] AS title,
+            (array_agg(message ORDER BY created_at DESC, id DESC))[1] AS message,
+            (array_agg(data ORDER BY created_at DESC, id DESC))[1] AS data,
+            (array_agg(coalesce(message, title) ORDER BY created_at DESC, id DESC))[1:5] AS lines,
+            (array_agg(
+                jsonb_build_object('title', title, 'message', message, 'data', data, 'created_at', created_at)
+                ORDER BY created_at DESC, id DESC
+            ))[1:digest_items] AS items
+        FROM taken
+        GROUP BY user_id, type
+    ),
+    inserted AS (
+        INSERT INTO public.notifications (user_id, type, title, message, data)
+        SELECT
+            user_id,
+            type,
+            CASE WHEN event_count = 1 THEN title
+                 ELSE format('%s (+%s more)', title, event_count - 1) END,
+            CASE WHEN event_count = 1 THEN message
+                 ELSE array_to_string(lines, E'\n')
+                      || CASE WHEN event_count > 5 THEN format(E'\n… and %s more', event_count - 5) ELSE '' END END,
+            CASE WHEN event_count = 1 THEN data
+                 ELSE jsonb_build_object('digest', true, 'count', event_count, 'items', to_jsonb(items)) END
+        FROM grouped
+        ORDER BY user_id, type
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM taken)::int, (SELECT count(*) FROM inserted)::int;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- Flushing is a system job, not something clients call over the API
+REVOKE EXECUTE ON FUNCTION public.flush_notification_events(INTERVAL, INTERVAL, INTEGER, UUID) FROM PUBLIC, anon, authenticated;
+
+-- Flushes the caller's ready events, so reading notifications never depends on the cron job
+CREATE OR REPLACE FUNCTION public.flush_my_notification_events()
+RETURNS INTEGER AS $$
+    SELECT f.notifications_created
+    FROM public.flush_notification_events(for_user => auth.uid()) f
+    WHERE auth.uid() IS NOT NULL;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION public.flush_my_notification_events() FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION public.flush_my_notification_events() TO authenticated;
+
+-- Assignments fan out to their assignees through the queue, so a burst (an
+-- email turned into tasks, bulk_assign, recurring instances) becomes one digest
+CREATE OR REPLACE FUNCTION public.queue_assignment_notifications()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.notification_events (user_id, type, title, message, data, created_at)
+    SELECT
+        n.user_id,
+        'task_assigned',
+        'New task assigned',
+        format('You have been assigned to "%s"', t.title),
+        jsonb_build_object('task_id', t.id, 'project_id', t.project_id),
+        coalesce(n.assigned_at, NOW())
+    FROM new_rows n
+    JOIN public.tasks t ON t.id = n.task_id
+    -- Nobody needs telling that they assigned themselves
+    WHERE n.user_id IS NOT NULL AND n.user_id IS DISTINCT FROM n.assigned_by;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER queue_task_assignee_notifications AFTER INSERT ON public.task_assignees
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.queue_assignment_notifications();
+
+-- Unread notifications per user (notifications with read = false, as before)
+CREATE TABLE public.notification_counters (
+    user_id UUID PRIMARY KEY REFERENCES public.profiles(id) ON DELETE CASCADE,
+    unread_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO public.notification_counters (user_id, unread_count)
+SELECT user_id, count(*) FILTER (WHERE read IS FALSE)
+FROM public.notifications
+WHERE user_id IS NOT NULL
+GROUP BY user_id;
+
+CREATE OR REPLACE FUNCTION public.apply_notification_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE public.notification_counters c
+        SET unread_count = c.unread_count - d.removed, updated_at = NOW()
+        FROM (
+            SELECT user_id, count(*) AS removed FROM old_rows WHERE read IS FALSE GROUP BY user_id
+        ) d
+        WHERE c.user_id = d.user_id;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        -- Ordered so concurrent statements lock counters in the same order
+        INSERT INTO public.notification_counters AS c (user_id, unread_count)
+        SELECT user_id, count(*)
+        FROM new_rows
+        WHERE read IS FALSE AND user_id IS NOT NULL
+        GROUP BY user_id
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET unread_count = c.unread_count + EXCLUDED.unread_count, updated_at = NOW();
+    ELSE
+        INSERT INTO public.notification_counters AS c (user_id, unread_count)
+        SELECT user_id, sum(delta)
+        FROM (
+            SELECT user_id, 1 AS delta FROM new_rows WHERE read IS FALSE
+            UNION ALL
+            SELECT user_id, -1 AS delta FROM old_rows WHERE read IS FALSE
+        ) d
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+        HAVING sum(delta) <> 0
+        ORDER BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET unread_count = c.unread_count + EXCLUDED.unread_count, updated_at = NOW();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER count_notifications_insert AFTER INSERT ON public.notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_notification_counts();
+
+CREATE TRIGGER count_notifications_update AFTER UPDATE ON public.notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_notification_counts();
+
+CREATE TRIGGER count_notifications_delete AFTER DELETE ON public.notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.apply_notification_counts();
+
+-- RLS
+ALTER TABLE public.notification_events ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.notification_counters ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "System can queue notifications for users"
+    ON public.notification_events FOR INSERT
+    WITH CHECK (true);
+
+CREATE POLICY "Users can view their own queued notifications"
+    ON public.notification_events FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own notification counter"
+    ON public.notification_counters FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- The flush interval bounds how long a notification waits beyond its quiet period
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'flush-notification-events',
+            '* * * * *',
+            'SELECT * FROM public.flush_notification_events()'
+        );
+    ELSE
+        RAISE NOTICE 'pg_cron is not installed: queued notifications are flushed only when their users read notifications';
+    END IF;
+END;
+$$;
@@ -0,0 +1,222 @@
+-- Batched agent writes. ai-agent-api's `batch` action sends an ordered list of
+-- write actions ({action, params, id?}) to run_agent_batch, which runs them in
+-- one transaction: either every step is applied or none is. A param value
+-- {"$ref": "<step>.<path>"} is replaced by part of an earlier step's result,
+-- where <step> is that step's index or id, e.g. {"$ref": "0.task.id"}.
+
+-- Replaces the references in a step's params with values from earlier results
+CREATE OR REPLACE FUNCTION public.resolve_batch_refs(value JSONB, results JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    resolved JSONB;
+BEGIN
+    CASE jsonb_typeof(value)
+    WHEN 'object' THEN
+        IF value ? '$ref' THEN
+            -- Missing paths are errors; a path to a JSON null resolves to null
+            resolved := results #> string_to_array(value->>'$ref', '.');
+            IF resolved IS NULL THEN
+                RAISE EXCEPTION 'Reference % does not match an earlier step''s result', value->>'$ref';
+            END IF;
+            RETURN resolved;
+        END IF;
+
+        SELECT coalesce(jsonb_object_agg(key, public.resolve_batch_refs(item, results)), '{}')
+        INTO resolved
+        FROM jsonb_each(value) AS e(key, item);
+        RETURN resolved;
+    WHEN 'array' THEN
+        SELECT coalesce(jsonb_agg(public.resolve_batch_refs(item, results) ORDER BY ord), '[]')
+        INTO resolved
+        FROM jsonb_array_elements(value) WITH ORDINALITY AS e(item, ord);
+        RETURN resolved;
+    ELSE
+        RETURN value;
+    END CASE;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Returns the steps' results in order, each shaped like the response of the
+-- action on its own ({task}, {project}, {comment}, {success, ...}).
+-- Agent writes have no profile, so created_by and comment authors stay NULL.
+CREATE OR REPLACE FUNCTION public.run_agent_batch(operations JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    operation JSONB;
+    step INTEGER := 0;
+    step_action TEXT;
+    params JSONB;
+    -- Results by step index and by step id, for references
+    results JSONB := '{}';
+    ordered JSONB := '[]';
+    result JSONB;
+    unknown_columns TEXT;
+    assigned INTEGER;
+    task public.tasks;
+    project public.projects;
+    comment public.comments;
+BEGIN
+    IF jsonb_typeof(operations) IS DISTINCT FROM 'array' THEN
+        RAISE EXCEPTION 'operations must be a list';
+    END IF;
+
+    BEGIN
+        FOR operation IN
+            SELECT item FROM jsonb_array_elements(operations) WITH ORDINALITY AS e(item, ord) ORDER BY ord
+        LOOP
+            step_action := operation->>'action';
+            params := public.resolve_batch_refs(coalesce(operation->'params', '{}'), results);
+
+            CASE step_action
+            WHEN 'create_task' THEN
+                IF nullif(params->>'title', '') IS NULL OR nullif(params->>'project_id', '') IS NULL THEN
+                    RAISE EXCEPTION 'Title and project_id are required';
+                END IF;
+                IF nullif(params->>'recurrence', '') IS NOT NULL AND nullif(params->>'due_date', '') IS NULL THEN
+                    RAISE EXCEPTION 'Recurring tasks need a due_date (their first occurrence)';
+                END IF;
+
+                INSERT INTO public.tasks (
+                    title, description, project_id, priority, due_date, status,
+                    parent_task_id, is_recurring, recurrence_pattern
+                )
+                VALUES (
+                    params->>'title',
+                    params->>'description',
+                    (params->>'project_id')::UUID,
+                    coalesce(nullif(params->>'priority', ''), 'medium')::task_priority,
+                    (nullif(params->>'due_date', ''))::TIMESTAMPTZ,
+                    coalesce(nullif(params->>'status', ''), 'todo')::task_status,
+                    (nullif(params->>'parent_task_id', ''))::UUID,
+                    nullif(params->>'recurrence', '') IS NOT NULL,
+                    CASE jsonb_typeof(params->'recurrence')
+                        WHEN 'string' THEN jsonb_build_object('rrule', params->>'recurrence')
+                        WHEN 'object' THEN params->'recurrence'
+                    END
+                )
+                RETURNING * INTO task;
+
+                result := jsonb_build_object('task', to_jsonb(task));
+
+            WHEN 'update_task' THEN
+                IF nullif(params->>'task_id', '') IS NULL THEN
+                    RAISE EXCEPTION 'task_id is required';
+                END IF;
+                IF jsonb_typeof(coalesce(params->'updates', '{}')) <> 'object' THEN
+                    RAISE EXCEPTION 'updates must be an object';
+                END IF;
+
+                SELECT string_agg(key, ', ')
+                INTO unknown_columns
+                FROM jsonb_object_keys(coalesce(params->'updates', '{}')) AS key
+                WHERE key <> ALL (ARRAY[
+                    'title', 'description', 'status', 'priority', 'position', 'due_date', 'start_date',
+                    'estimated_hours', 'actual_hours', 'progress', 'parent_task_id', 'is_recurring',
+                    'recurrence_pattern', 'completed_at', 'completed_by'
+                ]);
+                IF unknown_columns IS NOT NULL THEN
+                    RAISE EXCEPTION 'Cannot update task columns: %', unknown_columns;
+                END IF;
+
+                -- Columns missing from updates keep their current values
+                UPDATE public.tasks t
+                SET (
+                    title, description, status, priority, position, due_date, start_date,
+                    estimated_hours, actual_hours, progress, parent_task_id, is_recurring,
+                    recurrence_pattern, completed_at, completed_by
+                ) = (
+                    SELECT r.title, r.description, r.status, r.priority, r.position, r.due_date, r.start_date,
+                           r.estimated_hours, r.actual_hours, r.progress, r.parent_task_id, r.is_recurring,
+                           r.recurrence_pattern, r.completed_at, r.completed_by
+                    FROM jsonb_populate_record(t, coalesce(params->'updates', '{}')) r
+                )
+                WHERE t.id = (params->>'task_id')::UUID
+                RETURNING t.* INTO task;
+
+                IF NOT FOUND THEN
+                    RAISE EXCEPTION 'Task % not found', params->>'task_id';
+                END IF;
+
+                result := jsonb_build_object('task', to_jsonb(task));
+
+            WHEN 'assign_task' THEN
+                IF nullif(params->>'task_id', '') IS NULL OR nullif(params->>'user_id', '') IS NULL THEN
+                    RAISE EXCEPTION 'task_id and user_id are required';
+                END IF;
+
+                INSERT INTO public.task_assignees (task_id, user_id)
+                VALUES ((params->>'task_id')::UUID, (params->>'user_id')::UUID)
+                ON CONFLICT (task_id, user_id) DO NOTHING;
+
+                result := jsonb_build_object('success', true);
+
+            WHEN 'bulk_assign' THEN
+                IF jsonb_typeof(params->'assignments') IS DISTINCT FROM 'array'
+                   OR params->'assignments' = '[]' THEN
+                    RAISE EXCEPTION 'assignments must be a non-empty list';
+                END IF;
+                IF EXISTS (
+                    SELECT 1 FROM jsonb_array_elements(params->'assignments') AS a(item)
+                    WHERE nullif(item->>'task_id', '') IS NULL OR nullif(item->>'user_id', '') IS NULL
+                ) THEN
+                    RAISE EXCEPTION 'Each assignment requires task_id and user_id';
+                END IF;
+
+                INSERT INTO public.task_assignees (task_id, user_id)
+                SELECT (item->>'task_id')::UUID, (item->>'user_id')::UUID
+                FROM jsonb_array_elements(params->'assignments') AS a(item)
+                ON CONFLICT (task_id, user_id) DO NOTHING;
+                GET DIAGNOSTICS assigned = ROW_COUNT;
+
+                result := jsonb_build_object('success', true, 'assigned', assigned);
+
+            WHEN 'create_project' THEN
+                IF nullif(params->>'name', '') IS NULL OR nullif(params->>'organization_id', '') IS NULL THEN
+                    RAISE EXCEPTION 'Name and organization_id are required';
+                END IF;
+
+                INSERT INTO public.projects (name, description, organization_id, status)
+                VALUES (
+                    params->>'name',
+                    params->>'description',
+                    (params->>'organization_id')::UUID,
+                    coalesce(nullif(params->>'status', ''), 'planning')::project_status
+                )
+                RETURNING * INTO project;
+
+                result := jsonb_build_object('project', to_jsonb(project));
+
+            WHEN 'add_comment' THEN
+                IF nullif(params->>'task_id', '') IS NULL OR nullif(params->>'content', '') IS NULL THEN
+                    RAISE EXCEPTION 'task_id and content are required';
+                END IF;
+
+                INSERT INTO public.comments (task_id, content)
+                VALUES ((params->>'task_id')::UUID, '[AI Agent]: ' || (params->>'content'))
+                RETURNING * INTO comment;
+
+                result := jsonb_build_object('comment', to_jsonb(comment));
+
+            ELSE
+                RAISE EXCEPTION 'Action % cannot be batched', coalesce(step_action, '(none)');
+            END CASE;
+
+            results := results || jsonb_build_object(step::TEXT, result);
+            IF operation ? 'id' THEN
+                results := results || jsonb_build_object(operation->>'id', result);
+            END IF;
+            ordered := ordered || jsonb_build_array(result);
+            step := step + 1;
+        END LOOP;
+    EXCEPTION WHEN OTHERS THEN
+        -- Re-raised, so the steps already applied are rolled back with the failed one
+        RAISE EXCEPTION 'Batch step % (%) failed: %', step, coalesce(step_action, '(none)'), SQLERRM
+            USING ERRCODE = SQLSTATE;
+    END;
+
+    RETURN ordered;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Batches are run by ai-agent-api with the service role, not called by clients
+REVOKE EXECUTE ON FUNCTION public.run_agent_batch(JSONB) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,203 @@
+-- Version tokens for ai-agent-api's listings (list_tasks, list_projects,
+-- analyze_workload), which it turns into ETags. Each organization has a
+-- counter in listing_versions that statement-level triggers bump whenever a
+-- row a listing is built from changes: tasks, their assignees and comments,
+-- the assignees' profiles, projects and organizations. Rollups change only
+-- through tasks (time entries move tasks.logged_hours), so they need no trigger
+-- of their own. The counter is bumped inside the writing transaction, so a
+-- change committed late still moves it, and reading it is one row lookup.
+-- Rows with no organization (a task without a project) bump the nil UUID's
+-- counter. Tokens without an organization are the sum of all counters.
+CREATE TABLE public.listing_versions (
+    -- No foreign key: a deleted organization's counter must keep counting
+    organization_id UUID PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE public.listing_versions ENABLE ROW LEVEL SECURITY;
+
+-- TG_ARGV[0] is the column naming the changed rows' owner and TG_ARGV[1] what
+-- it refers to: an organization, a project, a task or a user (whose
+-- organizations are those they are a member of)
+CREATE OR REPLACE FUNCTION public.bump_listing_versions()
+RETURNS TRIGGER AS $$
+DECLARE
+    owners UUID[] := '{}';
+    organizations UUID[];
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        owners := owners || ARRAY(SELECT DISTINCT (to_jsonb(r)->>TG_ARGV[0])::UUID FROM old_rows r);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        owners := owners || ARRAY(SELECT DISTINCT (to_jsonb(r)->>TG_ARGV[0])::UUID FROM new_rows r);
+    END IF;
+
+    CASE TG_ARGV[1]
+    WHEN 'organization' THEN
+        organizations := owners;
+    WHEN 'project' THEN
+        organizations := ARRAY(
+            SELECT p.organization_id
+            FROM unnest(owners) AS o(id)
+            LEFT JOIN public.projects p ON p.id = o.id
+            -- Projects deleted by the same statement are counted by their own trigger
+            WHERE o.id IS NULL OR p.id IS NOT NULL
+        );
+    WHEN 'task' THEN
+        organizations := ARRAY(
+            SELECT p.organization_id
+            FROM unnest(owners) AS o(id)
+            JOIN public.tasks t ON t.id = o.id
+            LEFT JOIN public.projects p ON p.id = t.project_id
+        );
+    WHEN 'user' THEN
+        organizations := ARRAY(
+            SELECT m.organization_id
+            FROM public.organization_members m
+            WHERE m.user_id = ANY(owners)
+        );
+    END CASE;
+
+    -- Ordered so concurrent statements lock counters in the same order
+    INSERT INTO public.listing_versions AS v (organization_id, version)
+    SELECT DISTINCT coalesce(o, '00000000-0000-0000-0000-000000000000'), 1
+    FROM unnest(organizations) AS o
+    ORDER BY 1
+    ON CONFLICT (organization_id) DO UPDATE
+    SET version = v.version + 1, updated_at = NOW();
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER bump_listing_versions_tasks_insert AFTER INSERT ON public.tasks
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('project_id', 'project');
+CREATE TRIGGER bump_listing_versions_tasks_update AFTER UPDATE ON public.tasks
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('project_id', 'project');
+CREATE TRIGGER bump_listing_versions_tasks_delete AFTER DELETE ON public.tasks
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('project_id', 'project');
+
+CREATE TRIGGER bump_listing_versions_assignees_insert AFTER INSERT ON public.task_assignees
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('task_id', 'task');
+CREATE TRIGGER bump_listing_versions_assignees_update AFTER UPDATE ON public.task_assignees
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('task_id', 'task');
+CREATE TRIGGER bump_listing_versions_assignees_delete AFTER DELETE ON public.task_assignees
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('task_id', 'task');
+
+-- Only the comment count is listed, so edits do not matter
+CREATE TRIGGER bump_listing_versions_comments_insert AFTER INSERT ON public.comments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('task_id', 'task');
+CREATE TRIGGER bump_listing_versions_comments_delete AFTER DELETE ON public.comments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('task_id', 'task');
+
+-- Assignees are embedded with their profiles
+CREATE TRIGGER bump_listing_versions_profiles_update AFTER UPDATE ON public.profiles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('id', 'user');
+
+CREATE TRIGGER bump_listing_versions_projects_insert AFTER INSERT ON public.projects
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('organization_id', 'organization');
+CREATE TRIGGER bump_listing_versions_projects_update AFTER UPDATE ON public.projects
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('organization_id', 'organization');
+CREATE TRIGGER bump_listing_versions_projects_delete AFTER DELETE ON public.projects
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('organization_id', 'organization');
+
+CREATE TRIGGER bump_listing_versions_organizations_update AFTER UPDATE ON public.organizations
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('id', 'organization');
+CREATE TRIGGER bump_listing_versions_organizations_delete AFTER DELETE ON public.organizations
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_listing_versions('id', 'organization');
+
+-- The counter of for_organization, or the sum of all counters
+CREATE OR REPLACE FUNCTION public.organization_listing_version(for_organization UUID DEFAULT NULL)
+RETURNS TEXT AS $$
+    SELECT CASE WHEN for_organization IS NULL
+        THEN 'all:' || (SELECT coalesce(sum(version), 0) FROM public.listing_versions)
+        ELSE for_organization || ':' || coalesce(
+            (SELECT version FROM public.listing_versions WHERE organization_id = for_organization), 0)
+    END;
+$$ LANGUAGE sql STABLE;
+
+-- A project listing is scoped to the project's organization
+CREATE OR REPLACE FUNCTION public.task_listing_version(
+    for_organization UUID DEFAULT NULL,
+    for_project UUID DEFAULT NULL
+)
+RETURNS TEXT AS $$
+    SELECT public.organization_listing_version(coalesce(
+        for_organization,
+        (SELECT p.organization_id FROM public.projects p WHERE p.id = for_project)
+    ));
+$$ LANGUAGE sql STABLE;
+
+-- Overdue counts also change with the clock: the next open due date still
+-- ahead (one probe per project of idx_tasks_open_project_due) changes when one passes
+CREATE OR REPLACE FUNCTION public.project_listing_version(
+    for_organization UUID DEFAULT NULL,
+    with_stats BOOLEAN DEFAULT FALSE
+)
+RETURNS TEXT AS $$
+    SELECT concat_ws('/',
+        public.organization_listing_version(for_organization),
+        CASE WHEN with_stats THEN (
+            SELECT coalesce(min(next_due.due_date)::TEXT, '-')
+            FROM public.projects p
+            CROSS JOIN LATERAL (
+                SELECT t.due_date
+                FROM public.tasks t
+                WHERE t.project_id = p.id AND t.status <> 'done' AND t.due_date > NOW()
+                ORDER BY t.due_date
+                LIMIT 1
+            ) next_due
+            WHERE for_organization IS NULL OR p.organization_id = for_organization
+        ) END
+    );
+$$ LANGUAGE sql STABLE;
+
+CREATE INDEX idx_tasks_project_due ON public.tasks(project_id, due_date);
+
+-- analyze_workload's overdue and due-this-week counts change when a due date
+-- passes NOW() or NOW() + 7 days; the token holds the next due date beyond each.
+-- A listing for one user is covered by its organization's token.
+CREATE OR REPLACE FUNCTION public.workload_version(for_organization UUID DEFAULT NULL)
+RETURNS TEXT AS $$
+    WITH bounds(after) AS (
+        VALUES (NOW()), (NOW() + INTERVAL '7 days')
+    )
+    SELECT concat_ws('/',
+        public.organization_listing_version(for_organization),
+        (SELECT string_agg(coalesce(next_due::TEXT, '-'), ',' ORDER BY after)
+         FROM bounds
+         CROSS JOIN LATERAL (
+            SELECT CASE WHEN for_organization IS NULL THEN (
+                -- One probe of idx_tasks_due_date
+                SELECT min(t.due_date) FROM public.tasks t WHERE t.due_date > bounds.after
+            ) ELSE (
+                -- One probe of idx_tasks_project_due per project
+                SELECT min(d.due_date)
+                FROM public.projects p
+                CROSS JOIN LATERAL (
+                    SELECT t.due_date
+                    FROM public.tasks t
+                    WHERE t.project_id = p.id AND t.due_date > bounds.after
+                    ORDER BY t.due_date
+                    LIMIT 1
+                ) d
+                WHERE p.organization_id = for_organization
+            ) END AS next_due
+         ) n)
+    );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,8 @@
+-- Expertise and weekly capacity on profiles, for the capacity-aware backlog
+-- solver (agent-integration/python-agents/assignment.py) and team allocation.
+-- expertise holds lowercase terms matched against task titles and descriptions,
+-- e.g. {'billing', 'react'}. A NULL work_capacity means the solver's default
+-- (40 hours a week). IF NOT EXISTS because databases seeded with
+-- scripts/seed-strideshift-users.sql may have the columns already.
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS expertise TEXT[] NOT NULL DEFAULT '{}';
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS work_capacity INTEGER CHECK (work_capacity >= 0);
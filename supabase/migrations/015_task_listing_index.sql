@@ -0,0 +1,3 @@
+-- list_tasks orders by (created_at, id), newest first, and its stream pages on
+-- that key (ai-agent-api), so each page is one index range scan
+CREATE INDEX idx_tasks_created ON public.tasks(created_at DESC, id DESC);
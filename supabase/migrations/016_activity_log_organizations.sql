@@ -0,0 +1,29 @@
+-- ai-agent-api's export_tasks takes an organization's activity_logs rows by
+-- organization_id, but task rows can be written without one (the email
+-- processors never set it). A task row's organization is its project's, so it
+-- is filled in on insert and backfilled for rows already written. Rows for
+-- tasks with no project keep a NULL organization.
+CREATE OR REPLACE FUNCTION public.set_activity_log_organization()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.organization_id IS NULL AND NEW.entity_type = 'task' THEN
+        SELECT p.organization_id INTO NEW.organization_id
+        FROM public.tasks t
+        JOIN public.projects p ON p.id = t.project_id
+        WHERE t.id = NEW.entity_id;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER set_activity_log_organization BEFORE INSERT ON public.activity_logs
+    FOR EACH ROW EXECUTE FUNCTION public.set_activity_log_organization();
+
+UPDATE public.activity_logs l
+SET organization_id = p.organization_id
+FROM public.tasks t
+JOIN public.projects p ON p.id = t.project_id
+WHERE l.organization_id IS NULL AND l.entity_type = 'task' AND t.id = l.entity_id;
+
+-- The export pages on id within an organization, so each page is one index range scan
+CREATE INDEX idx_activity_logs_org_id ON public.activity_logs(organization_id, id);
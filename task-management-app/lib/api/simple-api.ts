@@ -1,6 +1,6 @@
 // Simplified API functions without complex joins to avoid Supabase query issues
 import { createClient } from '@/lib/supabase/client'
-import { UserRole } from '@/lib/types'
+import { UserRole, TaskWithDetails } from '@/lib/types'
 
 // ============= ORGANIZATIONS =============
 export async function getOrganizations() {
@@ -170,61 +170,40 @@ export async function deleteProject(projectId: string) {
 }
 
 // ============= TASKS =============
-export async function getTasks(projectId?: string) {
+export async function getTasks(
+  projectId?: string,
+  options?: { projectIds?: string[]; limit?: number; offset?: number }
+) {
   const supabase = createClient()
   const { data: { user } } = await supabase.auth.getUser()
   
   if (!user) return []
 
   try {
-    let query = supabase
-      .from('tasks')
-      .select('*')
-      .order('position', { ascending: true })
-
+    let projectIds: string[]
     if (projectId) {
-      query = query.eq('project_id', projectId)
+      projectIds = [projectId]
+    } else if (options?.projectIds) {
+      // Page a large board by loading a subset of its projects at a time
+      projectIds = options.projectIds
     } else {
       // Get all tasks from user's projects
       const projects = await getProjects()
       if (projects.length === 0) return []
       
-      const projectIds = projects.map(p => p.id)
-      query = query.in('project_id', projectIds)
+      projectIds = projects.map(p => p.id)
     }
 
-    const { data: tasks } = await query
-    
-    // If we have tasks, fetch their assignees and project details
-    if (tasks && tasks.length > 0) {
-      // Get all unique project IDs
-      const projectIds = [...new Set(tasks.map(t => t.project_id).filter(Boolean))]
-      
-      // Fetch project details
-      const { data: projectDetails } = await supabase
-        .from('projects')
-        .select('*')
-        .in('id', projectIds)
-      
-      const tasksWithDetails = await Promise.all(
-        tasks.map(async (task) => {
-          // Get assignees
-          const assignees = await getTaskAssignees(task.id)
-          
-          // Find project for this task
-          const project = projectDetails?.find(p => p.id === task.project_id) || null
-          
-          return {
-            ...task,
-            assignees,
-            project
-          }
-        })
-      )
-      return tasksWithDetails
-    }
-    
-    return tasks || []
+    // Tasks arrive with project and assignees (with profiles) embedded,
+    // so the board loads in one query regardless of its size
+    const { data: tasks, error } = await supabase.rpc('get_board_tasks', {
+      p_project_ids: projectIds,
+      p_limit: options?.limit,
+      p_offset: options?.offset,
+    })
+
+    if (error) throw error
+    return (tasks || []) as unknown as TaskWithDetails[]
   } catch (error) {
     console.error('Failed to get tasks:', error)
     return []
@@ -295,6 +274,13 @@ export async function createTask(data: {
 }
 
 // ============= NOTIFICATIONS =============
+// Delivers the current user's queued events that are ready, so notifications
+// arrive even where pg_cron does not run the flush (011_notification_digests.sql)
+async function flushQueuedNotifications(supabase: ReturnType<typeof createClient>) {
+  const { error } = await supabase.rpc('flush_my_notification_events')
+  if (error) console.error('Failed to flush queued notifications:', error)
+}
+
 export async function getNotifications(limit?: number) {
   const supabase = createClient()
   const { data: { user } } = await supabase.auth.getUser()
@@ -302,6 +288,8 @@ export async function getNotifications(limit?: number) {
   if (!user) return []
 
   try {
+    await flushQueuedNotifications(supabase)
+
     let query = supabase
       .from('notifications')
       .select('*')
@@ -329,14 +317,17 @@ export async function getUnreadNotificationCount() {
   if (!user) return 0
 
   try {
-    const { count, error } = await supabase
-      .from('notifications')
-      .select('*', { count: 'exact', head: true })
+    await flushQueuedNotifications(supabase)
+
+    // Maintained by triggers on notifications (011_notification_digests.sql)
+    const { data, error } = await supabase
+      .from('notification_counters')
+      .select('unread_count')
       .eq('user_id', user.id)
-      .eq('read', false)
+      .maybeSingle()
 
     if (error) throw error
-    return count || 0
+    return data?.unread_count || 0
   } catch (error) {
     console.error('Failed to get unread notification count:', error)
     return 0
@@ -379,12 +370,14 @@ export async function markAllNotificationsAsRead() {
   }
 }
 
-export async function createNotification(data: {
+type NotificationInput = {
   type: string
   title: string
   message?: string
   data?: any
-}) {
+}
+
+export async function createNotification(data: NotificationInput) {
   const supabase = createClient()
   const { data: { user } } = await supabase.auth.getUser()
   
@@ -411,6 +404,35 @@ export async function createNotification(data: {
   }
 }
 
+// Queues several notifications for the current user in one insert. Unlike
+// createNotification, they are delivered by the digest flush, which coalesces
+// a user's events of one type into a single notification (011_notification_digests.sql)
+export async function createNotifications(items: NotificationInput[]) {
+  const supabase = createClient()
+  const { data: { user } } = await supabase.auth.getUser()
+  
+  if (!user) throw new Error('Not authenticated')
+
+  try {
+    const { data: queued, error } = await supabase
+      .from('notification_events')
+      .insert(items.map(item => ({
+        user_id: user.id,
+        type: item.type,
+        title: item.title,
+        message: item.message,
+        data: item.data || {},
+      })))
+      .select()
+
+    if (error) throw error
+    return queued || []
+  } catch (error) {
+    console.error('Failed to create notification:', error)
+    throw error
+  }
+}
+
 // Helper function to create sample notifications for testing
 export async function createSampleNotifications() {
   const sampleNotifications = [
@@ -442,8 +464,7 @@ export async function createSampleNotifications() {
   ]
 
   try {
-    const promises = sampleNotifications.map(notif => createNotification(notif))
-    await Promise.all(promises)
+    await createNotifications(sampleNotifications)
     console.log('Sample notifications created successfully')
   } catch (error) {
     console.error('Failed to create sample notifications:', error)
@@ -211,6 +211,70 @@ export type Database = {
           },
         ]
       }
+      notification_counters: {
+        Row: {
+          unread_count: number
+          updated_at: string
+          user_id: string
+        }
+        Insert: {
+          unread_count?: number
+          updated_at?: string
+          user_id: string
+        }
+        Update: {
+          unread_count?: number
+          updated_at?: string
+          user_id?: string
+        }
+        Relationships: [
+          {
+            foreignKeyName: "notification_counters_user_id_fkey"
+            columns: ["user_id"]
+            isOneToOne: true
+            referencedRelation: "profiles"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
+      notification_events: {
+        Row: {
+          created_at: string
+          data: Json
+          id: number
+          message: string | null
+          title: string
+          type: string
+          user_id: string
+        }
+        Insert: {
+          created_at?: string
+          data?: Json
+          id?: number
+          message?: string | null
+          title: string
+          type: string
+          user_id: string
+        }
+        Update: {
+          created_at?: string
+          data?: Json
+          id?: number
+          message?: string | null
+          title?: string
+          type?: string
+          user_id?: string
+        }
+        Relationships: [
+          {
+            foreignKeyName: "notification_events_user_id_fkey"
+            columns: ["user_id"]
+            isOneToOne: false
+            referencedRelation: "profiles"
+            referencedColumns: ["id"]
+          },
+        ]
+      }
       notifications: {
         Row: {
           created_at: string | null
@@ -342,12 +406,14 @@ export type Database = {
           created_at: string | null
           department: string | null
           email: string
+          expertise: string[]
           full_name: string | null
           id: string
           phone: string | null
           role: Database["public"]["Enums"]["user_role"] | null
           timezone: string | null
           updated_at: string | null
+          work_capacity: number | null
         }
         Insert: {
           avatar_url?: string | null
@@ -355,12 +421,14 @@ export type Database = {
           created_at?: string | null
           department?: string | null
           email: string
+          expertise?: string[]
           full_name?: string | null
           id: string
           phone?: string | null
           role?: Database["public"]["Enums"]["user_role"] | null
           timezone?: string | null
           updated_at?: string | null
+          work_capacity?: number | null
         }
         Update: {
           avatar_url?: string | null
@@ -368,12 +436,14 @@ export type Database = {
           created_at?: string | null
           department?: string | null
           email?: string
+          expertise?: string[]
           full_name?: string | null
           id?: string
           phone?: string | null
           role?: Database["public"]["Enums"]["user_role"] | null
           timezone?: string | null
           updated_at?: string | null
+          work_capacity?: number | null
         }
         Relationships: []
       }
@@ -751,6 +821,14 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
+      flush_my_notification_events: {
+        Args: Record<PropertyKey, never>
+        Returns: number
+      }
+      get_board_tasks: {
+        Args: { p_project_ids?: string[]; p_limit?: number; p_offset?: number }
+        Returns: Json[]
+      }
       get_user_organizations: {
         Args: { user_id: string }
         Returns: string[]